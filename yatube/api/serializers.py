@@ -0,0 +1,94 @@
+"""Представление моделей в API.
+
+Строки читаются через ``.values()`` только с нужными колонками, без
+создания экземпляров моделей. Параметр ``?fields=`` выбирает
+подмножество полей ресурса.
+"""
+from django.core.files.storage import default_storage
+
+
+class FieldError(ValueError):
+    pass
+
+
+def _image_url(name):
+    return default_storage.url(name) if name else None
+
+
+class Serializer:
+    # Имя поля в API -> выражение для .values().
+    fields = {}
+    transforms = {}
+
+    def __init__(self, fields=None):
+        if not fields:
+            fields = list(self.fields)
+        unknown = [name for name in fields if name not in self.fields]
+        if unknown:
+            raise FieldError(
+                f'Неизвестные поля: {", ".join(unknown)}. '
+                f'Доступны: {", ".join(self.fields)}.'
+            )
+        self.selected = fields
+
+    @classmethod
+    def from_request(cls, request):
+        fields = request.GET.get('fields', '')
+        return cls([name for name in fields.split(',') if name])
+
+    def values(self, queryset, *extra):
+        """``.values()`` выбранных полей и служебных колонок ``extra``."""
+        lookups = {self.fields[name] for name in self.selected}
+        return queryset.values(*lookups.union(extra))
+
+    def row(self, row):
+        result = {}
+        for name in self.selected:
+            value = row[self.fields[name]]
+            transform = self.transforms.get(name)
+            result[name] = transform(value) if transform else value
+        return result
+
+    def rows(self, rows):
+        return [self.row(row) for row in rows]
+
+
+class PostSerializer(Serializer):
+    fields = {
+        'id': 'id',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'image': 'image',
+        'comments_count': 'comments_count',
+    }
+    transforms = {'image': _image_url}
+
+
+class GroupSerializer(Serializer):
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'slug': 'slug',
+        'description': 'description',
+        'posts_count': 'posts_count',
+    }
+
+
+class CommentSerializer(Serializer):
+    fields = {
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    }
+
+
+class FollowSerializer(Serializer):
+    fields = {
+        'id': 'id',
+        'user': 'user__username',
+        'author': 'author__username',
+    }
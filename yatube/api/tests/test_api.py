@@ -0,0 +1,205 @@
+import json
+
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='Ivan')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {i}', group=cls.group
+            )
+            for i in range(15)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        caches['ratelimit'].clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def send(self, client, method, url, data=None):
+        return getattr(client, method)(
+            url, json.dumps(data or {}), content_type='application/json'
+        )
+
+    def test_posts_are_paginated_by_cursor(self):
+        """Курсоры обходят все посты без повторов."""
+
+        url = reverse('api:v1:posts')
+        seen = []
+        while url:
+            response = self.guest_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            seen.extend(post['id'] for post in data['results'])
+            url = data['next']
+        self.assertEqual(
+            seen, [post.pk for post in reversed(self.posts)]
+        )
+
+    def test_sparse_fieldsets_in_one_query(self):
+        """Ответ содержит только запрошенные поля и строится одним
+        запросом без создания моделей."""
+
+        url = reverse('api:v1:posts') + '?fields=id,author&limit=5'
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(url)
+        results = response.json()['results']
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[0], {
+            'id': self.posts[-1].pk, 'author': self.author.username
+        })
+        response = self.guest_client.get(
+            reverse('api:v1:posts') + '?fields=password'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_conditional_get(self):
+        """Повторный запрос с ETag получает 304, пока пост не изменился."""
+
+        url = reverse('api:v1:post_detail', args=[self.posts[0].pk])
+        response = self.guest_client.get(url)
+        self.assertTrue(response.has_header('Last-Modified'))
+        etag = response['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(
+            post=self.posts[0], author=self.user, text='Комментарий'
+        )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['comments_count'], 1)
+
+    def test_list_revalidated_after_comment(self):
+        """Список постов с числом комментариев не отвечает 304 после
+        нового комментария."""
+
+        url = reverse('api:v1:posts') + '?fields=id,comments_count&limit=1'
+        etag = self.guest_client.get(url)['ETag']
+        Comment.objects.create(
+            post=self.posts[-1], author=self.user, text='Комментарий'
+        )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['comments_count'], 1)
+
+    def test_create_and_edit_post(self):
+        """Пост создаёт вошедший пользователь, меняет только автор."""
+
+        url = reverse('api:v1:posts')
+        data = {'text': 'Новый пост', 'group': self.group.slug}
+        self.assertEqual(
+            self.send(self.guest_client, 'post', url, data).status_code, 401
+        )
+        response = self.send(self.authorized_client, 'post', url, data)
+        self.assertEqual(response.status_code, 201)
+        created = response.json()
+        self.assertEqual(created['group'], self.group.slug)
+        self.assertEqual(created['author'], self.user.username)
+
+        detail = reverse('api:v1:post_detail', args=[created['id']])
+        response = self.send(
+            self.author_client, 'patch', detail, {'text': 'Чужой'}
+        )
+        self.assertEqual(response.status_code, 403)
+        response = self.send(
+            self.authorized_client, 'patch', detail, {'text': 'Правка'}
+        )
+        self.assertEqual(response.json()['text'], 'Правка')
+        self.assertEqual(response.json()['group'], self.group.slug)
+        response = self.authorized_client.delete(detail)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Post.objects.filter(pk=created['id']).exists())
+
+    def test_invalid_post_is_rejected(self):
+        response = self.send(
+            self.authorized_client, 'post', reverse('api:v1:posts'),
+            {'text': '', 'group': 'no-such-group'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('group', response.json()['errors'])
+
+    def test_comments(self):
+        url = reverse('api:v1:comments', args=[self.posts[0].pk])
+        response = self.send(
+            self.authorized_client, 'post', url, {'text': 'Комментарий'}
+        )
+        self.assertEqual(response.status_code, 201)
+        results = self.guest_client.get(url).json()['results']
+        self.assertEqual([c['text'] for c in results], ['Комментарий'])
+
+    def test_follows(self):
+        """Подписки видит и меняет только их владелец."""
+
+        url = reverse('api:v1:follows')
+        self.assertEqual(self.guest_client.get(url).status_code, 401)
+        response = self.send(
+            self.authorized_client, 'post', url,
+            {'author': self.author.username}
+        )
+        self.assertEqual(response.status_code, 201)
+        results = self.authorized_client.get(url).json()['results']
+        self.assertEqual(results[0]['author'], self.author.username)
+        response = self.authorized_client.delete(reverse(
+            'api:v1:follow_detail', args=[self.author.username]
+        ))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Follow.objects.filter(user=self.user).exists())
+
+    def test_csrf_failure_is_json(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = self.send(
+            client, 'post', reverse('api:v1:posts'), {'text': 'Текст'}
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('detail', response.json())
+        response = client.post(reverse('posts:create_post'), {'text': 'Т'})
+        self.assertEqual(response.status_code, 403)
+        self.assertTemplateUsed(response, 'core/403csrf.html')
+
+    @override_settings(RATELIMITS={'comment': (2, 60)})
+    def test_writes_are_rate_limited(self):
+        """API пишет под теми же лимитами, что и HTML-страницы."""
+
+        url = reverse('api:v1:comments', args=[self.posts[0].pk])
+        for _ in range(2):
+            response = self.send(
+                self.authorized_client, 'post', url, {'text': 'Спам'}
+            )
+            self.assertEqual(response.status_code, 201)
+        response = self.send(
+            self.authorized_client, 'post', url, {'text': 'Спам'}
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('detail', response.json())
+        self.assertTrue(1 <= int(response['Retry-After']) <= 120)
+        self.assertEqual(Comment.objects.filter(text='Спам').count(), 2)
+        # Чтение не ограничивается.
+        self.assertEqual(self.authorized_client.get(url).status_code, 200)
+
+    def test_groups(self):
+        response = self.guest_client.get(
+            reverse('api:v1:group_detail', args=[self.group.slug])
+        )
+        self.assertEqual(response.json()['posts_count'], len(self.posts))
+        response = self.guest_client.get(
+            reverse('api:v1:group_detail', args=['missing'])
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,52 @@
+from django.urls import include, path
+
+from . import views
+
+app_name = 'api'
+
+v1_patterns = [
+    path(
+        'posts/',
+        views.posts,
+        name='posts'
+    ),
+    path(
+        'posts/<int:post_id>/',
+        views.post_detail,
+        name='post_detail'
+    ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comments,
+        name='comments'
+    ),
+    path(
+        'posts/<int:post_id>/comments/<int:comment_id>/',
+        views.comment_detail,
+        name='comment_detail'
+    ),
+    path(
+        'groups/',
+        views.groups,
+        name='groups'
+    ),
+    path(
+        'groups/<slug:slug>/',
+        views.group_detail,
+        name='group_detail'
+    ),
+    path(
+        'follow/',
+        views.follows,
+        name='follows'
+    ),
+    path(
+        'follow/<str:username>/',
+        views.follow_detail,
+        name='follow_detail'
+    ),
+]
+
+urlpatterns = [
+    path('v1/', include((v1_patterns, 'v1'))),
+]
@@ -0,0 +1,283 @@
+import json
+from functools import wraps
+
+from core.ratelimit import check as check_ratelimit
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, Follow, Group, Post, User
+from posts.paginators import CursorPaginator, InvalidCursor
+from posts.utils import conditional
+from posts.versions import scope_key
+
+from .serializers import (
+    CommentSerializer, FieldError, FollowSerializer, GroupSerializer,
+    PostSerializer,
+)
+
+PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+class BadRequest(Exception):
+    pass
+
+
+def error(status, detail, **extra):
+    return JsonResponse(
+        {'detail': detail, **extra},
+        status=status,
+        json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def _throttled(request, scope):
+    """Ответ 429, если запись превысила политику ``scope``."""
+    if scope is None or request.method in SAFE_METHODS:
+        return None
+    retry_after = check_ratelimit(request, scope)
+    if not retry_after:
+        return None
+    response = error(429, 'Слишком много запросов.')
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def api_view(*methods, login_required=False, ratelimit=None):
+    """Допустимые методы, вход для записи и ошибки в JSON.
+
+    Запись ограничивается политикой ``ratelimit`` из ``RATELIMITS``,
+    той же, что у HTML-страниц.
+    """
+    allowed = set(methods)
+    if 'GET' in allowed:
+        allowed.add('HEAD')
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in allowed:
+                response = error(405, 'Метод не поддерживается.')
+                response['Allow'] = ', '.join(sorted(allowed))
+                return response
+            needs_login = (
+                login_required or request.method not in SAFE_METHODS
+            )
+            if needs_login and not request.user.is_authenticated:
+                return error(401, 'Требуется вход.')
+            throttled = _throttled(request, ratelimit)
+            if throttled is not None:
+                return throttled
+            try:
+                return view(request, *args, **kwargs)
+            except Http404:
+                return error(404, 'Не найдено.')
+            except (BadRequest, FieldError) as exc:
+                return error(400, str(exc))
+        return wrapper
+    return decorator
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError:
+        raise BadRequest('limit должен быть числом.')
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise BadRequest(f'limit должен быть от 1 до {MAX_PAGE_SIZE}.')
+    return limit
+
+
+def _link(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+def _page(request, serializer, queryset, ordering):
+    """Страница ресурса с курсорами на соседние страницы."""
+    field = ordering.lstrip('-')
+    paginator = CursorPaginator(
+        serializer.values(queryset, field, 'id'), _limit(request), ordering
+    )
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        raise BadRequest('Некорректный курсор.')
+    return JsonResponse({
+        'next': _link(request, page.next_cursor),
+        'previous': _link(request, page.previous_cursor),
+        'results': serializer.rows(page),
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+def _detail(serializer, queryset, status=200):
+    row = serializer.values(queryset).first()
+    if row is None:
+        raise Http404
+    return JsonResponse(
+        serializer.row(row),
+        status=status,
+        json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def _payload(request):
+    """Данные запроса: JSON или, для POST, multipart-форма с файлами."""
+    if request.content_type == 'multipart/form-data':
+        if request.method != 'POST':
+            raise BadRequest('Файлы принимаются только в POST.')
+        return request.POST.dict(), request.FILES
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        raise BadRequest('Тело запроса должно быть JSON.')
+    if not isinstance(data, dict):
+        raise BadRequest('Тело запроса должно быть JSON-объектом.')
+    return data, None
+
+
+def _save_post(request, post, status=200):
+    data, files = _payload(request)
+    if request.method == 'PATCH':
+        data.setdefault('text', post.text)
+        data.setdefault('group', post.group.slug if post.group else None)
+    if data.get('group'):
+        group_id = (
+            Group.objects.filter(slug=data['group'])
+            .values_list('pk', flat=True).first()
+        )
+        if group_id is None:
+            return error(400, 'Некорректные данные.', errors={
+                'group': ['Группа не найдена.']
+            })
+        data['group'] = group_id
+    form = PostForm(data, files, instance=post)
+    if not form.is_valid():
+        return error(400, 'Некорректные данные.', errors=form.errors)
+    post = form.save()
+    return _detail(PostSerializer(), Post.objects.filter(pk=post.pk), status)
+
+
+@api_view('GET', 'POST', ratelimit='post')
+@conditional(lambda request: [scope_key('feed'), scope_key('comments')])
+def posts(request):
+    if request.method == 'POST':
+        return _save_post(request, Post(author=request.user), status=201)
+    queryset = Post.objects.all()
+    if request.GET.get('group'):
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        queryset = queryset.filter(author__username=request.GET['author'])
+    return _page(
+        request, PostSerializer.from_request(request), queryset, '-pub_date'
+    )
+
+
+@api_view('GET', 'PUT', 'PATCH', 'DELETE', ratelimit='post')
+@conditional(lambda request, post_id: [scope_key('post', post_id)])
+def post_detail(request, post_id):
+    if request.method in SAFE_METHODS:
+        return _detail(
+            PostSerializer.from_request(request),
+            Post.objects.filter(pk=post_id)
+        )
+    post = get_object_or_404(Post.objects.select_related('group'), pk=post_id)
+    if post.author_id != request.user.pk:
+        return error(403, 'Изменять пост может только автор.')
+    if request.method == 'DELETE':
+        post.delete()
+        return HttpResponse(status=204)
+    return _save_post(request, post)
+
+
+@api_view('GET')
+@conditional(lambda request: [scope_key('groups'), scope_key('feed')])
+def groups(request):
+    return _page(
+        request, GroupSerializer.from_request(request),
+        Group.objects.all(), 'id'
+    )
+
+
+@api_view('GET')
+@conditional(lambda request, slug: [scope_key('groups'), scope_key('feed')])
+def group_detail(request, slug):
+    return _detail(
+        GroupSerializer.from_request(request),
+        Group.objects.filter(slug=slug)
+    )
+
+
+@api_view('GET', 'POST', ratelimit='comment')
+@conditional(lambda request, post_id: [scope_key('post', post_id)])
+def comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), pk=post_id)
+    if request.method == 'POST':
+        data, _ = _payload(request)
+        form = CommentForm(data)
+        if not form.is_valid():
+            return error(400, 'Некорректные данные.', errors=form.errors)
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post = post
+        comment.save()
+        return _detail(
+            CommentSerializer(), Comment.objects.filter(pk=comment.pk), 201
+        )
+    return _page(
+        request, CommentSerializer.from_request(request),
+        Comment.objects.filter(post=post), '-created'
+    )
+
+
+@api_view('GET', 'DELETE', ratelimit='comment')
+@conditional(
+    lambda request, post_id, comment_id: [scope_key('post', post_id)]
+)
+def comment_detail(request, post_id, comment_id):
+    queryset = Comment.objects.filter(post_id=post_id, pk=comment_id)
+    if request.method in SAFE_METHODS:
+        return _detail(CommentSerializer.from_request(request), queryset)
+    comment = get_object_or_404(queryset)
+    if comment.author_id != request.user.pk:
+        return error(403, 'Удалять комментарий может только автор.')
+    comment.delete()
+    return HttpResponse(status=204)
+
+
+@api_view('GET', 'POST', login_required=True, ratelimit='follow')
+@conditional(lambda request: [scope_key('follow', request.user.pk)])
+def follows(request):
+    if request.method == 'GET':
+        return _page(
+            request, FollowSerializer.from_request(request),
+            Follow.objects.filter(user=request.user), '-id'
+        )
+    data, _ = _payload(request)
+    author = get_object_or_404(
+        User.objects.only('id'), username=data.get('author')
+    )
+    if author.pk == request.user.pk:
+        return error(400, 'Нельзя подписаться на себя.')
+    follow, created = Follow.objects.get_or_create(
+        user=request.user, author=author
+    )
+    return _detail(
+        FollowSerializer(), Follow.objects.filter(pk=follow.pk),
+        201 if created else 200
+    )
+
+
+@api_view('DELETE', ratelimit='follow')
+def follow_detail(request, username):
+    deleted, _ = Follow.objects.filter(
+        user=request.user, author__username=username
+    ).delete()
+    if not deleted:
+        raise Http404
+    return HttpResponse(status=204)
@@ -0,0 +1,167 @@
+"""Обёртка над бэкендами кэша Django.
+
+``InstrumentedCache`` делегирует работу настоящему бэкенду из
+``OPTIONS['BACKEND']`` и добавляет:
+
+* счётчики попаданий и промахов по каждому алиасу кэша;
+* защиту от «набега» (cache stampede) вероятностным досрочным
+  пересчётом: незадолго до истечения записи один из читателей получает
+  промах и пересчитывает значение, пока остальные читают старое.
+"""
+import math
+import random
+import threading
+import time
+from collections import Counter, namedtuple
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+from . import metrics
+
+Envelope = namedtuple('Envelope', ('value', 'expires_at', 'delta'))
+
+# Сколько промахов помнить, ожидая записи пересчитанного значения.
+MAX_TRACKED_KEYS = 10000
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def record(alias, event, count=1):
+    with _stats_lock:
+        _stats[alias, event] += count
+    metrics.track_cache(event, count)
+
+
+def stats():
+    """Счётчики текущего процесса: {алиас: {событие: число}}."""
+    result = {}
+    with _stats_lock:
+        for (alias, event), count in _stats.items():
+            result.setdefault(alias, {})[event] = count
+    return result
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class InstrumentedCache(BaseCache):
+    def __init__(self, location, params):
+        params = dict(params)
+        options = dict(params.pop('OPTIONS', None) or {})
+        backend = import_string(options.pop('BACKEND'))
+        self.alias = options.pop('ALIAS', location)
+        self.beta = float(options.pop('BETA', 1.0))
+        super().__init__(params)
+        self._cache = backend(location, dict(params, OPTIONS=options))
+        self._recompute_started = {}
+
+    # Досрочный пересчёт.
+
+    def _wrap(self, key, value, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None or timeout <= 0 or type(value) is int:
+            # Бессрочные значения (поколения) и счётчики хранятся как
+            # есть, чтобы работали incr/decr.
+            return value
+        started = self._recompute_started.pop(key, None)
+        delta = time.monotonic() - started if started is not None else 0
+        return Envelope(value, time.time() + timeout, delta)
+
+    def _expired_early(self, envelope):
+        if not envelope.delta:
+            return False
+        # XFetch: чем дороже пересчёт и ближе истечение, тем вероятнее.
+        early = -envelope.delta * self.beta * math.log(random.random())
+        return time.time() + early >= envelope.expires_at
+
+    def _start_recompute(self, key):
+        if len(self._recompute_started) >= MAX_TRACKED_KEYS:
+            self._recompute_started.clear()
+        self._recompute_started[key] = time.monotonic()
+
+    def _unwrap(self, key, value, default):
+        if value is None:
+            record(self.alias, 'misses')
+            self._start_recompute(key)
+            return default
+        if isinstance(value, Envelope):
+            if self._expired_early(value):
+                record(self.alias, 'early_recomputes')
+                self._start_recompute(key)
+                return default
+            value = value.value
+        record(self.alias, 'hits')
+        return value
+
+    # Интерфейс BaseCache.
+
+    def get(self, key, default=None, version=None):
+        value = self._cache.get(key, version=version)
+        return self._unwrap(key, value, default)
+
+    def get_many(self, keys, version=None):
+        found = self._cache.get_many(keys, version=version)
+        record(self.alias, 'misses', len(set(keys)) - len(found))
+        record(self.alias, 'hits', len(found))
+        return {
+            key: value.value if isinstance(value, Envelope) else value
+            for key, value in found.items()
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._cache.set(
+            key, self._wrap(key, value, timeout), timeout, version=version
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._cache.add(
+            key, self._wrap(key, value, timeout), timeout, version=version
+        )
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        data = {
+            key: self._wrap(key, value, timeout)
+            for key, value in data.items()
+        }
+        return self._cache.set_many(data, timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._cache.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._cache.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        self._cache.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        return self._cache.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        return self._cache.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        return self._cache.decr(key, delta, version=version)
+
+    def forget(self):
+        """Перестаёт читать записи алиаса в этом процессе.
+
+        Алиасы делят одно хранилище и отличаются только префиксом,
+        поэтому ``clear()`` стирает и соседей. Здесь же меняется версия
+        ключей: старые записи алиаса больше не читаются и истекают сами.
+        """
+        self._recompute_started.clear()
+        self._cache.version += 1
+        self.version = self._cache.version
+
+    def clear(self):
+        self._recompute_started.clear()
+        self._cache.clear()
+
+    def close(self, **kwargs):
+        self._cache.close(**kwargs)
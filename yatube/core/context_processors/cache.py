@@ -0,0 +1,8 @@
+from django.conf import settings
+
+
+def fragment_cache(request):
+    """Добавляет время жизни фрагментного кэша для тега cache."""
+    return {
+        'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT
+    }
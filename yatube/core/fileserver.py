@@ -0,0 +1,196 @@
+"""Отдача статики и медиа прямо из WSGI, минуя Django.
+
+``FileServer`` оборачивает приложение и отвечает на GET и HEAD по
+адресам смонтированных каталогов; всё остальное, включая файлы,
+которых нет на диске, уходит в приложение.
+
+- Файлы, адрес которых меняется вместе с содержимым (статика с хэшем
+  в имени, картинки постов по хэшу содержимого), кэшируются браузером
+  на ``FILES_IMMUTABLE_MAX_AGE`` с ``immutable``, прочие — на
+  ``FILES_MAX_AGE``.
+- ETag строится из времени изменения и размера файла; совпавший
+  If-None-Match получает 304 без тела.
+- Заранее сжатые ``.br`` и ``.gz`` копии отдаются клиентам, которые их
+  принимают.
+- Заголовок Range с одним диапазоном байт получает 206, чтобы
+  докачка и перемотка не скачивали файл заново.
+"""
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+
+BLOCK_SIZE = 64 * 1024
+
+ENCODINGS = (('br', 'br'), ('gzip', 'gz'))
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме запрещённых ``q=0``."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = params.strip().replace(' ', '')
+        if quality in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """Пара (начало, конец включительно), None без диапазона или
+    ValueError, если диапазон не пересекается с файлом."""
+    match = RANGE.match(header.replace(' ', ''))
+    if match is None:
+        # Несколько диапазонов и прочие единицы: отдаём файл целиком.
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def etag_matches(header, etag):
+    if header.strip() == '*':
+        return True
+    tags = (tag.strip() for tag in header.split(','))
+    return etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+
+
+def _read(path, start, length):
+    with open(path, 'rb') as stream:
+        stream.seek(start)
+        while length > 0:
+            chunk = stream.read(min(BLOCK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+class FileServer:
+    """WSGI-обёртка, отдающая файлы из каталогов ``mounts``.
+
+    ``mounts`` — тройки (префикс адреса, каталог, все ли файлы
+    неизменны); в статике неизменными считаются только имена с хэшем.
+    """
+
+    def __init__(self, application, mounts):
+        self.application = application
+        self.mounts = [
+            (prefix, os.path.realpath(root), immutable)
+            for prefix, root, immutable in mounts
+            # Статика с другого домена (CDN) сюда не приходит.
+            if prefix.startswith('/') and root
+        ]
+
+    def __call__(self, environ, start_response):
+        if environ.get('REQUEST_METHOD') in ('GET', 'HEAD'):
+            found = self.find(environ.get('PATH_INFO', ''))
+            if found is not None:
+                return self.serve(environ, start_response, *found)
+        return self.application(environ, start_response)
+
+    def find(self, path_info):
+        """Путь к файлу и признак неизменности или None."""
+        # PATH_INFO в WSGI — байты UTF-8, прочитанные как latin-1.
+        path = path_info.encode('iso-8859-1').decode('utf-8', 'replace')
+        for prefix, root, immutable in self.mounts:
+            if not path.startswith(prefix):
+                continue
+            relative = path[len(prefix):]
+            if '\x00' in relative:
+                # realpath падает на нулевом байте; такой адрес отдаём
+                # Django, и он ответит 404.
+                return None
+            full = os.path.realpath(os.path.join(root, relative))
+            if full.startswith(root + os.sep) and os.path.isfile(full):
+                return full, immutable or bool(HASHED_NAME.search(relative))
+        return None
+
+    def headers(self, path, immutable):
+        content_type, _ = mimetypes.guess_type(path)
+        max_age = (
+            settings.FILES_IMMUTABLE_MAX_AGE if immutable
+            else settings.FILES_MAX_AGE
+        )
+        cache_control = f'public, max-age={max_age}'
+        if immutable:
+            cache_control += ', immutable'
+        return {
+            'Content-Type': content_type or 'application/octet-stream',
+            'Cache-Control': cache_control,
+            'Accept-Ranges': 'bytes',
+            'Vary': 'Accept-Encoding',
+        }
+
+    def variant(self, environ, path):
+        """Сжатая копия, которую примет клиент: (путь, кодировка)."""
+        accepted = accepted_encodings(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        for coding, extension in ENCODINGS:
+            compressed = f'{path}.{extension}'
+            if coding in accepted and os.path.isfile(compressed):
+                return compressed, coding
+        return path, None
+
+    def serve(self, environ, start_response, path, immutable):
+        headers = self.headers(path, immutable)
+        stat = os.stat(path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        requested = environ.get('HTTP_RANGE')
+        if_range = environ.get('HTTP_IF_RANGE')
+        if requested and (not if_range or if_range == etag):
+            # Диапазон считается в байтах исходного файла, без сжатия.
+            body_path, coding = path, None
+        else:
+            requested = None
+            body_path, coding = self.variant(environ, path)
+        if coding is not None:
+            headers['Content-Encoding'] = coding
+            etag = f'{etag[:-1]}-{coding}"'
+        headers['ETag'] = etag
+        headers['Last-Modified'] = formatdate(stat.st_mtime, usegmt=True)
+        if etag_matches(environ.get('HTTP_IF_NONE_MATCH', ''), etag):
+            del headers['Content-Type']
+            return self.respond(start_response, '304 Not Modified', headers)
+        size = os.path.getsize(body_path)
+        try:
+            byte_range = parse_range(requested, size) if requested else None
+        except ValueError:
+            headers['Content-Range'] = f'bytes */{size}'
+            headers['Content-Length'] = '0'
+            return self.respond(
+                start_response, '416 Range Not Satisfiable', headers
+            )
+        if byte_range is None:
+            status, start, length = '200 OK', 0, size
+        else:
+            start, end = byte_range
+            status, length = '206 Partial Content', end - start + 1
+            headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        headers['Content-Length'] = str(length)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return self.respond(start_response, status, headers)
+        start_response(status, list(headers.items()))
+        if byte_range is not None:
+            return _read(body_path, start, length)
+        wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return wrapper(open(body_path, 'rb'), BLOCK_SIZE)
+
+    def respond(self, start_response, status, headers):
+        start_response(status, list(headers.items()))
+        return []
@@ -0,0 +1,141 @@
+"""Очередь фоновых задач в таблице базы данных.
+
+Задача регистрируется декоратором ``task`` под именем и ставится в
+очередь ``enqueue``: строка ``Job`` пишется в той же транзакции, что и
+данные, поэтому воркер не увидит задачу до коммита и не потеряет её
+при откате. Воркер (``manage.py run_jobs``) забирает готовые задачи
+условным UPDATE, так что одну задачу не выполнят двое, и повторяет
+упавшие с растущей задержкой.
+
+Ключ идемпотентности не даёт поставить вторую такую же задачу, пока
+первая ждёт; после захвата воркером ключ освобождается, и правка,
+пришедшая во время выполнения, поставит задачу заново.
+
+С ``JOBS_INLINE`` и на базе SQLite в памяти (тесты) задачи выполняются
+сразу при постановке.
+"""
+import datetime
+import json
+import logging
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(name):
+    """Регистрирует функцию как задачу с именем ``name``."""
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def is_inline():
+    """Выполняются ли задачи сразу, а не воркером и не в потоках."""
+    if settings.JOBS_INLINE:
+        return True
+    # База SQLite в памяти (тесты) не выдерживает записи из потоков.
+    return (
+        connection.vendor == 'sqlite'
+        and connection.creation.is_in_memory_db(
+            connection.settings_dict['NAME']
+        )
+    )
+
+
+def enqueue(name, *args, key=None, delay=0):
+    """Ставит задачу в очередь; повтор ключа ждущей задачи игнорируется."""
+    if name not in TASKS:
+        raise ValueError(f'Неизвестная задача: {name}')
+    if is_inline():
+        TASKS[name](*args)
+        return
+    Job.objects.bulk_create([Job(
+        name=name,
+        args=json.dumps(args),
+        key=key,
+        run_at=timezone.now() + datetime.timedelta(seconds=delay),
+    )], ignore_conflicts=True)
+
+
+def _ready(now):
+    return (
+        Q(status=Job.PENDING, run_at__lte=now)
+        # Воркер, взявший задачу, пропал, не закончив её.
+        | Q(status=Job.RUNNING, locked_until__lt=now)
+    )
+
+
+def claim(limit):
+    """Забирает до ``limit`` готовых задач для этого воркера."""
+    now = timezone.now()
+    candidates = list(
+        Job.objects.filter(_ready(now))
+        .order_by('run_at', 'id')
+        .values_list('pk', flat=True)[:limit]
+    )
+    locked_until = now + datetime.timedelta(
+        seconds=settings.JOBS_LOCK_TIMEOUT
+    )
+    claimed = []
+    for pk in candidates:
+        taken = Job.objects.filter(_ready(now), pk=pk).update(
+            status=Job.RUNNING,
+            key=None,
+            locked_until=locked_until,
+            attempts=F('attempts') + 1,
+        )
+        if taken:
+            claimed.append(pk)
+    return list(Job.objects.filter(pk__in=claimed).order_by('run_at', 'id'))
+
+
+def backoff(attempts):
+    """Задержка перед повтором после ``attempts`` неудачных попыток."""
+    return settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def execute(job):
+    """Выполняет задачу: удаляет при успехе, иначе откладывает повтор."""
+    func = TASKS.get(job.name)
+    try:
+        if func is None:
+            raise LookupError(f'Неизвестная задача: {job.name}')
+        func(*json.loads(job.args))
+    except Exception as error:
+        logger.exception('Задача %s не выполнена', job)
+        retry = func is not None and job.attempts < settings.JOBS_MAX_ATTEMPTS
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.PENDING if retry else Job.FAILED,
+            run_at=timezone.now() + datetime.timedelta(
+                seconds=backoff(job.attempts)
+            ),
+            locked_until=None,
+            last_error=f'{type(error).__name__}: {error}',
+        )
+        return False
+    Job.objects.filter(pk=job.pk).delete()
+    return True
+
+
+def execute_in_thread(job):
+    try:
+        return execute(job)
+    finally:
+        connections.close_all()
+
+
+def run_pending(limit=100):
+    """Выполняет готовые задачи в текущем потоке; возвращает их число."""
+    jobs = claim(limit)
+    for job in jobs:
+        execute(job)
+    return len(jobs)
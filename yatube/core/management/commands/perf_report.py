@@ -0,0 +1,79 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import metrics
+
+COLUMNS = (
+    ('count', 'запросов'),
+    ('p50_ms', 'p50 мс'),
+    ('p95_ms', 'p95 мс'),
+    ('p99_ms', 'p99 мс'),
+    ('avg_queries', 'SQL'),
+    ('avg_db_ms', 'БД мс'),
+    ('avg_template_ms', 'шаблон мс'),
+    ('cache_hits', 'кэш +'),
+    ('cache_misses', 'кэш -'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Показывает метрики производительности по представлениям.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--slow',
+            action='store_true',
+            help='Показать медленные запросы вместе с их SQL.'
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Вывести сводку в JSON.'
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Начать сбор метрик заново во всех процессах.'
+        )
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            metrics.reset_collected()
+            self.stdout.write(self.style.SUCCESS('Метрики сброшены.'))
+            return
+        data = metrics.collected()
+        views = metrics.summary(data)
+        if options['json']:
+            self.stdout.write(json.dumps(
+                {'views': views, 'slow': data['slow']},
+                ensure_ascii=False, indent=2
+            ))
+            return
+        self.write_table(views)
+        if options['slow']:
+            self.write_slow(data['slow'])
+
+    def write_table(self, views):
+        header = ['представление'] + [title for _, title in COLUMNS]
+        rows = [header]
+        for name, view in views.items():
+            rows.append([name] + [
+                '>' + str(metrics.TIME_BUCKETS[-1])
+                if view[key] is None else str(view[key])
+                for key, _ in COLUMNS
+            ])
+        widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+        for row in rows:
+            self.stdout.write('  '.join(
+                cell.ljust(width) for cell, width in zip(row, widths)
+            ))
+
+    def write_slow(self, samples):
+        for sample in samples:
+            self.stdout.write(
+                f'\n{sample["view"]} {sample["path"]} '
+                f'{sample["latency_ms"]} мс, SQL: {len(sample["sql"])}'
+            )
+            for sql, duration in sample['sql']:
+                self.stdout.write(f'  {duration} мс  {sql}')
@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в пуле потоков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Сколько задач выполнять одновременно.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и выйти.'
+        )
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        done = failed = 0
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='jobs'
+        ) as pool:
+            while True:
+                claimed = jobs.claim(workers * 2)
+                if not claimed:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+                for succeeded in pool.map(jobs.execute_in_thread, claimed):
+                    if succeeded:
+                        done += 1
+                    else:
+                        failed += 1
+        self.stdout.write(f'Выполнено задач: {done}, с ошибкой: {failed}.')
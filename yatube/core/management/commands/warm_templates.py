@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.template_backends import django_engines, is_cached, warm_templates
+
+
+class Command(BaseCommand):
+    help = 'Разбирает все шаблоны и сообщает о синтаксических ошибках.'
+
+    def handle(self, *args, **options):
+        count, errors = warm_templates()
+        for name, error in errors:
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(f'Ошибок в шаблонах: {len(errors)}.')
+        self.stdout.write(self.style.SUCCESS(f'Шаблонов разобрано: {count}.'))
+        if not all(is_cached(engine) for engine in django_engines()):
+            self.stdout.write(self.style.WARNING(
+                'Загрузчик шаблонов не кэширует их: разобранные шаблоны '
+                'не сохранятся между запросами.'
+            ))
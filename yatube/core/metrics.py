@@ -0,0 +1,270 @@
+"""Метрики производительности запросов.
+
+Middleware ``core.middleware.PerformanceMiddleware`` открывает на время
+запроса ``RequestStats``: в него пишут обёртка выполнения SQL, шаблонный
+бэкенд ``core.template_backends.InstrumentedTemplates`` и кэш
+``core.cache.InstrumentedCache``. По окончании запроса значения
+попадают в гистограммы по имени представления.
+
+Гистограммы живут в памяти процесса и раз в ``METRICS_FLUSH_INTERVAL``
+секунд копируются в кэш под ключом процесса, откуда их собирают
+команда ``perf_report`` и страница ``/metrics/``.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+# Верхние границы корзин: миллисекунды для времени, штуки для запросов.
+TIME_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+HISTOGRAMS = {
+    'latency_ms': TIME_BUCKETS,
+    'db_ms': TIME_BUCKETS,
+    'template_ms': TIME_BUCKETS,
+    'queries': COUNT_BUCKETS,
+}
+COUNTERS = ('cache_hits', 'cache_misses')
+
+PREFIX = 'metrics'
+PROCESSES_KEY = f'{PREFIX}:processes'
+EPOCH_KEY = f'{PREFIX}:epoch'
+
+_local = threading.local()
+_lock = threading.Lock()
+_views = {}
+_slow = deque()
+_state = {'flushed': 0.0, 'epoch': None, 'started': False}
+
+
+class RequestStats:
+    """Счётчики одного запроса."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.cache = dict.fromkeys(COUNTERS, 0)
+        self.sql = []
+
+    def elapsed_ms(self):
+        return (time.monotonic() - self.started) * 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обёртка для connection.execute_wrapper.
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.monotonic() - started) * 1000
+            self.queries += 1
+            self.db_ms += duration
+            if len(self.sql) < settings.METRICS_SLOW_SQL_LIMIT:
+                self.sql.append((sql, round(duration, 2)))
+
+
+def current():
+    return getattr(_local, 'stats', None)
+
+
+@contextmanager
+def collect(stats=None):
+    """Собирает метрики кода внутри блока в ``stats`` или новый
+    ``RequestStats``."""
+    if stats is None:
+        stats = RequestStats()
+    _local.stats = stats
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(stats)
+                )
+            yield stats
+    finally:
+        _local.stats = None
+
+
+def track_cache(event, count=1):
+    stats = current()
+    if stats is not None and f'cache_{event}' in stats.cache:
+        stats.cache[f'cache_{event}'] += count
+
+
+def track_template(duration_ms):
+    stats = current()
+    if stats is not None:
+        stats.template_ms += duration_ms
+
+
+def _empty_view():
+    view = {
+        name: [0] * (len(buckets) + 1)
+        for name, buckets in HISTOGRAMS.items()
+    }
+    view.update({f'{name}_sum': 0.0 for name in HISTOGRAMS})
+    view.update(dict.fromkeys(COUNTERS, 0))
+    view['count'] = 0
+    return view
+
+
+def _bucket(value, buckets):
+    for index, bound in enumerate(buckets):
+        if value <= bound:
+            return index
+    return len(buckets)
+
+
+def observe(view_name, path, stats):
+    """Заносит законченный запрос в гистограммы представления."""
+    values = {
+        'latency_ms': stats.elapsed_ms(),
+        'db_ms': stats.db_ms,
+        'template_ms': stats.template_ms,
+        'queries': stats.queries,
+    }
+    with _lock:
+        view = _views.setdefault(view_name, _empty_view())
+        view['count'] += 1
+        for name, value in values.items():
+            view[name][_bucket(value, HISTOGRAMS[name])] += 1
+            view[f'{name}_sum'] += value
+        for name in COUNTERS:
+            view[name] += stats.cache[name]
+        if values['latency_ms'] >= settings.METRICS_SLOW_REQUEST_MS:
+            _slow.append({
+                'view': view_name,
+                'path': path,
+                'at': time.time(),
+                'latency_ms': round(values['latency_ms'], 2),
+                'sql': stats.sql,
+            })
+            while len(_slow) > settings.METRICS_SLOW_SAMPLES:
+                _slow.popleft()
+
+
+def snapshot():
+    """Копия метрик текущего процесса."""
+    with _lock:
+        return {
+            'views': {
+                name: {
+                    key: list(value) if isinstance(value, list) else value
+                    for key, value in view.items()
+                }
+                for name, view in _views.items()
+            },
+            'slow': list(_slow),
+        }
+
+
+def reset():
+    with _lock:
+        _views.clear()
+        _slow.clear()
+
+
+def merge(snapshots):
+    """Складывает снимки нескольких процессов в один."""
+    views = {}
+    slow = []
+    for data in snapshots:
+        for name, view in data['views'].items():
+            total = views.setdefault(name, _empty_view())
+            for key, value in view.items():
+                if isinstance(value, list):
+                    total[key] = [a + b for a, b in zip(total[key], value)]
+                else:
+                    total[key] += value
+        slow.extend(data['slow'])
+    slow.sort(key=lambda sample: sample['at'])
+    return {'views': views, 'slow': slow[-settings.METRICS_SLOW_SAMPLES:]}
+
+
+def percentile(counts, buckets, fraction):
+    """Верхняя граница корзины, в которую попадает заданная доля.
+
+    None — значение больше последней границы.
+    """
+    total = sum(counts)
+    if not total:
+        return 0
+    threshold = total * fraction
+    seen = 0
+    for index, count in enumerate(counts):
+        seen += count
+        if seen >= threshold:
+            return buckets[index] if index < len(buckets) else None
+    return None
+
+
+def summary(data):
+    """Перцентили и средние по представлениям из снимка метрик."""
+    views = {}
+    for name, view in sorted(data['views'].items()):
+        count = view['count'] or 1
+        views[name] = {
+            'count': view['count'],
+            'p50_ms': percentile(view['latency_ms'], TIME_BUCKETS, 0.5),
+            'p95_ms': percentile(view['latency_ms'], TIME_BUCKETS, 0.95),
+            'p99_ms': percentile(view['latency_ms'], TIME_BUCKETS, 0.99),
+            'avg_ms': round(view['latency_ms_sum'] / count, 2),
+            'avg_queries': round(view['queries_sum'] / count, 2),
+            'avg_db_ms': round(view['db_ms_sum'] / count, 2),
+            'avg_template_ms': round(view['template_ms_sum'] / count, 2),
+            'cache_hits': view['cache_hits'],
+            'cache_misses': view['cache_misses'],
+        }
+    return views
+
+
+def _process_key():
+    return f'{PREFIX}:process:{os.getpid()}'
+
+
+def flush(force=False):
+    """Копирует метрики процесса в кэш не чаще раза за интервал."""
+    now = time.monotonic()
+    interval = settings.METRICS_FLUSH_INTERVAL
+    if not force and now - _state['flushed'] < interval:
+        return
+    _state['flushed'] = now
+    epoch = cache.get(EPOCH_KEY)
+    if not _state['started']:
+        _state.update(started=True, epoch=epoch)
+    elif epoch != _state['epoch']:
+        # Команда perf_report --reset начала новую эпоху.
+        _state['epoch'] = epoch
+        reset()
+    key = _process_key()
+    cache.set(key, snapshot(), settings.METRICS_TTL)
+    processes = cache.get(PROCESSES_KEY) or []
+    if key not in processes:
+        cache.set(PROCESSES_KEY, processes + [key], settings.METRICS_TTL)
+
+
+def collected():
+    """Сводные метрики всех процессов, сброшенные в кэш."""
+    flush(force=True)
+    keys = cache.get(PROCESSES_KEY) or []
+    found = cache.get_many(keys)
+    alive = [key for key in keys if key in found]
+    if len(alive) != len(keys):
+        cache.set(PROCESSES_KEY, alive, settings.METRICS_TTL)
+    return merge(found.values())
+
+
+def reset_collected():
+    cache.delete_many(cache.get(PROCESSES_KEY) or [])
+    cache.delete(PROCESSES_KEY)
+    epoch = time.time()
+    cache.set(EPOCH_KEY, epoch, None)
+    _state['epoch'] = epoch
+    reset()
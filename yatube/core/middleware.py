@@ -0,0 +1,110 @@
+import time
+
+from django.conf import settings
+
+from . import metrics, routers
+
+
+def _within(content, context, finish=None):
+    """Куски потокового ответа, каждый отрисован внутри ``context()``.
+
+    Тело ``StreamingHttpResponse`` отрисовывается после выхода из
+    middleware, так что контекст открывается заново на каждый кусок и
+    закрыт, пока ответ ждёт клиента. ``finish`` вызывается, когда тело
+    отдано или клиент ушёл.
+    """
+    iterator = iter(content)
+    try:
+        while True:
+            with context():
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+            yield chunk
+    finally:
+        if finish is not None:
+            finish()
+
+
+class PerformanceMiddleware:
+    """Время, SQL, кэш и шаблоны каждого запроса по представлениям."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    @staticmethod
+    def view_name(request):
+        match = request.resolver_match
+        if match is None:
+            return 'unresolved'
+        if match.url_name is None:
+            return match.view_name
+        # Пространство приложения, а не экземпляра: posts:index.
+        return ':'.join(match.app_names + [match.url_name])
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        with metrics.collect() as stats:
+            response = self.get_response(request)
+
+        def finish():
+            metrics.observe(self.view_name(request), request.path, stats)
+            metrics.flush()
+
+        if response.streaming:
+            response.streaming_content = _within(
+                response.streaming_content,
+                lambda: metrics.collect(stats), finish
+            )
+        else:
+            finish()
+        return response
+
+
+class ReplicaMiddleware:
+    """Открывает чтение с реплик для безопасных запросов.
+
+    Клиент, который писал в базу, получает cookie ``DATABASE_STICKY_COOKIE``
+    со временем записи и до истечения ``DATABASE_STICKY_SECONDS`` читает
+    основную базу.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def sticky(self, request):
+        try:
+            written_at = float(
+                request.COOKIES.get(settings.DATABASE_STICKY_COOKIE, '')
+            )
+        except ValueError:
+            return False
+        return time.time() - written_at < settings.DATABASE_STICKY_SECONDS
+
+    def __call__(self, request):
+        allowed = (
+            bool(settings.DATABASE_REPLICAS)
+            and request.method in self.SAFE_METHODS
+            and not self.sticky(request)
+        )
+        with routers.reading(allowed) as alias:
+            response = self.get_response(request)
+            written = routers.written()
+        if response.streaming:
+            # Записи во время отрисовки тела уже не поставят cookie:
+            # заголовки к тому времени отправлены.
+            response.streaming_content = _within(
+                response.streaming_content,
+                lambda: routers.reading(allowed and not written, alias)
+            )
+        if written and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                settings.DATABASE_STICKY_COOKIE, str(time.time()),
+                max_age=settings.DATABASE_STICKY_SECONDS, httponly=True,
+                samesite='Lax',
+            )
+        return response
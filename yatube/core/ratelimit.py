@@ -0,0 +1,91 @@
+"""Ограничение частоты записи для каждого пользователя.
+
+Политики лежат в ``RATELIMITS``: область -> (запросов, секунд). Запросы
+считаются в кэше ``ratelimit``, общем для всех процессов, скользящим
+окном: счётчик текущего окна плюс доля счётчика предыдущего, ещё не
+вышедшая за границу. Так лимит не удваивается на стыке окон, а на
+запрос уходят три обращения к кэшу и ни одного к базе.
+
+Отклонённые запросы тоже считаются, поэтому непрерывный поток
+получает 429, пока не остановится.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .views import too_many_requests
+
+
+def identity(request):
+    """Кого ограничивать: пользователя, а без входа — адрес клиента."""
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{request.META.get("REMOTE_ADDR", "")}'
+
+
+def _key(scope, ident, window):
+    return f'ratelimit:{scope}:{ident}:{window}'
+
+
+def hit(scope, ident, now=None):
+    """Учитывает запрос; возвращает 0 или секунды до следующей попытки."""
+    limit, period = settings.RATELIMITS[scope]
+    cache = caches['ratelimit']
+    now = time.time() if now is None else now
+    window, position = divmod(now, period)
+    key = _key(scope, ident, int(window))
+    cache.add(key, 0, period * 2)
+    try:
+        current = cache.incr(key)
+    except ValueError:
+        # Запись вытеснили между add и incr.
+        cache.set(key, 1, period * 2)
+        current = 1
+    previous = cache.get(_key(scope, ident, int(window) - 1), 0)
+    if previous * (1 - position / period) + current <= limit:
+        return 0
+    return max(math.ceil(_passes_at(limit, period, previous, current)
+                         - position), 1)
+
+
+def _passes_at(limit, period, previous, current):
+    """Позиция от начала текущего окна, с которой следующий запрос
+    уложится в лимит.
+
+    Следующий запрос сам добавит единицу к счётчику. Если места хватает
+    в текущем окне, ждём, пока доля предыдущего окна уменьшится
+    достаточно; иначе текущее окно станет предыдущим, и ждём уже его
+    убывания в следующем.
+    """
+    if current + 1 <= limit:
+        return period * (1 - (limit - current - 1) / previous)
+    return period + period * (1 - (limit - 1) / current)
+
+
+def check(request, scope):
+    """0 или секунды до следующей попытки для запроса в области
+    ``scope``; с выключенным ``RATELIMIT_ENABLED`` всегда 0."""
+    if not settings.RATELIMIT_ENABLED:
+        return 0
+    return hit(scope, identity(request))
+
+
+def ratelimit(scope, methods=('POST',)):
+    """Отвечает 429, когда пользователь превысил политику ``scope``.
+
+    Ставится под ``login_required``, чтобы пользователь был уже
+    известен. ``methods=None`` ограничивает запросы любым методом.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                retry_after = check(request, scope)
+                if retry_after:
+                    return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
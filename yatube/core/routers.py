@@ -0,0 +1,92 @@
+"""Чтение с реплик базы данных.
+
+``ReplicaRouter`` отправляет чтения на одну из ``DATABASE_REPLICAS``
+только внутри безопасных запросов (GET, HEAD), которые открывает
+``core.middleware.ReplicaMiddleware``. Запись всегда идёт в
+``default``; после первой записи все чтения того же запроса тоже
+читают ``default``.
+
+Реплика отстаёт от основной базы, поэтому клиент, который только что
+писал, ещё ``DATABASE_STICKY_SECONDS`` секунд читает основную базу: он
+сразу видит свой пост после редиректа с ``post_create``. Метка
+хранится в cookie, так что работает и без входа на сайт.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+DEFAULT = 'default'
+
+_local = threading.local()
+
+
+def _choose():
+    replicas = settings.DATABASE_REPLICAS
+    return random.choice(replicas) if replicas else DEFAULT
+
+
+@contextmanager
+def reading(allowed=True, alias=None):
+    """Разрешает чтение с реплик на время блока; выдаёт алиас реплики.
+
+    Все чтения блока идут на одну реплику ``alias`` (по умолчанию
+    случайную): реплики отстают по-разному, и ответ не должен смешивать
+    их данные.
+    """
+    previous = (
+        getattr(_local, 'allowed', False), written(),
+        getattr(_local, 'alias', DEFAULT)
+    )
+    _local.allowed = allowed
+    _local.written = False
+    _local.alias = alias or _choose()
+    try:
+        yield _local.alias
+    finally:
+        _local.allowed, _local.written, _local.alias = previous
+
+
+@contextmanager
+def untracked():
+    """Служебная запись внутри блока не считается записью запроса.
+
+    Чтения не переключаются на основную базу, и клиент не получает
+    метку: например, постановка задачи в очередь из GET.
+    """
+    previous = written()
+    try:
+        yield
+    finally:
+        _local.written = previous
+
+
+def written():
+    """Была ли запись в базу с начала блока ``reading``."""
+    return getattr(_local, 'written', False)
+
+
+def replica():
+    """Алиас реплики для чтения или ``default``."""
+    if not getattr(_local, 'allowed', False) or written():
+        return DEFAULT
+    if not settings.DATABASE_REPLICAS:
+        return DEFAULT
+    return _local.alias
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return replica()
+
+    def db_for_write(self, model, **hints):
+        _local.written = True
+        return DEFAULT
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же строки, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT
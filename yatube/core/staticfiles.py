@@ -0,0 +1,70 @@
+"""Статика с хэшем содержимого в имени и заранее сжатыми копиями.
+
+``collectstatic`` с этим хранилищем пишет рядом с каждым файлом копию
+с хэшем в имени (``css/bootstrap.min.3f2a….css``) и манифест, по
+которому ``{% static %}`` выдаёт хэшированные адреса. Такой адрес
+меняется вместе с содержимым, поэтому браузер может хранить файл
+бессрочно.
+
+Текстовые файлы дополнительно сжимаются в ``.gz`` и, если установлен
+пакет ``brotli``, в ``.br``: сервер файлов отдаёт их без сжатия на
+каждый запрос.
+"""
+import gzip
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _write_if_smaller(path, data, compressed):
+    # Сжатие картинок и шрифтов только раздувает их.
+    if len(compressed) >= len(data):
+        return False
+    with open(path, 'wb') as stream:
+        stream.write(compressed)
+    return True
+
+
+def compress_file(path):
+    """Пишет ``path.gz`` и ``path.br``; возвращает список расширений."""
+    with open(path, 'rb') as stream:
+        data = stream.read()
+    written = []
+    if _write_if_smaller(
+        f'{path}.gz', data, gzip.compress(data, compresslevel=9, mtime=0)
+    ):
+        written.append('gz')
+    if brotli is not None and _write_if_smaller(
+        f'{path}.br', data, brotli.compress(data)
+    ):
+        written.append('br')
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def _compressible(self, name):
+        return os.path.splitext(name)[1].lower() in (
+            settings.STATIC_COMPRESS_EXTENSIONS
+        )
+
+    def post_process(self, paths, dry_run=False, **options):
+        # CSS обрабатывается в несколько проходов; сжимается последний
+        # вариант каждого файла.
+        final = {}
+        processed = super().post_process(paths, dry_run=dry_run, **options)
+        for name, hashed_name, done in processed:
+            if done is True and self._compressible(name):
+                final[name] = hashed_name
+            yield name, hashed_name, done
+        if dry_run:
+            return
+        for name, hashed_name in final.items():
+            compress_file(self.path(name))
+            compress_file(self.path(hashed_name))
@@ -0,0 +1,232 @@
+"""Потоковая отрисовка шаблонов Django.
+
+``Template.render`` собирает всю страницу в строку, и первый байт
+уходит клиенту только после последнего запроса к базе. Здесь дерево
+узлов шаблона обходится генератором: ``{% extends %}`` и ``{% block %}``
+раскрываются по месту, ``{% for %}`` отдаёт записи по одной, а
+``{% cache %}`` пишет фрагмент в кэш, когда он целиком отдан. Перед
+циклом буфер сбрасывается, поэтому ``<head>`` и шапка страницы уходят
+до запроса ленты. QuerySet без готового кэша читается через
+``iterator()`` пачками по ``STREAMING_CHUNK_SIZE`` строк.
+
+Остальные узлы отрисовываются обычным ``render``. В цикле
+``forloop.revcounter`` доступен, только если длина последовательности
+известна без чтения всех строк; ``forloop.last`` определяется чтением
+на одну запись вперёд.
+
+Тело ответа отрисовывается уже после middleware, поэтому CSRF-токен
+и сессия затрагиваются заранее в ``stream_response``, а метрики и
+чтение с реплик middleware открывают заново на каждый кусок тела.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.core.paginator import Page
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.template import loader
+from django.template.base import TextNode
+from django.template.context import make_context
+from django.template.defaulttags import ForNode
+from django.template.loader_tags import (
+    BLOCK_CONTEXT_KEY, BlockContext, BlockNode, ExtendsNode,
+)
+from django.templatetags.cache import CacheNode
+from django.utils.safestring import mark_safe
+
+from . import metrics
+
+# Сигнал генератору: отправить накопленное, не дожидаясь размера буфера.
+FLUSH = object()
+
+
+def _extends(node, context):
+    parent = node.get_parent(context)
+    context.render_context.setdefault(BLOCK_CONTEXT_KEY, BlockContext())
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(node.blocks)
+    for parent_node in parent.nodelist:
+        if not isinstance(parent_node, TextNode):
+            if not isinstance(parent_node, ExtendsNode):
+                block_context.add_blocks({
+                    block.name: block
+                    for block in parent.nodelist.get_nodes_by_type(BlockNode)
+                })
+            break
+    with context.render_context.push_state(parent, isolated_context=False):
+        yield from iter_nodes(parent.nodelist, context)
+
+
+def _block(node, context):
+    block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+    with context.push():
+        if block_context is None:
+            context['block'] = node
+            yield from iter_nodes(node.nodelist, context)
+            return
+        push = block = block_context.pop(node.name)
+        if block is None:
+            block = node
+        block = type(node)(block.name, block.nodelist)
+        block.context = context
+        context['block'] = block
+        yield from iter_nodes(block.nodelist, context)
+        if push is not None:
+            block_context.push(node.name, push)
+
+
+def _cache(node, context):
+    if node.cache_name:
+        yield node.render_annotated(context)
+        return
+    expire_time = node.expire_time_var.resolve(context)
+    if expire_time is not None:
+        expire_time = int(expire_time)
+    try:
+        fragment_cache = caches['template_fragments']
+    except InvalidCacheBackendError:
+        fragment_cache = caches['default']
+    key = make_template_fragment_key(
+        node.fragment_name, [var.resolve(context) for var in node.vary_on]
+    )
+    value = fragment_cache.get(key)
+    if value is not None:
+        yield value
+        return
+    parts = []
+    for chunk in iter_nodes(node.nodelist, context):
+        if chunk is not FLUSH:
+            parts.append(chunk)
+        yield chunk
+    fragment_cache.set(key, mark_safe(''.join(parts)), expire_time)
+
+
+def _values(sequence):
+    """Записи последовательности и её длина, если она известна."""
+    if isinstance(sequence, Page):
+        sequence = sequence.object_list
+    if isinstance(sequence, QuerySet) and sequence._result_cache is None:
+        if sequence._prefetch_related_lookups:
+            # iterator() не выполняет prefetch_related.
+            return iter(sequence), None
+        return sequence.iterator(
+            chunk_size=settings.STREAMING_CHUNK_SIZE
+        ), None
+    if not hasattr(sequence, '__len__'):
+        sequence = list(sequence)
+    return iter(sequence), len(sequence)
+
+
+def _for(node, context):
+    if node.is_reversed or len(node.loopvars) > 1:
+        yield node.render_annotated(context)
+        return
+    parentloop = context['forloop'] if 'forloop' in context else {}
+    # Шапка уходит клиенту до запроса записей.
+    yield FLUSH
+    with context.push():
+        sequence = node.sequence.resolve(context, ignore_failures=True)
+        values, length = _values([] if sequence is None else sequence)
+        try:
+            item = next(values)
+        except StopIteration:
+            yield node.nodelist_empty.render(context)
+            return
+        loop = context['forloop'] = {'parentloop': parentloop}
+        index = 0
+        while True:
+            try:
+                following = next(values)
+                last = False
+            except StopIteration:
+                last = True
+            loop.update(
+                counter0=index, counter=index + 1,
+                first=index == 0, last=last,
+            )
+            if length is not None:
+                loop.update(
+                    revcounter=length - index, revcounter0=length - index - 1
+                )
+            context[node.loopvars[0]] = item
+            yield node.nodelist_loop.render(context)
+            if last:
+                return
+            item = following
+            index += 1
+
+
+HANDLERS = {
+    ExtendsNode: _extends,
+    BlockNode: _block,
+    CacheNode: _cache,
+    ForNode: _for,
+}
+
+
+def iter_nodes(nodelist, context):
+    """Отрисованные куски узлов ``nodelist`` и метки ``FLUSH``."""
+    for node in nodelist:
+        handler = HANDLERS.get(type(node))
+        if handler is None:
+            yield node.render_annotated(context)
+        else:
+            yield from handler(node, context)
+
+
+def _buffered(chunks, size):
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        if chunk is not FLUSH:
+            buffer.append(chunk)
+            buffered += len(chunk)
+        if buffered and (chunk is FLUSH or buffered >= size):
+            yield ''.join(buffer)
+            buffer = []
+            buffered = 0
+    if buffered:
+        yield ''.join(buffer)
+
+
+def _timed(chunks):
+    # Время отрисовки в метриках запроса, без ожидания клиента.
+    while True:
+        started = time.monotonic()
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        finally:
+            metrics.track_template((time.monotonic() - started) * 1000)
+        yield chunk
+
+
+def stream_template(template_name, context=None, request=None):
+    """Куски страницы ``template_name`` по мере отрисовки."""
+    template = loader.get_template(template_name).template
+    context = make_context(
+        context, request, autoescape=template.engine.autoescape
+    )
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            context.template_name = template.name
+            yield from _timed(_buffered(
+                iter_nodes(template.nodelist, context),
+                settings.STREAMING_BUFFER_SIZE
+            ))
+
+
+def stream_response(request, template_name, context=None, **kwargs):
+    """Потоковый аналог ``django.shortcuts.render``."""
+    # Cookie csrftoken и заголовок Vary: Cookie middleware ставят, только
+    # если токен и сессию запросили до ответа, а тело отрисуется позже.
+    get_token(request)
+    if hasattr(request, 'session'):
+        request.session.accessed = True
+    return StreamingHttpResponse(
+        stream_template(template_name, context, request), **kwargs
+    )
@@ -0,0 +1,89 @@
+import os
+import time
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import (
+    DjangoTemplates, Template as DjangoTemplate,
+)
+from django.template.loaders.cached import Loader as CachedLoader
+from django.template.utils import get_app_template_dirs
+
+from . import metrics
+
+
+class Template(DjangoTemplate):
+    def render(self, context=None, request=None):
+        started = time.monotonic()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.track_template((time.monotonic() - started) * 1000)
+
+
+class InstrumentedTemplates(DjangoTemplates):
+    """Шаблоны Django с учётом времени отрисовки в метриках запроса."""
+
+    def from_string(self, template_code):
+        return Template(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
+
+
+def django_engines():
+    return [
+        engine.engine for engine in engines.all()
+        if isinstance(engine, DjangoTemplates)
+    ]
+
+
+def template_names(engine):
+    """Имена всех шаблонов из каталогов движка и приложений."""
+    names = set()
+    directories = list(engine.dirs) + list(get_app_template_dirs('templates'))
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                names.add(
+                    os.path.relpath(path, directory).replace(os.sep, '/')
+                )
+    return sorted(names)
+
+
+def _cached_loaders(engine):
+    return [
+        loader for loader in engine.template_loaders
+        if isinstance(loader, CachedLoader)
+    ]
+
+
+def is_cached(engine):
+    return bool(_cached_loaders(engine))
+
+
+def reset_templates():
+    """Очищает кэширующие загрузчики, как в только что запущенном процессе."""
+    for engine in django_engines():
+        for loader in _cached_loaders(engine):
+            loader.reset()
+
+
+def warm_templates():
+    """Разбирает все шаблоны заранее и возвращает их число и ошибки.
+
+    С кэширующим загрузчиком разобранные шаблоны остаются в памяти, и
+    первый запрос процесса не тратит время на разбор ``base.html`` и
+    включаемых в него шаблонов. Без него функция только проверяет, что
+    шаблоны разбираются.
+    """
+    count = 0
+    errors = []
+    for engine in django_engines():
+        for name in template_names(engine):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as error:
+                errors.append((name, error))
+            count += 1
+    return count, errors
@@ -0,0 +1,86 @@
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from core.cache import InstrumentedCache, reset_stats, stats
+from django.test import SimpleTestCase
+
+FILE_BACKEND = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+def make_cache(location, namespace):
+    return InstrumentedCache(location, {
+        'KEY_PREFIX': f'yatube:{namespace}',
+        'OPTIONS': {'BACKEND': FILE_BACKEND, 'ALIAS': namespace},
+    })
+
+
+class InstrumentedCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        reset_stats()
+
+    def tearDown(self):
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def test_file_cache_is_shared_between_instances(self):
+        """Экземпляры с общим каталогом видят записи друг друга,
+        а пространства имён не пересекаются."""
+
+        writer = make_cache(self.location, 'default')
+        reader = make_cache(self.location, 'default')
+        other = make_cache(self.location, 'fragments')
+        writer.set('key', 'value', 60)
+        self.assertEqual(reader.get('key'), 'value')
+        self.assertIsNone(other.get('key'))
+
+    def test_forget_keeps_other_namespaces(self):
+        """forget() скрывает записи алиаса, не трогая общее хранилище."""
+
+        fragments = make_cache(self.location, 'fragments')
+        other = make_cache(self.location, 'default')
+        fragments.set('key', 'value', 60)
+        other.set('key', 'value', 60)
+        fragments.forget()
+        self.assertIsNone(fragments.get('key'))
+        self.assertEqual(other.get('key'), 'value')
+
+    def test_counts_hits_and_misses(self):
+        """Попадания и промахи учитываются по алиасу."""
+
+        cache = make_cache(self.location, 'default')
+        cache.get('key')
+        cache.set('key', 'value', 60)
+        cache.get('key')
+        cache.get_many(['key', 'missing'])
+        self.assertEqual(stats()['default'], {'hits': 2, 'misses': 2})
+
+    def test_eternal_values_support_incr(self):
+        """Бессрочные значения хранятся без обёртки и увеличиваются."""
+
+        cache = make_cache(self.location, 'default')
+        cache.set('version', 1, None)
+        self.assertEqual(cache.incr('version'), 2)
+
+    def test_expiring_counters_support_incr(self):
+        """Счётчики со сроком тоже хранятся без обёртки."""
+
+        cache = make_cache(self.location, 'default')
+        cache.add('hits', 0, 60)
+        self.assertEqual(cache.incr('hits'), 1)
+
+    def test_expensive_value_is_recomputed_early(self):
+        """Дорогое значение пересчитывается до истечения срока."""
+
+        cache = make_cache(self.location, 'default')
+        with mock.patch('core.cache.time.monotonic', side_effect=[0, 30]):
+            cache.get('key')
+            cache.set('key', 'value', 60)
+        with mock.patch('core.cache.random.random', return_value=0.99):
+            self.assertEqual(cache.get('key'), 'value')
+        soon = time.time() + 55
+        with mock.patch('core.cache.time.time', return_value=soon), \
+                mock.patch('core.cache.random.random', return_value=0.5):
+            self.assertIsNone(cache.get('key'))
+        self.assertEqual(stats()['default']['early_recomputes'], 1)
@@ -0,0 +1,132 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+from wsgiref.util import setup_testing_defaults
+
+from core.fileserver import FileServer
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+CSS = b'body { color: black; }\n' * 100
+
+
+def application(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [b'django']
+
+
+class FileServerTest(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        os.makedirs(os.path.join(self.root, 'css'))
+        self.css = os.path.join(self.root, 'css', 'site.0123456789ab.css')
+        with open(self.css, 'wb') as stream:
+            stream.write(CSS)
+        self.server = FileServer(application, [('/static/', self.root, False)])
+
+    def get(self, path, method='GET', **headers):
+        environ = {'PATH_INFO': path, 'REQUEST_METHOD': method}
+        environ.update(headers)
+        setup_testing_defaults(environ)
+        response = {}
+
+        def start_response(status, response_headers):
+            response['status'] = status
+            response['headers'] = dict(response_headers)
+
+        body = b''.join(self.server(environ, start_response))
+        return response['status'], response['headers'], body
+
+    def test_serves_hashed_file_as_immutable(self):
+        status, headers, body = self.get('/static/css/site.0123456789ab.css')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(body, CSS)
+        self.assertEqual(headers['Content-Type'], 'text/css')
+        self.assertEqual(headers['Content-Length'], str(len(CSS)))
+        self.assertIn('immutable', headers['Cache-Control'])
+
+    def test_unhashed_file_is_not_immutable(self):
+        shutil.copy(self.css, os.path.join(self.root, 'css', 'site.css'))
+        _, headers, _ = self.get('/static/css/site.css')
+        self.assertNotIn('immutable', headers['Cache-Control'])
+
+    def test_if_none_match(self):
+        path = '/static/css/site.0123456789ab.css'
+        _, headers, _ = self.get(path)
+        status, _, body = self.get(path, HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b'')
+
+    def test_precompressed_variant(self):
+        with open(f'{self.css}.gz', 'wb') as stream:
+            stream.write(gzip.compress(CSS))
+        status, headers, body = self.get(
+            '/static/css/site.0123456789ab.css',
+            HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body), CSS)
+        _, headers, body = self.get(
+            '/static/css/site.0123456789ab.css',
+            HTTP_ACCEPT_ENCODING='gzip;q=0'
+        )
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(body, CSS)
+
+    def test_range(self):
+        path = '/static/css/site.0123456789ab.css'
+        status, headers, body = self.get(path, HTTP_RANGE='bytes=5-9')
+        self.assertEqual(status, '206 Partial Content')
+        self.assertEqual(body, CSS[5:10])
+        self.assertEqual(headers['Content-Range'], f'bytes 5-9/{len(CSS)}')
+        _, _, body = self.get(path, HTTP_RANGE='bytes=-4')
+        self.assertEqual(body, CSS[-4:])
+        status, headers, _ = self.get(path, HTTP_RANGE='bytes=99999-')
+        self.assertEqual(status, '416 Range Not Satisfiable')
+        self.assertEqual(headers['Content-Range'], f'bytes */{len(CSS)}')
+
+    def test_other_requests_reach_application(self):
+        """Пропавшие файлы, выход из каталога и POST уходят в Django."""
+        for path, method in (
+            ('/static/css/missing.css', 'GET'),
+            ('/static/../' + os.path.basename(__file__), 'GET'),
+            ('/static/css/site.0123456789ab.css', 'POST'),
+            ('/static/\x00', 'GET'),
+            ('/static/css/\x00.css', 'GET'),
+            ('/about/', 'GET'),
+        ):
+            with self.subTest(path=path, method=method):
+                self.assertEqual(self.get(path, method)[2], b'django')
+
+
+class CollectStaticTest(SimpleTestCase):
+    def test_hashed_and_compressed_copies(self):
+        source = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        target = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, source, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, target, ignore_errors=True)
+        with open(os.path.join(source, 'site.css'), 'wb') as stream:
+            stream.write(CSS)
+        with override_settings(
+            STATICFILES_DIRS=[source],
+            STATIC_ROOT=target,
+            STATICFILES_STORAGE=(
+                'core.staticfiles.CompressedManifestStaticFilesStorage'
+            ),
+        ):
+            call_command('collectstatic', interactive=False,
+                         stdout=StringIO())
+        names = os.listdir(target)
+        hashed = [
+            name for name in names
+            if name.startswith('site.') and name.endswith('.css')
+            and name != 'site.css'
+        ]
+        self.assertEqual(len(hashed), 1)
+        self.assertIn(f'{hashed[0]}.gz', names)
+        with open(os.path.join(target, f'{hashed[0]}.gz'), 'rb') as stream:
+            self.assertEqual(gzip.decompress(stream.read()), CSS)
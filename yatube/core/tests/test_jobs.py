@@ -0,0 +1,102 @@
+import datetime
+from unittest import mock
+
+from core import jobs
+from core.models import Job
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from posts.models import Follow, Post, User
+
+calls = []
+
+
+@jobs.task('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@jobs.task('tests.fail')
+def fail():
+    raise RuntimeError('сбой')
+
+
+@override_settings(JOBS_MAX_ATTEMPTS=3, JOBS_RETRY_DELAY=10)
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+        patcher = mock.patch.object(jobs, 'is_inline', return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_idempotency_key(self):
+        """Ждущая задача с тем же ключом не дублируется."""
+
+        jobs.enqueue('tests.record', 1, key='record')
+        jobs.enqueue('tests.record', 1, key='record')
+        jobs.enqueue('tests.record', 2)
+        self.assertEqual(Job.objects.count(), 2)
+        self.assertEqual(jobs.run_pending(), 2)
+        self.assertEqual(calls, [1, 2])
+        self.assertFalse(Job.objects.exists())
+
+    def test_claimed_job_frees_key(self):
+        """Пока задача выполняется, такую же можно поставить снова."""
+
+        jobs.enqueue('tests.record', 1, key='record')
+        claimed = jobs.claim(10)
+        jobs.enqueue('tests.record', 1, key='record')
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(
+            Job.objects.filter(status=Job.PENDING, key='record').count(), 1
+        )
+
+    def test_failed_job_is_retried_with_backoff(self):
+        """Упавшая задача повторяется с удвоенной паузой, а после
+        JOBS_MAX_ATTEMPTS попыток остаётся в таблице с ошибкой."""
+
+        jobs.enqueue('tests.fail')
+        for attempt in range(1, 4):
+            before = timezone.now()
+            self.assertEqual(jobs.run_pending(), 1)
+            job = Job.objects.get()
+            self.assertEqual(job.attempts, attempt)
+            self.assertGreaterEqual(
+                job.run_at,
+                before + datetime.timedelta(seconds=10 * 2 ** (attempt - 1))
+            )
+            self.assertEqual(jobs.run_pending(), 0)
+            Job.objects.update(run_at=timezone.now())
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('сбой', job.last_error)
+        self.assertEqual(jobs.run_pending(), 0)
+
+    def test_lost_worker_job_is_taken_again(self):
+        jobs.enqueue('tests.record', 1)
+        jobs.claim(10)
+        Job.objects.update(
+            locked_until=timezone.now() - datetime.timedelta(seconds=1)
+        )
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(calls, [1])
+
+    def test_deferred_fan_out(self):
+        """Пост попадает в ленту подписчика после работы воркера."""
+
+        cache.clear()
+        reader = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='author')
+        Follow.objects.create(user=reader, author=author)
+        client = Client()
+        client.force_login(reader)
+        url = reverse('posts:follow_index')
+        client.get(url)
+        post = Post.objects.create(author=author, text='Отложенный пост')
+        self.assertNotContains(client.get(url), post.text)
+        jobs.run_pending()
+        # Вне инлайн-режима устаревшее число постов ленты пересчитывалось
+        # бы в фоне; без него в кэше оно считается сразу.
+        cache.clear()
+        self.assertContains(client.get(url), post.text)
@@ -0,0 +1,83 @@
+from io import StringIO
+
+from core import metrics
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post, User
+
+
+class PerformanceMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.admin = User.objects.create_user(username='admin', is_staff=True)
+        Post.objects.create(author=cls.user, text='Текст')
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.client = Client()
+
+    def test_records_view_stats(self):
+        """Запрос попадает в гистограммы своего представления."""
+
+        self.client.get(reverse('posts:index'))
+        view = metrics.snapshot()['views']['posts:index']
+        self.assertEqual(view['count'], 1)
+        self.assertEqual(sum(view['latency_ms']), 1)
+        self.assertGreater(view['queries_sum'], 0)
+        self.assertGreater(view['template_ms_sum'], 0)
+        self.assertGreater(view['cache_misses'], 0)
+
+    def test_records_streamed_view_stats(self):
+        """Потоковая страница учитывается, когда тело отдано, вместе с
+        запросами, выполненными при его отрисовке."""
+
+        self.client.get(reverse('posts:index'))
+        queries = metrics.snapshot()['views']['posts:index']['queries_sum']
+        metrics.reset()
+        cache.clear()
+        with self.settings(POSTS_STREAMING=True):
+            response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('posts:index', metrics.snapshot()['views'])
+        b''.join(response.streaming_content)
+        view = metrics.snapshot()['views']['posts:index']
+        self.assertEqual(view['count'], 1)
+        self.assertEqual(view['queries_sum'], queries)
+        self.assertGreater(view['template_ms_sum'], 0)
+
+    @override_settings(METRICS_SLOW_REQUEST_MS=0)
+    def test_slow_request_keeps_sql(self):
+        """Медленный запрос сохраняется вместе с его SQL."""
+
+        self.client.get(reverse('posts:index'))
+        sample = metrics.snapshot()['slow'][-1]
+        self.assertEqual(sample['view'], 'posts:index')
+        self.assertTrue(any('posts_post' in sql for sql, _ in sample['sql']))
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_can_be_disabled(self):
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(metrics.snapshot()['views'], {})
+
+    def test_metrics_endpoint_is_for_staff(self):
+        """Сводка доступна только персоналу."""
+
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['views']['posts:index']['count'], 1)
+
+    def test_perf_report_command(self):
+        self.client.get(reverse('posts:index'))
+        out = StringIO()
+        call_command('perf_report', stdout=out)
+        self.assertIn('posts:index', out.getvalue())
+        call_command('perf_report', '--reset', stdout=StringIO())
+        self.assertEqual(metrics.collected()['views'], {})
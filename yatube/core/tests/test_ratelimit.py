@@ -0,0 +1,78 @@
+from core import ratelimit
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Follow, Post, User
+
+
+@override_settings(RATELIMITS={'comment': (2, 60), 'follow': (1, 60)})
+class RateLimitTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Текст')
+
+    def setUp(self):
+        caches['ratelimit'].clear()
+        self.client.force_login(self.user)
+
+    def comment(self, client=None):
+        return (client or self.client).post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'}
+        )
+
+    def test_comments_limited(self):
+        """Сверх лимита — 429 с Retry-After и без записи в базу."""
+        for _ in range(2):
+            self.assertEqual(self.comment().status_code, 302)
+        with self.assertNumQueries(2):
+            # Только сессия и пользователь для login_required.
+            response = self.comment()
+        self.assertEqual(response.status_code, 429)
+        self.assertTemplateUsed(response, 'core/429.html')
+        # Перебор текущего окна ждёт и часть следующего.
+        self.assertTrue(1 <= int(response['Retry-After']) <= 120)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_limit_is_per_user(self):
+        for _ in range(3):
+            self.comment()
+        self.client.force_login(self.author)
+        self.assertEqual(self.comment().status_code, 302)
+
+    def test_follow_and_unfollow_share_policy(self):
+        self.client.get(reverse('posts:profile_follow', args=['author']))
+        response = self.client.get(
+            reverse('posts:profile_unfollow', args=['author'])
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(Follow.objects.filter(user=self.user).exists())
+
+    @override_settings(RATELIMIT_ENABLED=False)
+    def test_disabled(self):
+        for _ in range(3):
+            self.assertEqual(self.comment().status_code, 302)
+
+    def test_sliding_window(self):
+        """Запросы прошлого окна учитываются пропорционально остатку."""
+        start = 6050.0
+        for ident in ('x', 'y'):
+            for _ in range(2):
+                self.assertEqual(ratelimit.hit('comment', ident, start), 0)
+        # Начало нового окна: прошлые 2 запроса ещё почти целиком в нём.
+        self.assertEqual(ratelimit.hit('comment', 'x', start + 11), 59)
+        # Ближе к концу окна доля прошлого окна мала.
+        self.assertEqual(ratelimit.hit('comment', 'y', start + 60), 0)
+
+    def test_retry_after_covers_next_window(self):
+        """Перебор в текущем окне продлевает ожидание в следующее."""
+        start = 6000.0
+        for ident in ('x', 'y', 'z'):
+            for _ in range(2):
+                ratelimit.hit('comment', ident, start)
+            # Третий запрос окна ещё будет весить 1/3 через 100 секунд.
+            self.assertEqual(ratelimit.hit('comment', ident, start), 100)
+        self.assertGreater(ratelimit.hit('comment', 'y', start + 99), 0)
+        self.assertEqual(ratelimit.hit('comment', 'z', start + 100), 0)
@@ -0,0 +1,134 @@
+import time
+
+from core import routers
+from core.middleware import ReplicaMiddleware
+from core.routers import ReplicaRouter
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import reverse
+from posts.models import Post, User
+
+REPLICAS = ['replica1', 'replica2']
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def handle(self, request, write=False):
+        """Пропускает запрос через middleware и возвращает ответ и
+        базы, с которых представление читало до и после записи."""
+
+        used = []
+
+        def view(request):
+            used.append(self.router.db_for_read(Post))
+            if write:
+                self.router.db_for_write(Post)
+                used.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        response = ReplicaMiddleware(view)(request)
+        return response, used
+
+    def test_reads_outside_requests_use_default(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_safe_requests_read_replicas(self):
+        response, used = self.handle(self.factory.get('/'))
+        self.assertIn(used[0], REPLICAS)
+        self.assertNotIn('db_written', response.cookies)
+        response, used = self.handle(self.factory.post('/'))
+        self.assertEqual(used, ['default'])
+
+    def test_writer_sticks_to_default(self):
+        """После записи запрос и следующие запросы клиента читают
+        основную базу, пока не истечёт DATABASE_STICKY_SECONDS."""
+
+        response, used = self.handle(self.factory.get('/'), write=True)
+        self.assertEqual(used[1], 'default')
+        cookie = response.cookies['db_written'].value
+
+        request = self.factory.get('/', HTTP_COOKIE=f'db_written={cookie}')
+        self.assertEqual(self.handle(request)[1], ['default'])
+
+        expired = str(time.time() - 60)
+        request = self.factory.get('/', HTTP_COOKIE=f'db_written={expired}')
+        self.assertIn(self.handle(request)[1][0], REPLICAS)
+
+    def test_one_replica_per_request(self):
+        """Все чтения запроса, включая потоковое тело, идут на одну
+        реплику."""
+
+        used = []
+
+        def body():
+            used.append(self.router.db_for_read(Post))
+            yield b''
+
+        def view(request):
+            used.extend(self.router.db_for_read(Post) for _ in range(20))
+            return StreamingHttpResponse(body())
+
+        for _ in range(5):
+            used.clear()
+            response = ReplicaMiddleware(view)(self.factory.get('/'))
+            b''.join(response.streaming_content)
+            self.assertEqual(len(set(used)), 1)
+
+    def test_untracked_write_keeps_replicas(self):
+        """Служебная запись в GET не ставит метку и не уводит чтения
+        с реплик."""
+
+        used = []
+
+        def view(request):
+            with routers.untracked():
+                self.router.db_for_write(Post)
+            used.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        response = ReplicaMiddleware(view)(self.factory.get('/'))
+        self.assertIn(used[0], REPLICAS)
+        self.assertNotIn('db_written', response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        response, used = self.handle(self.factory.get('/'), write=True)
+        self.assertEqual(used, ['default', 'default'])
+        self.assertNotIn('db_written', response.cookies)
+
+    def test_streamed_body_reads_replicas(self):
+        """Тело потокового ответа отрисовывается после middleware, но
+        всё равно читает реплики."""
+
+        used = []
+
+        def body():
+            used.append(self.router.db_for_read(Post))
+            yield b''
+
+        response = ReplicaMiddleware(
+            lambda request: StreamingHttpResponse(body())
+        )(self.factory.get('/'))
+        self.assertEqual(used, [])
+        b''.join(response.streaming_content)
+        self.assertIn(used[0], REPLICAS)
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+
+# Реплика — та же база, чтобы запросы к ней выполнялись в тестах.
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaRequestTest(TestCase):
+    def test_search_is_not_a_write(self):
+        """Поиск читает индекс, не помечая читателя писавшим."""
+
+        user = User.objects.create_user(username='auth')
+        Post.objects.create(author=user, text='Пост про котиков')
+        response = self.client.get(reverse('posts:search'), {'q': 'котики'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('db_written', response.cookies)
@@ -0,0 +1,20 @@
+from core.signals import apply_sqlite_pragmas
+from django.db import connection
+from django.test import TestCase, override_settings
+
+
+class SqlitePragmasTest(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -4000})
+    def test_pragmas_are_applied_to_connection(self):
+        default = self.pragma('cache_size')
+        apply_sqlite_pragmas(sender=None, connection=connection)
+        try:
+            self.assertEqual(self.pragma('cache_size'), -4000)
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f'PRAGMA cache_size = {default}')
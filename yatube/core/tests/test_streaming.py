@@ -0,0 +1,75 @@
+from core.streaming import stream_template
+from django.core.cache import caches
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from posts.models import Group, Post, User
+
+ITEMS = (
+    '{% load cache %}{% cache 60 items %}'
+    '{% for post in posts %}{{ post.text }}'
+    '{% if not forloop.last %},{% endif %}{% endfor %}'
+    '{% endcache %}'
+)
+
+
+class StreamingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Пост {number}')
+            for number in range(15)
+        )
+
+    def setUp(self):
+        for alias in ('default', 'template_fragments'):
+            caches[alias].clear()
+
+    def test_feeds_match_rendered_pages(self):
+        """Потоковые страницы совпадают с обычными."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                expected = self.client.get(url).content
+                caches['template_fragments'].clear()
+                with override_settings(POSTS_STREAMING=True):
+                    response = self.client.get(url)
+                self.assertIsInstance(response, StreamingHttpResponse)
+                self.assertEqual(
+                    b''.join(response.streaming_content), expected
+                )
+
+    @override_settings(POSTS_STREAMING=True)
+    def test_header_sent_before_posts(self):
+        chunks = list(
+            self.client.get(reverse('posts:index')).streaming_content
+        )
+        self.assertIn(b'<header>', chunks[0])
+        self.assertNotIn('Пост 14'.encode(), chunks[0])
+
+    @override_settings(STREAMING_BUFFER_SIZE=1, TEMPLATES=[{
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'OPTIONS': {'loaders': [('django.template.loaders.locmem.Loader', {
+            'items.html': ITEMS,
+        })]},
+    }])
+    def test_cached_fragment_reused(self):
+        """Записи идут по одной, а фрагмент {% cache %} сохраняется
+        целиком и потом читается без запросов."""
+        context = {'posts': Post.objects.order_by('id')[:3]}
+        with self.assertNumQueries(1):
+            chunks = list(stream_template('items.html', context))
+        self.assertEqual(chunks, ['Пост 0,', 'Пост 1,', 'Пост 2'])
+        context = {'posts': Post.objects.order_by('id')[:3]}
+        with self.assertNumQueries(0):
+            chunks = list(stream_template('items.html', context))
+        self.assertEqual(chunks, ['Пост 0,Пост 1,Пост 2'])
@@ -0,0 +1,52 @@
+import copy
+import os
+import tempfile
+from io import StringIO
+
+from core.template_backends import (django_engines, reset_templates,
+                                    warm_templates)
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+
+CACHED_TEMPLATES = copy.deepcopy(settings.TEMPLATES)
+CACHED_TEMPLATES[0]['APP_DIRS'] = False
+CACHED_TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+
+class WarmTemplatesTest(SimpleTestCase):
+    def test_all_templates_parse(self):
+        """Все шаблоны проекта разбираются без ошибок."""
+
+        count, errors = warm_templates()
+        self.assertGreater(count, 0)
+        self.assertEqual(errors, [])
+
+    @override_settings(TEMPLATES=CACHED_TEMPLATES)
+    def test_templates_stay_in_cached_loader(self):
+        """После прогрева базовые и включаемые шаблоны уже в памяти."""
+
+        reset_templates()
+        loader = django_engines()[0].template_loaders[0]
+        self.assertEqual(loader.get_template_cache, {})
+        warm_templates()
+        for name in ('base.html', 'includes/header.html',
+                     'posts/includes/paginator.html', 'posts/index.html'):
+            self.assertIn(name, loader.get_template_cache)
+
+    def test_command_reports_broken_template(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'broken.html'), 'w') as stream:
+                stream.write('{% if %}')
+            templates = copy.deepcopy(settings.TEMPLATES)
+            templates[0]['DIRS'] = [directory]
+            with override_settings(TEMPLATES=templates), \
+                    self.assertRaisesMessage(CommandError, 'Ошибок'):
+                call_command(
+                    'warm_templates', stdout=StringIO(), stderr=StringIO()
+                )
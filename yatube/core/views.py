@@ -1,5 +1,9 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from . import cache, metrics
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -13,5 +17,31 @@ def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
 
 
+def too_many_requests(request, retry_after):
+    response = render(
+        request, 'core/429.html', {'retry_after': retry_after}, status=429
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
 def csrf_failure(request, reason=''):
-    return render(request, 'core/403csrf.html')
+    match = request.resolver_match
+    if match is not None and 'api' in match.app_names:
+        # Клиентам API нужна ошибка в формате API, а не HTML-страница.
+        return JsonResponse(
+            {'detail': 'Проверка CSRF не пройдена.'},
+            status=403,
+            json_dumps_params={'ensure_ascii': False}
+        )
+    return render(request, 'core/403csrf.html', status=403)
+
+
+@staff_member_required
+def performance_metrics(request):
+    data = metrics.collected()
+    return JsonResponse({
+        'views': metrics.summary(data),
+        'slow': data['slow'],
+        'cache': cache.stats(),
+    }, json_dumps_params={'ensure_ascii': False})
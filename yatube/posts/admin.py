@@ -1,6 +1,9 @@
 from django.contrib import admin
 
 from .models import Comment, Follow, Group, Post
+from .search import search_ids
+
+ADMIN_SEARCH_LIMIT = 1000
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -15,6 +18,13 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по обратному индексу вместо LIKE '%...%' по всей таблице.
+        if not search_term:
+            return queryset, False
+        ids = search_ids(search_term, limit=ADMIN_SEARCH_LIMIT)
+        return queryset.filter(pk__in=ids), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
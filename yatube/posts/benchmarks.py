@@ -0,0 +1,231 @@
+"""Замеры представлений на текущих данных базы.
+
+Для каждой страницы берётся самый тяжёлый пример: самая большая
+группа, самый плодовитый автор, самый обсуждаемый пост, читатель с
+наибольшим числом подписок. Страница запрашивается с пустым кэшем
+фрагментов и затем несколько раз с прогретым; записываются время, число
+запросов к базе и пик выделенной памяти.
+
+Общий кэш ``default`` (поколения, метрики, числа постов) и кэш
+``ratelimit`` очищаются только при ``clear_all=True``: на живых
+настройках это сбросило бы данные всех пользователей.
+"""
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from core.template_backends import reset_templates, warm_templates
+
+from .models import Comment, Follow, Group, Post, User, UserCounters
+
+# Разница меньше этой не считается регрессией, как бы ни был мал замер.
+MIN_REGRESSION_MS = 5
+MIN_REGRESSION_KB = 64
+
+
+def dataset():
+    return {
+        'users': User.objects.count(),
+        'groups': Group.objects.count(),
+        'posts': Post.objects.count(),
+        'comments': Comment.objects.count(),
+        'follows': Follow.objects.count(),
+    }
+
+
+def _top(queryset, field):
+    return queryset.order_by(f'-{field}').values_list('pk', flat=True).first()
+
+
+def scenarios():
+    """Пары имя -> (адрес, id пользователя или None)."""
+    result = {'index': (reverse('posts:index'), None)}
+    pages = Post.objects.count() // 10
+    if pages > 1:
+        result['index_deep'] = (
+            reverse('posts:index') + f'?page={pages // 2}', None
+        )
+    group_id = _top(Group.objects.all(), 'posts_count')
+    if group_id is not None:
+        slug = Group.objects.values_list('slug', flat=True).get(pk=group_id)
+        result['group_list'] = (reverse('posts:group_list', args=[slug]), None)
+    author_id = _top(UserCounters.objects.all(), 'posts_count')
+    if author_id is not None:
+        username = User.objects.values_list(
+            'username', flat=True
+        ).get(pk=author_id)
+        result['profile'] = (reverse('posts:profile', args=[username]), None)
+    post_id = _top(Post.objects.all(), 'comments_count')
+    if post_id is not None:
+        result['post_detail'] = (
+            reverse('posts:post_detail', args=[post_id]), None
+        )
+    reader_id = _top(
+        User.objects.annotate(follows=Count('follower')), 'follows'
+    )
+    if reader_id is not None:
+        result['follow_index'] = (reverse('posts:follow_index'), reader_id)
+    return result
+
+
+# Кэш, который очищается перед холодным замером по умолчанию.
+FRAGMENT_CACHE = 'template_fragments'
+
+
+def _clear_caches(clear_all=False):
+    if clear_all:
+        for alias in settings.CACHES:
+            caches[alias].clear()
+    else:
+        # clear() стёр бы общее хранилище всех алиасов.
+        caches[FRAGMENT_CACHE].forget()
+
+
+class QueryCounter:
+    """Обёртка выполнения SQL, считающая запросы.
+
+    CaptureQueriesContext здесь не подходит: сигнал request_started
+    очищает журнал запросов в начале каждого запроса.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _timed(client, url):
+    """Время ответа в миллисекундах и число запросов к базе."""
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        started = time.perf_counter()
+        response = client.get(url)
+        elapsed = (time.perf_counter() - started) * 1000
+    if response.status_code != 200:
+        raise RuntimeError(f'{url}: ответ {response.status_code}')
+    return elapsed, counter.count
+
+
+def _client(user_id):
+    client = Client()
+    if user_id is not None:
+        client.force_login(User.objects.get(pk=user_id))
+    return client
+
+
+def measure(url, user_id=None, repeats=5, clear_all=False):
+    client = _client(user_id)
+    _clear_caches(clear_all)
+    cold_ms, cold_queries = _timed(client, url)
+    warm = []
+    for _ in range(repeats):
+        elapsed, warm_queries = _timed(client, url)
+        warm.append(elapsed)
+    _clear_caches(clear_all)
+    tracemalloc.start()
+    try:
+        client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'cold_ms': round(cold_ms, 2),
+        'warm_ms': round(statistics.median(warm), 2),
+        'cold_queries': cold_queries,
+        'warm_queries': warm_queries,
+        'memory_kb': round(peak / 1024),
+    }
+
+
+def run(repeats=5, clear_all=False):
+    return {
+        name: measure(url, user_id, repeats, clear_all)
+        for name, (url, user_id) in scenarios().items()
+    }
+
+
+def measure_templates(url, user_id=None, repeats=5, clear_all=False):
+    """Первый запрос процесса без разобранных шаблонов и после
+    ``warm_templates``.
+
+    Кэш фрагментов очищается перед каждым запросом, так что разница —
+    это время разбора шаблонов страницы.
+    """
+    client = _client(user_id)
+    cold, warm = [], []
+    for _ in range(repeats):
+        reset_templates()
+        _clear_caches(clear_all)
+        cold.append(_timed(client, url)[0])
+        reset_templates()
+        warm_templates()
+        _clear_caches(clear_all)
+        warm.append(_timed(client, url)[0])
+    return {
+        'cold_templates_ms': round(statistics.median(cold), 2),
+        'warm_templates_ms': round(statistics.median(warm), 2),
+    }
+
+
+def run_templates(repeats=5, clear_all=False):
+    return {
+        name: measure_templates(url, user_id, repeats, clear_all)
+        for name, (url, user_id) in scenarios().items()
+    }
+
+
+def load_baselines(path):
+    try:
+        with open(path, encoding='utf-8') as stream:
+            return json.load(stream)
+    except FileNotFoundError:
+        return None
+
+
+def save_baselines(path, results):
+    with open(path, 'w', encoding='utf-8') as stream:
+        json.dump(
+            {'dataset': dataset(), 'views': results},
+            stream, ensure_ascii=False, indent=2, sort_keys=True
+        )
+        stream.write('\n')
+
+
+def _grew(value, base, tolerance, minimum):
+    return value > base * (1 + tolerance) and value - base > minimum
+
+
+def regressions(results, baselines, tolerance=0.5):
+    """Список описаний ухудшений относительно сохранённых замеров.
+
+    Число запросов сравнивается точно, время и память — с допуском
+    ``tolerance`` от базового значения.
+    """
+    found = []
+    for name, result in results.items():
+        base = baselines['views'].get(name)
+        if base is None:
+            continue
+        for key in ('cold_queries', 'warm_queries'):
+            if result[key] > base[key]:
+                found.append(f'{name}: {key} {base[key]} → {result[key]}')
+        for key in ('cold_ms', 'warm_ms'):
+            if _grew(result[key], base[key], tolerance, MIN_REGRESSION_MS):
+                found.append(f'{name}: {key} {base[key]} → {result[key]}')
+        if _grew(result['memory_kb'], base['memory_kb'], tolerance,
+                 MIN_REGRESSION_KB):
+            found.append(
+                f'{name}: memory_kb {base["memory_kb"]} → '
+                f'{result["memory_kb"]}'
+            )
+    return found
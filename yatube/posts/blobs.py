@@ -0,0 +1,62 @@
+"""Счётчики ссылок на файлы картинок из ``ContentAddressedStorage``.
+
+Одинаковые картинки разных постов лежат в одном файле, поэтому файл
+нельзя удалять вместе с постом. Каждый пост с картинкой держит ссылку
+в ``MediaBlob``; когда последняя ссылка снята, фоновая задача
+``posts.collect_blob`` удаляет файл и его миниатюры. Задача пишется в
+той же транзакции, что и удаление поста, так что откат не оставит
+поста без файла.
+
+Сборщик удаляет строку и файл в одной транзакции, заблокировав строку
+и заново проверив, что ссылок нет. ``acquire`` того же имени ждёт эту
+блокировку и, если строка уже удалена, создаёт её заново, так что
+хранилище после ``acquire`` видит на диске только живые файлы.
+
+Импорт ``posts.transfer`` обходит сигналы и берёт ссылки на картинки
+загруженных постов сам, в транзакции их вставки.
+"""
+from django.db import transaction
+from django.db.models import F
+from sorl.thumbnail import delete
+from sorl.thumbnail.images import ImageFile
+
+from core import jobs
+
+from .models import MediaBlob
+from .storage import image_storage
+
+
+def acquire(name, count=1):
+    """Добавляет ``count`` ссылок на файл ``name``."""
+    while not MediaBlob.objects.filter(name=name).update(
+        references=F('references') + count
+    ):
+        MediaBlob.objects.bulk_create(
+            [MediaBlob(name=name)], ignore_conflicts=True
+        )
+
+
+def release(name):
+    """Снимает ссылку на файл; последняя ставит файл на удаление."""
+    released = MediaBlob.objects.filter(
+        name=name, references__gt=0
+    ).update(references=F('references') - 1)
+    if released:
+        jobs.enqueue('posts.collect_blob', name, key=f'collect_blob:{name}')
+
+
+@jobs.task('posts.collect_blob')
+def collect(name):
+    """Удаляет файл без ссылок вместе с миниатюрами."""
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(
+            name=name, references=0
+        ).first()
+        if blob is None:
+            return
+        # SQLite не блокирует строки: удаление ещё раз проверяет ссылки.
+        deleted, _ = MediaBlob.objects.filter(
+            pk=blob.pk, references=0
+        ).delete()
+        if deleted:
+            delete(ImageFile(name, image_storage))
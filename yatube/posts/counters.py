@@ -0,0 +1,153 @@
+from django.db.models import Count, F
+
+from .models import Follow, Group, Post, User, UserCounters
+
+USER_COUNTER_SOURCES = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def compute_user_counters(user_id):
+    return {
+        field: model.objects.filter(**{f'{column}_id': user_id}).count()
+        for field, (model, column) in USER_COUNTER_SOURCES.items()
+    }
+
+
+def get_user_counters(user):
+    """Счётчики пользователя одним чтением по первичному ключу.
+
+    Если строки ещё нет, она досчитывается из исходных таблиц.
+    """
+    counters = UserCounters.objects.filter(pk=user.pk).first()
+    if counters is None:
+        counters, _ = UserCounters.objects.get_or_create(
+            user_id=user.pk,
+            defaults=compute_user_counters(user.pk)
+        )
+    return counters
+
+
+def _counter_rows(model, pk, field, delta):
+    rows = model.objects.filter(pk=pk)
+    if delta < 0:
+        # Счётчик не уходит в минус даже при устаревшем экземпляре.
+        rows = rows.filter(**{f'{field}__gte': -delta})
+    return rows
+
+
+def bump(model, pk, field, delta):
+    _counter_rows(model, pk, field, delta).update(
+        **{field: F(field) + delta}
+    )
+
+
+def bump_user(user_id, field, delta):
+    updated = _counter_rows(UserCounters, user_id, field, delta).update(
+        **{field: F(field) + delta}
+    )
+    if not updated and delta > 0:
+        UserCounters.objects.get_or_create(
+            user_id=user_id,
+            defaults=compute_user_counters(user_id)
+        )
+
+
+def _grouped(model, column, user_ids=None):
+    # Без order_by() Django 2.2 добавит поля Meta.ordering в GROUP BY.
+    rows = model.objects.order_by()
+    if user_ids is not None:
+        rows = rows.filter(**{f'{column}_id__in': user_ids})
+    return dict(
+        rows.values_list(column)
+        .annotate(total=Count('pk')).values_list(column, 'total')
+    )
+
+
+def rebuild_group_counters(fix=True, pks=None):
+    """Сверяет ``posts_count`` групп ``pks`` (по умолчанию всех);
+    возвращает число расхождений."""
+    groups = Group.objects.all() if pks is None else Group.objects.filter(
+        pk__in=pks
+    )
+    groups = groups.annotate(real=Count('posts')).exclude(
+        posts_count=F('real')
+    )
+    mismatches = 0
+    for group in groups:
+        mismatches += 1
+        if fix:
+            bump(
+                Group, group.pk, 'posts_count',
+                group.real - group.posts_count
+            )
+    return mismatches
+
+
+def rebuild_post_counters(fix=True, pks=None):
+    """Сверяет ``comments_count`` постов ``pks`` (по умолчанию всех)."""
+    posts = Post.objects.all() if pks is None else Post.objects.filter(
+        pk__in=pks
+    )
+    posts = posts.annotate(real=Count('comments')).exclude(
+        comments_count=F('real')
+    ).only('pk', 'comments_count')
+    mismatches = 0
+    for post in posts:
+        mismatches += 1
+        if fix:
+            bump(
+                Post, post.pk, 'comments_count',
+                post.real - post.comments_count
+            )
+    return mismatches
+
+
+def rebuild_user_counters(fix=True, pks=None):
+    """Сверяет ``UserCounters`` пользователей ``pks`` (по умолчанию
+    всех); недостающие строки создаются."""
+    sources = {
+        field: _grouped(model, column, pks)
+        for field, (model, column) in USER_COUNTER_SOURCES.items()
+    }
+    users = User.objects.all() if pks is None else User.objects.filter(
+        pk__in=pks
+    )
+    stored = UserCounters.objects.all()
+    if pks is not None:
+        stored = stored.filter(pk__in=pks)
+    stored = {counters.pk: counters for counters in stored}
+    mismatches = 0
+    missing = []
+    for user_id in users.values_list('pk', flat=True).iterator():
+        real = {
+            field: totals.get(user_id, 0)
+            for field, totals in sources.items()
+        }
+        counters = stored.get(user_id)
+        if counters is None:
+            mismatches += 1
+            missing.append(UserCounters(user_id=user_id, **real))
+            continue
+        if any(getattr(counters, key) != value for key, value in real.items()):
+            mismatches += 1
+            if fix:
+                UserCounters.objects.filter(pk=user_id).update(**real)
+    if fix:
+        UserCounters.objects.bulk_create(missing, batch_size=1000)
+    return mismatches
+
+
+def rebuild_counters(fix=True):
+    """Сверяет счётчики с исходными таблицами.
+
+    Возвращает словарь с числом расхождений по каждой модели; при
+    ``fix=True`` расхождения исправляются.
+    """
+    return {
+        'groups': rebuild_group_counters(fix),
+        'posts': rebuild_post_counters(fix),
+        'users': rebuild_user_counters(fix),
+    }
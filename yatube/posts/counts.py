@@ -0,0 +1,89 @@
+"""Число постов ленты для пагинации без COUNT(*) на каждый запрос.
+
+Число хранится в кэше вместе с поколением области из ``versions`` и
+временем подсчёта. Пока поколение то же и числу меньше
+``POSTS_COUNT_TTL`` секунд, оно отдаётся как есть. Устаревшее тоже
+отдаётся сразу, а пересчёт уходит в фоновый поток, так что запрос ждёт
+подсчёта, только когда числа в кэше нет вовсе.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from core import jobs
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'count'
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _key(name):
+    return f'{PREFIX}:{name}'
+
+
+def _refreshing_key(name):
+    return f'{PREFIX}:{name}:refreshing'
+
+
+def refresh(name, queryset, version):
+    """Пересчитывает число и кладёт его в кэш."""
+    count = queryset.count()
+    cache.set(_key(name), (count, version, time.time()), None)
+    return count
+
+
+def _run(name, queryset, version):
+    try:
+        refresh(name, queryset, version)
+    except Exception:
+        logger.exception('Не удалось пересчитать %s', name)
+    finally:
+        cache.delete(_refreshing_key(name))
+
+
+def _run_in_thread(name, queryset, version):
+    try:
+        _run(name, queryset, version)
+    finally:
+        connections.close_all()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='counts'
+            )
+        return _executor
+
+
+def schedule(name, queryset, version):
+    """Ставит пересчёт в фон, если его ещё не поставил другой процесс."""
+    if not cache.add(_refreshing_key(name), 1, settings.POSTS_COUNT_TTL):
+        return
+    _get_executor().submit(_run_in_thread, name, queryset, version)
+
+
+def cached_count(name, queryset, version):
+    """Число строк ``queryset`` для области ``name`` с поколением
+    ``version``; устаревшее число пересчитывается в фоне."""
+    entry = cache.get(_key(name))
+    if entry is None:
+        return refresh(name, queryset, version)
+    count, counted_version, counted_at = entry
+    fresh = time.time() - counted_at < settings.POSTS_COUNT_TTL
+    if counted_version == version and fresh:
+        return count
+    if jobs.is_inline():
+        return refresh(name, queryset, version)
+    schedule(name, queryset, version)
+    return count
@@ -0,0 +1,41 @@
+"""Проекции постов для шаблонов лент.
+
+Каждый шаблон читает из поста строго определённый набор полей. План ниже
+описывает, какие связи подтянуть JOIN'ом и какие колонки выбрать, чтобы
+страница ленты рендерилась фиксированным числом запросов.
+"""
+POST_FIELDS = ('id', 'text', 'pub_date', 'image', 'author', 'group')
+AUTHOR_FIELDS = ('author__username', 'author__first_name', 'author__last_name')
+GROUP_FIELDS = ('group__slug', 'group__title')
+
+FEED_PLANS = {
+    'posts/index.html': {
+        'select_related': ('author', 'group'),
+        'only': POST_FIELDS + AUTHOR_FIELDS + GROUP_FIELDS,
+    },
+    'posts/group_list.html': {
+        'select_related': ('author',),
+        'only': POST_FIELDS + AUTHOR_FIELDS,
+    },
+    'posts/profile.html': {
+        'select_related': ('group',),
+        'only': POST_FIELDS + GROUP_FIELDS,
+    },
+    'posts/follow.html': {
+        'select_related': ('author', 'group'),
+        'only': POST_FIELDS + AUTHOR_FIELDS + GROUP_FIELDS,
+    },
+    'posts/post_detail.html': {
+        'select_related': ('author', 'group'),
+        'only': (),
+    },
+}
+
+
+def feed_queryset(queryset, template):
+    """Применяет к queryset постов план выборки для шаблона."""
+    plan = FEED_PLANS[template]
+    queryset = queryset.select_related(*plan['select_related'])
+    if plan['only']:
+        queryset = queryset.only(*plan['only'])
+    return queryset
@@ -1,6 +1,9 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from .images import check_size, process_upload
 from .models import Comment, Post
+from .uploads import OversizedUpload
 
 
 class PostForm(forms.ModelForm):
@@ -20,6 +23,27 @@ class PostForm(forms.ModelForm):
             "text": "Текст"
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Недокачанный файл не картинка: поле его не увидит, а
+        # clean_image сообщит о размере.
+        name = self.add_prefix('image')
+        upload = self.files.get(name)
+        self.oversized_image = None
+        if isinstance(upload, OversizedUpload):
+            self.oversized_image = upload
+            self.files = self.files.copy()
+            del self.files[name]
+
+    def clean_image(self):
+        if self.oversized_image is not None:
+            check_size(self.oversized_image)
+        image = self.cleaned_data.get('image')
+        # Уже сохранённая картинка поста при правке не обрабатывается.
+        if isinstance(image, UploadedFile):
+            return process_upload(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
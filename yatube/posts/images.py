@@ -0,0 +1,147 @@
+"""Обработка загруженных картинок постов.
+
+Размеры проверяются по заголовку файла, до декодирования пикселей.
+Затем картинка поворачивается по EXIF, уменьшается до
+``POSTS_IMAGE_MAX_WIDTH`` и перекодируется в ``POSTS_IMAGE_FORMAT`` без
+метаданных. Анимации GIF, PNG и WebP перекодируются покадрово в свой же
+формат: кадры тоже уменьшаются и теряют метаданные. Файл больше
+``POSTS_IMAGE_MAX_BYTES`` отсекает ещё при приёме ``posts.uploads``.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps, ImageSequence, features
+
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+CONTENT_TYPES = {'WEBP': 'image/webp', 'JPEG': 'image/jpeg'}
+# Форматы, анимация которых сохраняется; у остальных (MPO, TIFF)
+# берётся первый кадр.
+ANIMATED_FORMATS = {'GIF': 'gif', 'PNG': 'png', 'WEBP': 'webp'}
+
+
+def output_format():
+    """Формат из настроек или прогрессивный JPEG, если Pillow без WebP."""
+    if settings.POSTS_IMAGE_FORMAT == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return settings.POSTS_IMAGE_FORMAT
+
+
+def is_animated(image):
+    return (
+        getattr(image, 'is_animated', False)
+        and image.format in ANIMATED_FORMATS
+    )
+
+
+def check_size(upload):
+    if upload.size > settings.POSTS_IMAGE_MAX_BYTES:
+        raise ValidationError(
+            'Файл больше %(limit)d МБ.',
+            params={'limit': settings.POSTS_IMAGE_MAX_BYTES // 2 ** 20},
+            code='file_too_large',
+        )
+
+
+def validate(upload):
+    """Проверяет размер файла и картинки; возвращает открытую картинку.
+
+    ``Image.open`` читает только заголовок, поэтому огромная картинка
+    отклоняется без выделения памяти под её пиксели. Для анимации
+    предел пикселей считается по всем кадрам.
+    """
+    check_size(upload)
+    upload.seek(0)
+    try:
+        image = Image.open(upload)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Не удалось прочитать картинку.', code='invalid')
+    width, height = image.size
+    if width * height > settings.POSTS_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка %(width)d×%(height)d слишком велика.',
+            params={'width': width, 'height': height},
+            code='too_many_pixels',
+        )
+    if is_animated(image):
+        frames = image.n_frames
+        if width * height * frames > settings.POSTS_IMAGE_MAX_PIXELS:
+            raise ValidationError(
+                'Анимация из %(frames)d кадров %(width)d×%(height)d '
+                'слишком велика.',
+                params={'frames': frames, 'width': width, 'height': height},
+                code='too_many_pixels',
+            )
+    return image
+
+
+def _fit(size):
+    width, height = size
+    max_width = settings.POSTS_IMAGE_MAX_WIDTH
+    if width <= max_width:
+        return size
+    return max_width, round(height * max_width / width)
+
+
+def _encode(image, format_):
+    max_width = settings.POSTS_IMAGE_MAX_WIDTH
+    if image.format == 'JPEG':
+        # Декодер JPEG сразу уменьшает картинку кратно 2, 4 или 8.
+        image.draft(
+            'RGB', (max_width, max_width * image.height // image.width)
+        )
+    image = ImageOps.exif_transpose(image)
+    if image.width > max_width:
+        image = image.resize(_fit(image.size), Image.LANCZOS)
+    if format_ == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+        alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+        image = image.convert(
+            'RGBA' if alpha and format_ == 'WEBP' else 'RGB'
+        )
+    buffer = BytesIO()
+    # Метаданные не передаются, поэтому EXIF и прочее не сохраняются.
+    image.save(
+        buffer, format_, quality=settings.POSTS_IMAGE_QUALITY,
+        optimize=True, progressive=True, method=4,
+    )
+    return buffer.getvalue()
+
+
+def _encode_animation(image, format_):
+    size = _fit(image.size)
+    frames = []
+    durations = []
+    for frame in ImageSequence.Iterator(image):
+        durations.append(frame.info.get('duration', 100))
+        frame = frame.convert('RGBA')
+        if frame.size != size:
+            frame = frame.resize(size, Image.LANCZOS)
+        frames.append(frame)
+    buffer = BytesIO()
+    # Как и в _encode, метаданные исходника не передаются.
+    frames[0].save(
+        buffer, format_, save_all=True, append_images=frames[1:],
+        duration=durations, loop=image.info.get('loop', 0),
+    )
+    return buffer.getvalue()
+
+
+def process_upload(upload):
+    """Проверенная и перекодированная копия загруженной картинки."""
+    image = validate(upload)
+    if is_animated(image):
+        format_, encode = image.format, _encode_animation
+        extension = ANIMATED_FORMATS[format_]
+        content_type = f'image/{extension}'
+    else:
+        format_, encode = output_format(), _encode
+        extension = EXTENSIONS[format_]
+        content_type = CONTENT_TYPES[format_]
+    try:
+        data = encode(image, format_)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Не удалось прочитать картинку.', code='invalid')
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    return SimpleUploadedFile(f'{stem}.{extension}', data, content_type)
@@ -0,0 +1,116 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.template_backends import django_engines, is_cached
+from posts import benchmarks
+
+COLUMNS = (
+    'cold_ms', 'warm_ms', 'cold_queries', 'warm_queries', 'memory_kb'
+)
+TEMPLATE_COLUMNS = ('cold_templates_ms', 'warm_templates_ms')
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время, запросы и память страниц на текущих данных и '
+        'сравнивает с сохранёнными замерами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeats',
+            type=int,
+            default=5,
+            help='Сколько раз запрашивать страницу с прогретым кэшем.'
+        )
+        parser.add_argument(
+            '--baselines',
+            default=settings.BENCHMARK_BASELINES,
+            help='Файл с сохранёнными замерами.'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.5,
+            help='Допустимый рост времени и памяти, доля от базы.'
+        )
+        parser.add_argument(
+            '--save',
+            action='store_true',
+            help='Сохранить замеры как новую базу.'
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Вывести замеры в JSON.'
+        )
+        parser.add_argument(
+            '--clear-all',
+            action='store_true',
+            help='Очищать перед холодным замером все кэши, а не только '
+                 'фрагменты: сбрасывает поколения, метрики и лимиты '
+                 'запросов всех пользователей.'
+        )
+        parser.add_argument(
+            '--templates',
+            action='store_true',
+            help='Сравнить первый запрос с разобранными заранее шаблонами '
+                 'и без них.'
+        )
+
+    def handle(self, *args, **options):
+        if options['templates']:
+            self.handle_templates(options)
+            return
+        results = benchmarks.run(options['repeats'], options['clear_all'])
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.write_table(results)
+        if options['save']:
+            benchmarks.save_baselines(options['baselines'], results)
+            self.stdout.write(self.style.SUCCESS(
+                f'Замеры сохранены в {options["baselines"]}.'
+            ))
+            return
+        baselines = benchmarks.load_baselines(options['baselines'])
+        if baselines is None:
+            self.stdout.write('Сохранённых замеров нет, сравнивать не с чем.')
+            return
+        if baselines['dataset'] != benchmarks.dataset():
+            self.stdout.write(self.style.WARNING(
+                'Объём данных отличается от сохранённого: '
+                f'{baselines["dataset"]}.'
+            ))
+        found = benchmarks.regressions(
+            results, baselines, options['tolerance']
+        )
+        if found:
+            raise CommandError('Ухудшения:\n' + '\n'.join(found))
+        self.stdout.write(self.style.SUCCESS('Ухудшений нет.'))
+
+    def handle_templates(self, options):
+        if not all(is_cached(engine) for engine in django_engines()):
+            self.stdout.write(self.style.WARNING(
+                'Загрузчик шаблонов не кэширует их, разницы не будет; '
+                'запустите с настройками yatube.settings_production.'
+            ))
+        results = benchmarks.run_templates(
+            options['repeats'], options['clear_all']
+        )
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.write_table(results, TEMPLATE_COLUMNS)
+
+    def write_table(self, results, columns=COLUMNS):
+        rows = [('страница',) + columns]
+        for name, result in results.items():
+            rows.append((name,) + tuple(str(result[key]) for key in columns))
+        widths = [max(len(cell) for cell in column) for column in zip(*rows)]
+        for row in rows:
+            self.stdout.write('  '.join(
+                cell.ljust(width) for cell, width in zip(row, widths)
+            ))
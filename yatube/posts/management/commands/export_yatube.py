@@ -0,0 +1,110 @@
+import csv
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import TYPES, columns, export_records
+
+
+def encode(value):
+    # Даты целиком, с микросекундами, в отличие от DjangoJSONEncoder.
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} не сериализуется в JSON')
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, посты, комментарии и подписки '
+        'в NDJSON или CSV.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='-',
+            help=(
+                'Файл NDJSON («-» — стандартный вывод) или каталог для '
+                'файлов CSV.'
+            )
+        )
+        parser.add_argument(
+            '--format',
+            choices=('ndjson', 'csv'),
+            default='ndjson',
+        )
+        parser.add_argument(
+            '--types',
+            default=','.join(TYPES),
+            help=f'Типы записей через запятую: {",".join(TYPES)}.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Сколько строк читать из базы за один запрос.'
+        )
+
+    def handle(self, *args, **options):
+        types = [name for name in options['types'].split(',') if name]
+        unknown = set(types) - set(TYPES)
+        if unknown:
+            raise CommandError(f'Неизвестные типы: {", ".join(unknown)}.')
+        records = export_records(types, options['batch_size'])
+        started = time.monotonic()
+        if options['format'] == 'csv':
+            if options['path'] == '-':
+                raise CommandError('Для CSV нужен каталог.')
+            count = self.write_csv(options['path'], records)
+        else:
+            count = self.write_ndjson(options['path'], records)
+        elapsed = time.monotonic() - started
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено записей: {count} за {elapsed:.1f} с '
+            f'({count / max(elapsed, 1e-6):.0f} в секунду).'
+        ))
+
+    def write_ndjson(self, path, records):
+        stream = sys.stdout if path == '-' else open(
+            path, 'w', encoding='utf-8'
+        )
+        count = 0
+        try:
+            for record_type, record in records:
+                stream.write(json.dumps(
+                    {'type': record_type, **record},
+                    default=encode, ensure_ascii=False
+                ))
+                stream.write('\n')
+                count += 1
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        return count
+
+    def write_csv(self, directory, records):
+        os.makedirs(directory, exist_ok=True)
+        files = {}
+        writers = {}
+        count = 0
+        try:
+            for record_type, record in records:
+                if record_type not in writers:
+                    files[record_type] = open(
+                        os.path.join(directory, f'{record_type}.csv'),
+                        'w', encoding='utf-8', newline=''
+                    )
+                    writers[record_type] = csv.DictWriter(
+                        files[record_type], columns(record_type)
+                    )
+                    writers[record_type].writeheader()
+                writers[record_type].writerow(record)
+                count += 1
+        finally:
+            for stream in files.values():
+                stream.close()
+        return count
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.synthetic import generate
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт синтетических пользователей, группы, посты, комментарии '
+        'и подписки для нагрузочных замеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=50000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--follows',
+            type=int,
+            default=30,
+            help='Среднее число подписок пользователя.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Сколько записей вставлять одной транзакцией.'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Зерно генератора для воспроизводимых данных.'
+        )
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+
+        def progress(record_type, count):
+            if verbosity >= 2:
+                self.stdout.write(f'{record_type}: {count}')
+
+        started = time.monotonic()
+        importer = generate(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            progress=progress,
+        )
+        for record_type, count in importer.counts.items():
+            self.stdout.write(f'{record_type}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с.'
+        ))
@@ -0,0 +1,100 @@
+import csv
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import TYPES, Importer, rebuild_derived
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает выгрузку export_yatube пачками через bulk_create и '
+        'досчитывает счётчики, поиск и ленты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help=(
+                'Файл NDJSON («-» — стандартный ввод) или каталог с '
+                'файлами CSV.'
+            )
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Сколько записей вставлять одной транзакцией.'
+        )
+        parser.add_argument(
+            '--skip-rebuild',
+            action='store_true',
+            help='Не пересчитывать счётчики, поисковый индекс и ленты.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        self.verbosity = options['verbosity']
+        importer = Importer(options['batch_size'], progress=self.progress)
+        started = time.monotonic()
+        if path != '-' and os.path.isdir(path):
+            records = self.read_csv(path)
+        else:
+            records = self.read_ndjson(path)
+        for record_type, record in records:
+            try:
+                importer.add(record_type, record)
+            except (KeyError, TypeError, ValueError) as exc:
+                raise CommandError(f'Некорректная запись {record}: {exc}')
+        importer.finish()
+        elapsed = time.monotonic() - started
+        for record_type in TYPES:
+            count = importer.counts[record_type]
+            seconds = importer.seconds[record_type]
+            self.stdout.write(
+                f'{record_type}: {count} за {seconds:.1f} с '
+                f'({count / max(seconds, 1e-6):.0f} в секунду), '
+                f'пропущено {importer.skipped[record_type]}'
+            )
+        if not options['skip_rebuild']:
+            rebuild_started = time.monotonic()
+            rebuild_derived(importer, options['batch_size'])
+            self.stdout.write(
+                'Счётчики, поиск и ленты пересчитаны за '
+                f'{time.monotonic() - rebuild_started:.1f} с.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {elapsed:.1f} с.'
+        ))
+
+    def progress(self, record_type, count):
+        if self.verbosity >= 2:
+            self.stdout.write(f'{record_type}: {count}')
+
+    def read_ndjson(self, path):
+        stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+        try:
+            for number, line in enumerate(stream, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    record_type = record.pop('type')
+                except (ValueError, KeyError, AttributeError):
+                    raise CommandError(f'Строка {number}: некорректный JSON.')
+                yield record_type, record
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+    def read_csv(self, directory):
+        for record_type in TYPES:
+            path = os.path.join(directory, f'{record_type}.csv')
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8', newline='') as stream:
+                for record in csv.DictReader(stream):
+                    yield record_type, record
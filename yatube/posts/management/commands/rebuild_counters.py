@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики постов и подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить счётчики, ничего не исправляя.'
+        )
+
+    def handle(self, *args, **options):
+        mismatches = rebuild_counters(fix=not options['check'])
+        for name, count in mismatches.items():
+            self.stdout.write(f'{name}: {count}')
+        if options['check'] and any(mismatches.values()):
+            raise CommandError('Счётчики расходятся с данными.')
+        self.stdout.write(self.style.SUCCESS('Готово.'))
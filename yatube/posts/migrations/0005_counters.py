@@ -0,0 +1,83 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:01
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    Follow = apps.get_model('posts', 'Follow')
+    UserCounters = apps.get_model('posts', 'UserCounters')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    def count_of(model, column):
+        return models.Subquery(
+            model.objects.filter(**{column: models.OuterRef('pk')})
+            .order_by().values(column)
+            .annotate(total=models.Count('pk')).values('total')[:1],
+            output_field=models.IntegerField()
+        )
+
+    Group.objects.update(
+        posts_count=Coalesce(count_of(Post, 'group'), 0)
+    )
+    Post.objects.update(comments_count=Coalesce(
+        count_of(apps.get_model('posts', 'Comment'), 'post'), 0
+    ))
+    users = User.objects.annotate(
+        posts_total=count_of(Post, 'author'),
+        followers_total=count_of(Follow, 'author'),
+        following_total=count_of(Follow, 'user'),
+    ).values_list(
+        'pk', 'posts_total', 'followers_total', 'following_total'
+    )
+    UserCounters.objects.bulk_create(
+        (
+            UserCounters(
+                user_id=pk,
+                posts_count=posts or 0,
+                followers_count=followers or 0,
+                following_count=following or 0,
+            )
+            for pk, posts, followers, following in users.iterator()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0004_comment_follow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCounters',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Число постов')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Число подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Число подписок')),
+            ],
+            options={
+                'verbose_name': 'Счётчики пользователя',
+                'verbose_name_plural': 'Счётчики пользователей',
+            },
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число постов'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число комментариев'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
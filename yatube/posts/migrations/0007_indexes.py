@@ -0,0 +1,68 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:04
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    UserCounters = apps.get_model('posts', 'UserCounters')
+    keep = Follow.objects.values('user', 'author').annotate(
+        first=models.Min('pk')
+    ).values_list('first', flat=True)
+    duplicates = Follow.objects.exclude(pk__in=keep)
+    affected = set()
+    for user_id, author_id in duplicates.values_list('user', 'author'):
+        affected.update((user_id, author_id))
+    duplicates.delete()
+
+    # Счётчики из 0005 учли дубликаты: пересчитываются для их участников.
+    def count_of(column):
+        return Coalesce(models.Subquery(
+            Follow.objects.filter(**{column: models.OuterRef('pk')})
+            .order_by().values(column)
+            .annotate(total=models.Count('pk')).values('total')[:1],
+            output_field=models.IntegerField()
+        ), 0)
+
+    affected = sorted(affected)
+    for start in range(0, len(affected), 900):
+        UserCounters.objects.filter(
+            pk__in=affected[start:start + 900]
+        ).update(
+            followers_count=count_of('author'),
+            following_count=count_of('user'),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_timeline'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_follows, migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['pub_date'], name='post_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', 'pub_date'], name='post_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', 'pub_date'], name='post_group_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:09
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.utils import OperationalError
+
+FTS_TABLE = 'posts_post_fts'
+BATCH_SIZE = 1000
+
+
+def create_fts_table(apps, schema_editor):
+    # Таблица создаётся только там, где SQLite собран с FTS5; иначе поиск
+    # работает через SearchTerm.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(terms)'
+        )
+    except OperationalError:
+        pass
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def index_existing_posts(apps, schema_editor):
+    # Те же правила, что в posts.search, но на исторических моделях:
+    # новые посты индексирует задача, существующие — эта миграция.
+    from posts.search import terms
+
+    connection = schema_editor.connection
+    tables = connection.introspection.table_names()
+    use_fts = settings.POSTS_SEARCH_BACKEND == 'fts5' or (
+        settings.POSTS_SEARCH_BACKEND == 'auto' and FTS_TABLE in tables
+    )
+    Post = apps.get_model('posts', 'Post')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    posts = Post.objects.using(connection.alias).values_list('pk', 'text')
+    batch = []
+    for post in posts.iterator(chunk_size=BATCH_SIZE):
+        batch.append(post)
+        if len(batch) == BATCH_SIZE:
+            _index_batch(connection, SearchTerm, batch, use_fts, terms)
+            batch = []
+    if batch:
+        _index_batch(connection, SearchTerm, batch, use_fts, terms)
+
+
+def _index_batch(connection, SearchTerm, batch, use_fts, terms):
+    if use_fts:
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, terms) VALUES (%s, %s)',
+                [(pk, ' '.join(terms(text))) for pk, text in batch]
+            )
+        return
+    SearchTerm.objects.using(connection.alias).bulk_create(
+        SearchTerm(term=term, post_id=pk, weight=weight)
+        for pk, text in batch
+        for term, weight in Counter(terms(text)).items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Основа слова')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='Число вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Термин поиска',
+                'verbose_name_plural': 'Термины поиска',
+                'unique_together': {('term', 'post')},
+            },
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+        migrations.RunPython(
+            index_existing_posts, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,220 @@
+import base64
+import binascii
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(direction, value, pk):
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    raw = f'{direction}|{value}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Разбирает токен курсора в тройку (направление, значение, id).
+
+    Значение поля сортировки — дата или целое число.
+    """
+    try:
+        padding = '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(token + padding).decode()
+        direction, value, pk = raw.split('|')
+        value = parse_datetime(value) or int(value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(token)
+    if direction not in (NEXT, PREVIOUS):
+        raise InvalidCursor(token)
+    return direction, value, pk
+
+
+class CursorPage:
+    """Страница ленты, полученная по ключу (pub_date, id) без OFFSET."""
+
+    is_cursor = True
+    number = None
+
+    def __init__(self, object_list, paginator, cursor,
+                 has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.cursor = cursor
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage {self.cursor or "first"}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self.paginator.cursor_for(NEXT, self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self.paginator.cursor_for(PREVIOUS, self.object_list[0])
+
+
+class CursorPaginator:
+    """Keyset-пагинация ленты по паре (pub_date, id).
+
+    Стоимость любой страницы равна стоимости первой: вместо
+    ``COUNT(*)`` и ``OFFSET`` выполняется один запрос с условием
+    «после последней показанной записи». Поле сортировки и поле,
+    различающее записи с равной датой, можно заменить, например, на
+    аннотации из связанной таблицы.
+    """
+
+    is_cursor = True
+
+    def __init__(self, queryset, per_page, ordering='-pub_date',
+                 tiebreaker='id'):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.descending = ordering.startswith('-')
+        self.field = ordering.lstrip('-')
+        self.tiebreaker = tiebreaker
+
+    def _order(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        return (f'{prefix}{self.field}', f'{prefix}{self.tiebreaker}')
+
+    def _after(self, value, pk, reverse=False):
+        descending = self.descending != reverse
+        lookup = 'lt' if descending else 'gt'
+        return (
+            Q(**{f'{self.field}__{lookup}': value})
+            | Q(**{self.field: value, f'{self.tiebreaker}__{lookup}': pk})
+        )
+
+    def cursor_for(self, direction, obj):
+        if isinstance(obj, dict):
+            # Строки из .values().
+            return encode_cursor(
+                direction, obj[self.field], obj[self.tiebreaker]
+            )
+        return encode_cursor(
+            direction,
+            getattr(obj, self.field),
+            getattr(obj, self.tiebreaker)
+        )
+
+    def page(self, cursor=None):
+        """Возвращает страницу по токену; пустой токен — первая страница."""
+        if not cursor:
+            rows = list(
+                self.queryset.order_by(*self._order())[:self.per_page + 1]
+            )
+            return CursorPage(
+                rows[:self.per_page], self, cursor,
+                has_next=len(rows) > self.per_page,
+                has_previous=False,
+            )
+        direction, value, pk = decode_cursor(cursor)
+        reverse = direction == PREVIOUS
+        try:
+            queryset = self.queryset.filter(
+                self._after(value, pk, reverse=reverse)
+            )
+        except (TypeError, ValueError):
+            # Значение другого типа, чем поле сортировки.
+            raise InvalidCursor(cursor)
+        rows = list(
+            queryset
+            .order_by(*self._order(reverse=reverse))[:self.per_page + 1]
+        )
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+            return CursorPage(
+                rows, self, cursor, has_next=True, has_previous=has_more
+            )
+        return CursorPage(
+            rows, self, cursor, has_next=has_more, has_previous=True
+        )
+
+    def get_page(self, cursor=None):
+        """Как ``page``, но при битом токене отдаёт первую страницу."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+
+class WindowPaginator(Paginator):
+    """Нумерованная пагинация с окном номеров и готовым числом записей.
+
+    ``count`` — известное число записей или функция без аргументов,
+    которая его вернёт, например счётчик из ``posts.counts``; без него
+    выполняется ``COUNT(*)``. Номера страниц выводятся окном вокруг
+    текущей, а не все подряд, поэтому разметка не растёт с лентой.
+    """
+
+    def __init__(self, object_list, per_page, count=None, on_each_side=2,
+                 on_ends=1, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+        self.on_each_side = on_each_side
+        self.on_ends = on_ends
+
+    @cached_property
+    def count(self):
+        if self._count is None:
+            return super().count
+        if callable(self._count):
+            return self._count()
+        return self._count
+
+    def page_window(self, number):
+        """Первые и последние ``on_ends`` номеров и ``on_each_side`` по
+        обе стороны от текущего; пропуски обозначены None."""
+        last = self.num_pages
+        side, ends = self.on_each_side, self.on_ends
+        if last <= (side + ends) * 2 + 1:
+            return list(self.page_range)
+        window = []
+        if number - side > ends + 2:
+            window += list(range(1, ends + 1)) + [None]
+            window += list(range(number - side, number))
+        else:
+            window += list(range(1, number))
+        if number + side < last - ends - 1:
+            window += list(range(number, number + side + 1)) + [None]
+            window += list(range(last - ends + 1, last + 1))
+        else:
+            window += list(range(number, last + 1))
+        return window
@@ -0,0 +1,167 @@
+"""Полнотекстовый поиск по постам.
+
+Текст поста разбивается на слова и сводится к основам русским
+стеммером. Основы хранятся в обратном индексе одного из двух видов:
+
+* ``fts5`` — виртуальная таблица SQLite FTS5 с ранжированием bm25;
+* ``index`` — таблица ``SearchTerm`` (основа, пост, число вхождений),
+  работает на любой базе данных.
+
+Индекс обновляется фоновой задачей ``posts.index`` после создания и
+правки поста и сигналом при удалении; ``manage.py rebuild_search_index``
+перестраивает его целиком.
+"""
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+
+from core import jobs
+
+from .models import Post, SearchTerm
+from .stemmer import stem
+
+FTS_TABLE = 'posts_post_fts'
+TOKEN = re.compile(r'\w+')
+MAX_TERM_LENGTH = 64
+
+
+def terms(text):
+    return [
+        stem(token)[:MAX_TERM_LENGTH]
+        for token in TOKEN.findall(text.lower())
+    ]
+
+
+_detected = {}
+
+
+def backend():
+    """Имя используемого вида индекса с учётом настройки и базы."""
+    if settings.POSTS_SEARCH_BACKEND != 'auto':
+        return settings.POSTS_SEARCH_BACKEND
+    connection = connections[router.db_for_read(Post)]
+    key = (connection.alias, connection.settings_dict['NAME'])
+    if key not in _detected:
+        tables = []
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                tables = connection.introspection.table_names(cursor)
+        _detected[key] = 'fts5' if FTS_TABLE in tables else 'index'
+    return _detected[key]
+
+
+def _fts_cursor(write=True):
+    # Поиск читает с реплики: запись в GET оставила бы читателя на
+    # основной базе.
+    alias = (router.db_for_write if write else router.db_for_read)(Post)
+    return connections[alias].cursor()
+
+
+def index_post(post):
+    tokens = terms(post.text)
+    if backend() == 'fts5':
+        with _fts_cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, terms) VALUES (%s, %s)',
+                [post.pk, ' '.join(tokens)]
+            )
+        return
+    SearchTerm.objects.filter(post=post).delete()
+    SearchTerm.objects.bulk_create(
+        SearchTerm(term=term, post_id=post.pk, weight=weight)
+        for term, weight in Counter(tokens).items()
+    )
+
+
+@jobs.task('posts.index')
+def reindex_post(post_id):
+    post = Post.objects.filter(pk=post_id).only('id', 'text').first()
+    if post is not None:
+        index_post(post)
+
+
+def remove_post(post_id):
+    # Строки SearchTerm удаляются каскадом вместе с постом.
+    if backend() == 'fts5':
+        with _fts_cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+
+def _search_fts(query_terms, offset, limit):
+    match = ' AND '.join(f'"{term}"' for term in query_terms)
+    with _fts_cursor(write=False) as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY bm25({FTS_TABLE}) LIMIT %s OFFSET %s',
+            [match, limit, offset]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_index(query_terms, offset, limit):
+    frequency = dict(
+        SearchTerm.objects.filter(term__in=query_terms)
+        .values_list('term').annotate(total=Count('pk'))
+        .values_list('term', 'total')
+    )
+    if len(frequency) < len(query_terms):
+        return []
+    # Редкие слова весят больше частых (упрощённый tf-idf).
+    score = Sum(Case(
+        *(
+            When(term=term, then=F('weight') * Value(1.0 / total))
+            for term, total in frequency.items()
+        ),
+        output_field=FloatField()
+    ))
+    rows = (
+        SearchTerm.objects.filter(term__in=query_terms)
+        .values('post')
+        .annotate(matched=Count('term'), score=score)
+        .filter(matched=len(query_terms))
+        .order_by('-score', '-post')
+        .values_list('post', flat=True)
+    )
+    return list(rows[offset:offset + limit])
+
+
+def search_ids(query, offset=0, limit=10):
+    """id постов, содержащих все слова запроса, по убыванию релевантности."""
+    query_terms = sorted(set(terms(query)))
+    if not query_terms:
+        return []
+    if backend() == 'fts5':
+        return _search_fts(query_terms, offset, limit)
+    return _search_index(query_terms, offset, limit)
+
+
+def search_posts(query, offset=0, limit=10, queryset=None):
+    """Посты результатов поиска в порядке релевантности."""
+    ids = search_ids(query, offset, limit)
+    if queryset is None:
+        queryset = Post.objects.all()
+    posts = queryset.in_bulk(ids)
+    return [posts[pk] for pk in ids if pk in posts]
+
+
+def rebuild_index(batch_size=1000):
+    """Перестраивает индекс активного вида с нуля; возвращает число постов."""
+    if backend() == 'fts5':
+        with _fts_cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    else:
+        SearchTerm.objects.all().delete()
+    count = 0
+    posts = Post.objects.only('pk', 'text').iterator(chunk_size=batch_size)
+    for post in posts:
+        index_post(post)
+        count += 1
+    return count
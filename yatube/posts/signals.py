@@ -0,0 +1,214 @@
+from django.core.files import File
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from core import jobs
+
+from . import blobs, search, thumbnails, timeline, versions
+from .counters import bump, bump_user
+from .models import Comment, Follow, Group, Post, User
+
+# Поля пользователя, которые показываются рядом с его постами.
+USER_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(post_init, sender=Post)
+def remember_loaded_fields(sender, instance, **kwargs):
+    # Через __dict__, чтобы не подгружать отложенные поля из .only().
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+    instance._loaded_text = instance.__dict__.get('text')
+    instance._loaded_image = _image_name(instance)
+
+
+def _image_name(instance):
+    image = instance.__dict__.get('image')
+    return getattr(image, 'name', image) or ''
+
+
+@receiver(pre_save, sender=Post)
+def remember_uploaded_image(sender, instance, **kwargs):
+    # Ссылку на файл, который запишется при этом сохранении, возьмёт
+    # хранилище.
+    image = instance.__dict__.get('image')
+    if isinstance(image, FieldFile):
+        instance._uploading_image = not image._committed
+    else:
+        instance._uploading_image = isinstance(image, File)
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        bump_user(instance.author_id, 'posts_count', 1)
+    elif instance._loaded_group_id == instance.group_id:
+        return
+    elif instance._loaded_group_id is not None:
+        bump(Group, instance._loaded_group_id, 'posts_count', -1)
+    if instance.group_id is not None:
+        bump(Group, instance.group_id, 'posts_count', 1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_saved_post(sender, instance, created, **kwargs):
+    if created:
+        jobs.enqueue(
+            'posts.fan_out', instance.pk, key=f'fan_out:{instance.pk}'
+        )
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, created, **kwargs):
+    if created or instance._loaded_text != instance.text:
+        jobs.enqueue(
+            'posts.index', instance.pk, key=f'index:{instance.pk}'
+        )
+        instance._loaded_text = instance.text
+
+
+@receiver(post_save, sender=Post)
+def reference_saved_image(sender, instance, **kwargs):
+    image = _image_name(instance)
+    uploaded = instance._uploading_image
+    if image == instance._loaded_image and not uploaded:
+        return
+    if image and not uploaded:
+        blobs.acquire(image)
+    if instance._loaded_image:
+        blobs.release(instance._loaded_image)
+
+
+@receiver(post_save, sender=Post)
+def thumbnail_saved_post(sender, instance, **kwargs):
+    image = _image_name(instance)
+    if image and image != instance._loaded_image:
+        thumbnails.schedule(instance.pk)
+    instance._loaded_image = image
+
+
+@receiver(post_save, sender=Post)
+def invalidate_saved_post(sender, instance, **kwargs):
+    versions.bump(
+        *versions.post_scopes(instance, instance._loaded_group_id)
+    )
+    # Последний обработчик: дальше группа поста считается сохранённой.
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    bump_user(instance.author_id, 'posts_count', -1)
+    if instance.group_id is not None:
+        bump(Group, instance.group_id, 'posts_count', -1)
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_image(sender, instance, **kwargs):
+    image = _image_name(instance)
+    if image:
+        blobs.release(image)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post(sender, instance, **kwargs):
+    versions.bump(
+        *versions.post_scopes(instance, instance._loaded_group_id)
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group(sender, instance, **kwargs):
+    # Название группы есть и в общей ленте, и в списках API.
+    versions.bump(
+        versions.scope_key('feed'),
+        versions.scope_key('groups'),
+        versions.scope_key('group', instance.pk)
+    )
+
+
+@receiver(post_init, sender=User)
+def remember_user_name(sender, instance, **kwargs):
+    instance._loaded_name = tuple(
+        instance.__dict__.get(field) for field in USER_NAME_FIELDS
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_renamed_user(sender, instance, created, **kwargs):
+    name = tuple(getattr(instance, field) for field in USER_NAME_FIELDS)
+    if created or name == instance._loaded_name:
+        return
+    instance._loaded_name = name
+    group_ids = (
+        Post.objects.filter(author_id=instance.pk, group__isnull=False)
+        .order_by().values_list('group_id', flat=True).distinct()
+    )
+    versions.bump(
+        versions.scope_key('feed'),
+        versions.scope_key('author', instance.pk),
+        *(versions.scope_key('group', pk) for pk in group_ids)
+    )
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    if created:
+        bump(Post, instance.post_id, 'comments_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    bump(Post, instance.post_id, 'comments_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comments(sender, instance, **kwargs):
+    # Область comments — числа комментариев в списках постов API.
+    versions.bump(
+        versions.scope_key('post', instance.post_id),
+        versions.scope_key('comments')
+    )
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, **kwargs):
+    if created:
+        bump_user(instance.user_id, 'following_count', 1)
+        bump_user(instance.author_id, 'followers_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    bump_user(instance.user_id, 'following_count', -1)
+    bump_user(instance.author_id, 'followers_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        jobs.enqueue(
+            'posts.backfill', instance.user_id, instance.author_id,
+            key=f'backfill:{instance.user_id}:{instance.author_id}'
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def trim_timeline(sender, instance, **kwargs):
+    timeline.trim(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follows(sender, instance, **kwargs):
+    versions.bump(
+        versions.scope_key('follow', instance.user_id),
+        versions.scope_key('followers', instance.author_id)
+    )
@@ -0,0 +1,130 @@
+"""Стеммер русского языка по алгоритму Snowball (Портер)."""
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    (
+        'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+        'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую',
+        'юю', 'ая', 'яя', 'ою', 'ею',
+    ),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+        'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+        'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+        'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = (
+    (),
+    (
+        'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+        'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+        'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+        'ья', 'я',
+    ),
+)
+SUPERLATIVE = ((), ('ейш', 'ейше'))
+DERIVATIONAL = ((), ('ост', 'ость'))
+
+CYRILLIC = re.compile('[а-я]')
+
+
+def _region(word, start=0):
+    """Начало области после первой пары «гласная, согласная»."""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _strip(word, endings):
+    """Отрезает самое длинное окончание из групп ``endings``.
+
+    Окончания первой группы отрезаются, только если перед ними стоит
+    «а» или «я». Возвращает None, если ничего не подошло.
+    """
+    preceded, plain = endings
+    for ending in sorted(preceded + plain, key=len, reverse=True):
+        if not word.endswith(ending):
+            continue
+        rest = word[:-len(ending)]
+        if ending in plain:
+            return rest
+        if rest.endswith(('а', 'я')):
+            return rest
+    return None
+
+
+def _adjectival(word):
+    stripped = _strip(word, ADJECTIVE)
+    if stripped is None:
+        return None
+    participle = _strip(stripped, PARTICIPLE)
+    return stripped if participle is None else participle
+
+
+def _step_endings(rv):
+    """Шаг 1: деепричастия, возвратность, прилагательные, глаголы и
+    существительные."""
+    stripped = _strip(rv, PERFECTIVE_GERUND)
+    if stripped is not None:
+        return stripped
+    reflexive = _strip(rv, REFLEXIVE)
+    if reflexive is not None:
+        rv = reflexive
+    for step in (_adjectival, lambda w: _strip(w, VERB),
+                 lambda w: _strip(w, NOUN)):
+        stripped = step(rv)
+        if stripped is not None:
+            return stripped
+    return rv
+
+
+def _step_tail(rv):
+    """Шаг 4: двойное «н», превосходная степень и мягкий знак."""
+    if rv.endswith('нн'):
+        return rv[:-1]
+    superlative = _strip(rv, SUPERLATIVE)
+    if superlative is not None:
+        return superlative[:-1] if superlative.endswith('нн') else superlative
+    if rv.endswith('ь'):
+        return rv[:-1]
+    return rv
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    if not CYRILLIC.search(word):
+        return word
+    rv_start = next(
+        (index + 1 for index, char in enumerate(word) if char in VOWELS),
+        len(word)
+    )
+    r2_start = _region(word, _region(word))
+    prefix, rv = word[:rv_start], word[rv_start:]
+
+    rv = _step_endings(rv)
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    r2 = max(r2_start - rv_start, 0)
+    derivational = _strip(rv[r2:], DERIVATIONAL)
+    if derivational is not None:
+        rv = rv[:r2] + derivational
+    return prefix + _step_tail(rv)
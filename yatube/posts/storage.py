@@ -0,0 +1,74 @@
+"""Хранилище картинок постов, адресуемое содержимым.
+
+Файл сохраняется под именем из SHA-256 своего содержимого:
+``posts/ab/ab…cd.webp``. Хэш считается на лету, пока файл пишется во
+временный, так что содержимое читается один раз. Если такой файл уже
+есть, временный просто удаляется: одинаковые картинки лежат на диске в
+одном экземпляре, а sorl-thumbnail, который строит имя миниатюры по
+имени исходника, находит для них одни и те же миниатюры.
+
+Сколько постов ссылается на файл, считает ``posts.blobs``. Ссылку на
+записанный файл хранилище берёт само, в одной транзакции с проверкой,
+есть ли файл на диске: иначе сборщик мог бы удалить файл, который
+только что решили переиспользовать.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # Имя всё равно заменится хэшем в _save.
+        return name
+
+    def _save(self, name, content):
+        directory = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        temp_dir = self.path(directory)
+        os.makedirs(temp_dir, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=temp_dir, suffix='.part'
+        )
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(descriptor, 'wb') as stream:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    stream.write(chunk)
+            hexdigest = digest.hexdigest()
+            name = posixpath.join(
+                directory, hexdigest[:2], hexdigest + extension
+            )
+            path = self.path(name)
+            # blobs импортирует это хранилище.
+            from . import blobs
+            with transaction.atomic():
+                # Пока строка MediaBlob заблокирована ссылкой, сборщик
+                # не удалит файл между проверкой и сохранением поста.
+                blobs.acquire(name)
+                if os.path.exists(path):
+                    os.remove(temp_path)
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.chmod(temp_path, self.file_permissions_mode or 0o644)
+                    # Одновременная загрузка того же файла заменит его
+                    # тем же содержимым.
+                    os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+
+
+image_storage = ContentAddressedStorage()
@@ -0,0 +1,114 @@
+"""Синтетические данные для нагрузочных замеров.
+
+Популярность авторов и постов распределена по закону Ципфа: немногие
+авторы пишут и собирают подписчиков больше всех, как на живом сайте.
+Записи идут через ``transfer.Importer``, то есть пачками
+``bulk_create``, а счётчики, поиск и ленты досчитываются один раз в
+конце.
+"""
+import datetime
+import itertools
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from .models import Comment, Post
+from .transfer import Importer, rebuild_derived
+
+# Показатель распределения Ципфа: чем больше, тем сильнее перекос.
+SKEW = 1.1
+PERIOD_DAYS = 365
+# Доля постов, опубликованных в группах.
+GROUP_SHARE = 0.7
+
+
+def zipf_weights(count, skew=SKEW):
+    """Накопленные веса для ``random.choices``: 1 / rank ** skew."""
+    return list(itertools.accumulate(
+        1 / rank ** skew for rank in range(1, count + 1)
+    ))
+
+
+def generate(users=100, groups=10, posts=1000, comments=2000,
+             follows=20, batch_size=2000, seed=None, progress=None):
+    """Создаёт данные и возвращает ``Importer`` со статистикой."""
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    importer = Importer(batch_size, progress=progress)
+    # Один хэш на всех: make_password на каждого занял бы минуты.
+    password = make_password('password')
+    run = fake.pystr(min_chars=6, max_chars=6).lower()
+
+    usernames = [f'{fake.user_name()}_{run}_{i}' for i in range(users)]
+    for username in usernames:
+        importer.add('user', {
+            'username': username,
+            'first_name': fake.first_name(),
+            'last_name': fake.last_name(),
+            'email': f'{username}@example.com',
+            'password': password,
+        })
+    slugs = [f'group-{run}-{i}' for i in range(groups)]
+    for slug in slugs:
+        importer.add('group', {
+            'title': fake.sentence(nb_words=3)[:200],
+            'slug': slug,
+            'description': fake.paragraph(),
+        })
+
+    authors = usernames[:]
+    rng.shuffle(authors)
+    author_weights = zipf_weights(len(authors))
+    now = timezone.now()
+    first_id = (Post.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+    post_ids = range(first_id, first_id + posts)
+    pub_dates = {}
+    for post_id in post_ids:
+        pub_dates[post_id] = now - datetime.timedelta(
+            seconds=rng.randint(0, PERIOD_DAYS * 24 * 60 * 60)
+        )
+        group = None
+        if slugs and rng.random() < GROUP_SHARE:
+            group = rng.choice(slugs)
+        importer.add('post', {
+            'id': post_id,
+            'text': fake.paragraph(nb_sentences=rng.randint(1, 8)),
+            'pub_date': pub_dates[post_id],
+            'author': rng.choices(authors, cum_weights=author_weights)[0],
+            'group': group,
+        })
+
+    if post_ids:
+        shuffled = list(post_ids)
+        rng.shuffle(shuffled)
+        post_weights = zipf_weights(len(shuffled))
+        first_comment = (
+            Comment.objects.aggregate(last=Max('id'))['last'] or 0
+        ) + 1
+        for comment_id in range(first_comment, first_comment + comments):
+            post_id = rng.choices(shuffled, cum_weights=post_weights)[0]
+            created = pub_dates[post_id] + datetime.timedelta(
+                seconds=rng.randint(0, 7 * 24 * 60 * 60)
+            )
+            importer.add('comment', {
+                'id': comment_id,
+                'post': post_id,
+                'author': rng.choice(usernames),
+                'text': fake.sentence(),
+                'created': min(created, now),
+            })
+
+    for username in usernames:
+        count = min(rng.randint(0, follows * 2), len(authors) - 1)
+        chosen = set(rng.choices(authors, cum_weights=author_weights,
+                                 k=count))
+        for author in chosen - {username}:
+            importer.add('follow', {'user': username, 'author': author})
+
+    importer.finish()
+    rebuild_derived(importer, batch_size)
+    return importer
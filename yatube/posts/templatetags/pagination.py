@@ -0,0 +1,12 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def page_window(page):
+    """Номера страниц для навигации; None — пропуск."""
+    paginator = page.paginator
+    if hasattr(paginator, 'page_window'):
+        return paginator.page_window(page.number)
+    return paginator.page_range
@@ -0,0 +1,28 @@
+from django import template
+
+from core import routers
+
+from .. import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_thumbnail(post, geometry):
+    """Готовая миниатюра картинки поста или None.
+
+    Если миниатюры ещё нет, пост ставится в очередь на её построение;
+    эта запись не переводит читателя на основную базу.
+    """
+    if not post.image:
+        return None
+    thumbnail = thumbnails.ready_thumbnail(post.image, geometry)
+    if thumbnail is None:
+        with routers.untracked():
+            thumbnails.schedule_missing(post.pk)
+    return thumbnail
+
+
+@register.simple_tag
+def thumbnail_srcset(post):
+    return thumbnails.srcset(post.image)
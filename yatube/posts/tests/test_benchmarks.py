@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from posts import benchmarks
+from posts.models import Comment, Follow, Group, Post, User, UserCounters
+
+
+class LoadDataTest(TestCase):
+    def test_generates_skewed_data(self):
+        """Генератор создаёт заданные объёмы с перекосом популярности."""
+
+        call_command(
+            'generate_load_data', users=20, groups=3, posts=200,
+            comments=100, follows=5, seed=1, stdout=StringIO()
+        )
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertTrue(Follow.objects.exists())
+        counts = sorted(
+            UserCounters.objects.values_list('posts_count', flat=True),
+            reverse=True
+        )
+        self.assertEqual(sum(counts), 200)
+        self.assertGreater(counts[0], 200 / 20 * 2)
+
+
+class BenchmarkTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'benchmarks.json')
+        call_command(
+            'generate_load_data', users=10, groups=2, posts=30,
+            comments=20, follows=3, seed=2, stdout=StringIO()
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_shared_caches_kept(self):
+        """Без clear_all замер очищает только кэш фрагментов."""
+
+        for alias in ('default', 'ratelimit'):
+            caches[alias].set('kept', 1)
+        benchmarks.run(repeats=1)
+        for alias in ('default', 'ratelimit'):
+            self.assertEqual(caches[alias].get('kept'), 1)
+        benchmarks.run(repeats=1, clear_all=True)
+        self.assertIsNone(caches['ratelimit'].get('kept'))
+
+    def test_measures_every_view(self):
+        """Замеры есть для каждой страницы, прогретый кэш экономит
+        запросы."""
+
+        results = benchmarks.run(repeats=1)
+        self.assertEqual(set(results), {
+            'index', 'index_deep', 'group_list', 'profile', 'post_detail',
+            'follow_index',
+        })
+        for result in results.values():
+            self.assertGreater(result['cold_queries'], 0)
+        self.assertLess(
+            results['index']['warm_queries'],
+            results['index']['cold_queries']
+        )
+
+    def test_regressions_against_baselines(self):
+        """Сохранённые замеры ловят рост числа запросов."""
+
+        call_command(
+            'benchmark_views', repeats=1, baselines=self.path, save=True,
+            stdout=StringIO()
+        )
+        baselines = benchmarks.load_baselines(self.path)
+        for view in baselines['views'].values():
+            view['warm_queries'] -= 1
+        with open(self.path, 'w', encoding='utf-8') as stream:
+            json.dump(baselines, stream)
+        with self.assertRaises(CommandError):
+            call_command(
+                'benchmark_views', repeats=1, baselines=self.path,
+                tolerance=100, stdout=StringIO()
+            )
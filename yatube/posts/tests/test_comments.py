@@ -0,0 +1,67 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Post, User
+
+
+@override_settings(POSTS_COMMENTS_FIRST_PAGE=3, POSTS_COMMENTS_PER_PAGE=4)
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.author, text='Текст')
+        for i in range(10):
+            Comment.objects.create(
+                post=cls.post,
+                author=User.objects.create_user(username=f'reader{i}'),
+                text=f'Комментарий {i}',
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_first_page_size(self):
+        """На странице поста только первые комментарии, новые сверху."""
+
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        texts = [comment.text for comment in response.context['comments']]
+        self.assertEqual(texts, ['Комментарий 9', 'Комментарий 8',
+                                 'Комментарий 7'])
+        self.assertContains(response, 'Показать ещё')
+
+    def test_load_more_walks_all_comments(self):
+        """Фрагменты «Показать ещё» отдают остальные комментарии без
+        повторов, каждый — за постоянное число запросов."""
+
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        seen = [comment.text for comment in response.context['comments']]
+        cursor = response.context['comments'].next_cursor
+        url = reverse('posts:post_comments', args=[self.post.pk])
+        url = f'{url}?cursor={cursor}'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.guest_client.get(url)
+            self.assertLessEqual(len(queries), 4)
+            seen += [comment.text for comment in response.context['comments']]
+            link = re.search(r'data-comments-fragment="([^"]+)"',
+                             response.content.decode())
+            url = link.group(1).replace('&amp;', '&') if link else None
+        self.assertEqual(
+            seen, [f'Комментарий {i}' for i in reversed(range(10))]
+        )
+
+    def test_missing_post(self):
+        response = self.guest_client.get(
+            reverse('posts:post_comments', args=[self.post.pk + 100])
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,121 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='Ivan')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Текст', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def revalidate(self, url):
+        etag = self.guest_client.get(url)['ETag']
+        return self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_are_not_modified(self):
+        """Неизменная страница отдаёт 304 за один маленький запрос."""
+
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                with self.assertNumQueries(1 if url != urls[0] else 0):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_validators(self):
+        """Пост, комментарий и подписка меняют ETag своих страниц."""
+
+        changes = {
+            reverse('posts:index'): lambda: Post.objects.create(
+                author=self.user, text='Новый пост'
+            ),
+            reverse('posts:post_detail', args=[self.post.pk]): (
+                lambda: Comment.objects.create(
+                    post=self.post, author=self.user, text='Комментарий'
+                )
+            ),
+            reverse('posts:profile', args=[self.author.username]): (
+                lambda: Follow.objects.create(
+                    user=self.user, author=self.author
+                )
+            ),
+            reverse('posts:group_list', args=[self.group.slug]):
+                lambda: Group.objects.filter(pk=self.group.pk).first().save(),
+        }
+        for url, change in changes.items():
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                change()
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_names_invalidate_pages_showing_them(self):
+        """Переименование группы или автора меняет ETag ленты, страницы
+        поста и страницы группы."""
+
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:group_list', args=[self.group.slug]),
+        )
+
+        def rename_group(name):
+            self.group.title = name
+            self.group.save()
+
+        def rename_author(name):
+            author = User.objects.get(pk=self.author.pk)
+            author.first_name = name
+            author.save()
+
+        for change in (rename_group, rename_author):
+            for number, url in enumerate(urls):
+                with self.subTest(change=change.__name__, url=url):
+                    etag = self.guest_client.get(url)['ETag']
+                    change(f'Имя {number}')
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                    self.assertEqual(response.status_code, 200)
+
+    def test_last_login_keeps_validators(self):
+        """Сохранение пользователя без смены имени не сбрасывает кэш."""
+
+        url = reverse('posts:index')
+        etag = self.guest_client.get(url)['ETag']
+        self.client.force_login(self.author)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_last_modified(self):
+        url = reverse('posts:index')
+        last_modified = self.guest_client.get(url)['Last-Modified']
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,110 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.counters import get_user_counters
+from posts.models import Group, Post, User, UserCounters
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='Ivan')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_post_counters_follow_writes(self):
+        """Создание, перенос и удаление поста меняют счётчики."""
+
+        self.authorized_client.post(
+            reverse('posts:create_post'),
+            data={'text': 'Новый пост', 'group': self.group.pk}
+        )
+        post = Post.objects.get()
+        self.assertEqual(get_user_counters(self.user).posts_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            data={'text': 'Новый пост', 'group': self.other_group.pk}
+        )
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        post.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
+
+        post.delete()
+        self.other_group.refresh_from_db()
+        self.assertEqual(get_user_counters(self.user).posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 0)
+
+    def test_comment_and_follow_counters(self):
+        """Комментарии и подписки учитываются в счётчиках."""
+
+        post = Post.objects.create(author=self.author, text='Текст')
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            data={'text': 'Комментарий'}
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+        follow_url = reverse(
+            'posts:profile_follow', kwargs={'username': self.author.username}
+        )
+        self.authorized_client.get(follow_url)
+        self.authorized_client.get(follow_url)
+        self.assertEqual(get_user_counters(self.user).following_count, 1)
+        self.assertEqual(get_user_counters(self.author).followers_count, 1)
+
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author.username}
+        ))
+        self.assertEqual(get_user_counters(self.user).following_count, 0)
+        self.assertEqual(get_user_counters(self.author).followers_count, 0)
+
+    def test_profile_reads_counters_by_primary_key(self):
+        """Профиль не считает посты автора через COUNT по таблице постов."""
+
+        Post.objects.create(author=self.author, text='Текст')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(
+                reverse(
+                    'posts:profile',
+                    kwargs={'username': self.author.username}
+                )
+            )
+        self.assertEqual(response.context['number'], 1)
+        for query in queries:
+            self.assertNotIn('COUNT(', query['sql'])
+
+    def test_rebuild_counters_command(self):
+        """Команда находит и исправляет рассинхронизацию счётчиков."""
+
+        for text in ('Первый пост', 'Второй пост'):
+            Post.objects.create(author=self.author, text=text)
+        UserCounters.objects.filter(pk=self.author.pk).update(posts_count=42)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_counters', '--check', stdout=StringIO())
+        call_command('rebuild_counters', stdout=StringIO())
+        call_command('rebuild_counters', '--check', stdout=StringIO())
+        self.assertEqual(get_user_counters(self.author).posts_count, 2)
@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Follow, Group, Post, User
+
+# Сессия, пользователь, объект страницы (группа/автор), COUNT и сами посты.
+FEED_QUERY_BUDGET = 6
+
+
+class FeedQueryBudgetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_posts(self, count):
+        start = User.objects.count()
+        for number in range(start, start + count):
+            author = User.objects.create_user(username=f'writer{number}')
+            Post.objects.create(author=author, text='Текст', group=self.group)
+            Post.objects.create(
+                author=self.author, text='Текст', group=self.group
+            )
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url)
+        return len(queries)
+
+    def test_feed_pages_fit_query_budget(self):
+        """Число запросов ленты не зависит от числа постов на странице."""
+
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:follow_index'),
+        )
+        self.create_posts(1)
+        few = {url: self.count_queries(url) for url in urls}
+        self.create_posts(9)
+        for url in urls:
+            with self.subTest(url=url):
+                many = self.count_queries(url)
+                self.assertEqual(few[url], many)
+                self.assertLessEqual(many, FEED_QUERY_BUDGET)
@@ -0,0 +1,140 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from posts import thumbnails
+from posts.forms import PostForm
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_animation(size=(3000, 1000), format_='GIF', frames=3, **params):
+    buffer = BytesIO()
+    images = [
+        Image.new('RGB', size, (shade, 30, 30))
+        for shade in range(0, 250, 250 // frames)[:frames]
+    ]
+    images[0].save(
+        buffer, format_, save_all=True, append_images=images[1:],
+        duration=50, loop=0, **params
+    )
+    return SimpleUploadedFile(
+        f'anim.{format_.lower()}', buffer.getvalue(),
+        f'image/{format_.lower()}'
+    )
+
+
+def make_image(size=(3000, 1000), format_='JPEG', **params):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, format_, **params)
+    return SimpleUploadedFile(
+        f'photo.{format_.lower()}', buffer.getvalue(),
+        f'image/{format_.lower()}'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_IMAGE_MAX_WIDTH=1200)
+class ImageUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def submit(self, upload):
+        return PostForm(data={'text': 'Текст'}, files={'image': upload})
+
+    def test_upload_is_resized_and_stripped(self):
+        """Картинка уменьшается, перекодируется и теряет EXIF."""
+
+        exif = Image.Exif()
+        exif[0x010F] = 'Камера'
+        form = self.submit(make_image(exif=exif.tobytes()))
+        self.assertTrue(form.is_valid(), form.errors)
+        image = form.cleaned_data['image']
+        self.assertTrue(image.name.endswith('.webp'))
+        saved = Image.open(image)
+        self.assertEqual(saved.format, 'WEBP')
+        self.assertEqual(saved.size, (1200, 400))
+        self.assertFalse(saved.getexif())
+
+    @override_settings(POSTS_IMAGE_MAX_PIXELS=1000)
+    def test_too_many_pixels(self):
+        form = self.submit(make_image((100, 100), 'PNG'))
+        self.assertFalse(form.is_valid())
+        self.assertIn('слишком велика', form.errors['image'][0])
+
+    @override_settings(POSTS_IMAGE_MAX_BYTES=100)
+    def test_too_large_file(self):
+        form = self.submit(make_image((100, 100), 'PNG'))
+        self.assertFalse(form.is_valid())
+        self.assertIn('Файл больше', form.errors['image'][0])
+
+    @override_settings(POSTS_IMAGE_MAX_BYTES=100)
+    def test_oversized_upload_not_stored(self):
+        """Файл сверх предела не принимается целиком: форма сообщает о
+        размере, пост не создаётся."""
+
+        client = Client()
+        client.force_login(self.user)
+        response = client.post(reverse('posts:create_post'), {
+            'text': 'Текст',
+            'image': make_image((300, 300), 'PNG'),
+        })
+        self.assertEqual(response.status_code, 200)
+        form = response.context['form']
+        self.assertIsNotNone(form.oversized_image)
+        self.assertIn('Файл больше', form.errors['image'][0])
+        self.assertFalse(Post.objects.exists())
+
+    def test_animation_is_resized_and_stripped(self):
+        """Кадры анимации уменьшаются, метаданные не сохраняются."""
+
+        exif = Image.Exif()
+        exif[0x010F] = 'Камера'
+        form = self.submit(make_animation(format_='WEBP', exif=exif))
+        self.assertTrue(form.is_valid(), form.errors)
+        saved = Image.open(form.cleaned_data['image'])
+        self.assertEqual(saved.format, 'WEBP')
+        self.assertEqual(saved.n_frames, 3)
+        self.assertEqual(saved.size, (1200, 400))
+        self.assertNotIn('exif', saved.info)
+
+    def test_gif_stays_animated(self):
+        form = self.submit(make_animation((600, 200)))
+        self.assertTrue(form.is_valid(), form.errors)
+        image = form.cleaned_data['image']
+        self.assertTrue(image.name.endswith('.gif'))
+        self.assertEqual(Image.open(image).n_frames, 3)
+
+    @override_settings(POSTS_IMAGE_MAX_PIXELS=100 * 100 * 2)
+    def test_too_many_frames(self):
+        form = self.submit(make_animation((100, 100)))
+        self.assertFalse(form.is_valid())
+        self.assertIn('Анимация из 3 кадров', form.errors['image'][0])
+
+    def test_feed_has_srcset(self):
+        """Лента ссылается на миниатюры всех ширин через srcset."""
+
+        cache.clear()
+        post = Post.objects.create(
+            author=self.user, text='Текст', image=make_image()
+        )
+        thumbnails.generate(post.pk)
+        response = Client().get(reverse('posts:index'))
+        for geometry in settings.POSTS_THUMBNAIL_SRCSET:
+            thumbnail = thumbnails.ready_thumbnail(post.image, geometry)
+            self.assertContains(
+                response, f'{thumbnail.url} {thumbnail.width}w'
+            )
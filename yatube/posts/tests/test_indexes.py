@@ -0,0 +1,62 @@
+import re
+
+from django.db import IntegrityError
+from django.test import TestCase
+from posts.feeds import feed_queryset
+from posts.models import Comment, Follow, Group, Post, User
+from posts.timeline import timeline_queryset
+
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?\w+$', re.MULTILINE)
+
+
+class IndexUsageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='Ivan')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Текст', group=cls.group
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertIsNone(FULL_SCAN.search(plan), plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_hot_queries_use_indexes(self):
+        """Запросы лент, комментариев и подписок читают индексы."""
+
+        queries = {
+            'index': feed_queryset(
+                Post.objects.all(), 'posts/index.html'
+            ).order_by('-pub_date', '-id'),
+            'group': feed_queryset(
+                self.group.posts.all(), 'posts/group_list.html'
+            ).order_by('pub_date', 'id'),
+            'profile': feed_queryset(
+                self.author.posts.all(), 'posts/profile.html'
+            ).order_by('pub_date', 'id'),
+            'follow': feed_queryset(
+                timeline_queryset(self.user), 'posts/follow.html'
+            ).order_by('-feed_date', '-feed_id'),
+            'comments': Comment.objects.filter(post=self.post),
+            'follow_lookup': Follow.objects.filter(
+                user=self.user, author=self.author
+            ),
+        }
+        for name, queryset in queries.items():
+            with self.subTest(query=name):
+                self.assertUsesIndex(queryset[:11])
+
+    def test_follow_is_unique(self):
+        """Повторная подписка запрещена на уровне базы данных."""
+
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=self.user, author=self.author)
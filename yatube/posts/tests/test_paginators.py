@@ -0,0 +1,146 @@
+from unittest import mock
+
+from core import jobs
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from posts import counts
+from posts.models import Group, Post, User
+from posts.paginators import (CursorPaginator, InvalidCursor, WindowPaginator,
+                              decode_cursor)
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Пост {i}')
+            for i in range(25)
+        )
+        # Одинаковая дата у всех постов проверяет разрешение по id.
+        Post.objects.update(pub_date=timezone.now())
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_pages_cover_feed_without_gaps(self):
+        """Переходы по курсорам вперёд обходят ленту без пропусков."""
+
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        page = paginator.page()
+        seen = [post.pk for post in page]
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            seen.extend(post.pk for post in page)
+        expected = list(
+            Post.objects.order_by('-pub_date', '-id')
+            .values_list('pk', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_previous_cursor_returns_same_page(self):
+        """Курсор назад возвращает предыдущую страницу целиком."""
+
+        paginator = CursorPaginator(Post.objects.all(), 10, 'pub_date')
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        back = paginator.page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_invalid_cursor(self):
+        """Битый курсор не роняет страницу, а ведёт на первую."""
+
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('не-курсор')
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        self.assertEqual(
+            list(paginator.get_page('мусор')), list(paginator.page())
+        )
+
+    def test_feed_views_accept_cursor(self):
+        """Ленты в курсорном режиме не выполняют COUNT(*)."""
+
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.guest_client.get(url + '?cursor=')
+                sql = ' '.join(query['sql'] for query in queries)
+                self.assertNotIn('COUNT(', sql)
+                self.assertNotIn('OFFSET', sql)
+                page_obj = response.context['page_obj']
+                self.assertTrue(page_obj.is_cursor)
+                self.assertEqual(len(page_obj), 10)
+                self.assertContains(response, page_obj.next_cursor)
+
+
+class WindowPaginatorTest(SimpleTestCase):
+    def test_page_window(self):
+        """Окно номеров: края, текущая страница с соседями и пропуски."""
+
+        paginator = WindowPaginator(range(1000), 10, count=1000)
+        self.assertEqual(paginator.page_window(1), [1, 2, 3, None, 100])
+        self.assertEqual(
+            paginator.page_window(50), [1, None, 48, 49, 50, 51, 52, None, 100]
+        )
+        self.assertEqual(paginator.page_window(99), [1, None, 97, 98, 99, 100])
+        self.assertEqual(
+            WindowPaginator(range(50), 10).page_window(3), [1, 2, 3, 4, 5]
+        )
+
+
+class FeedCountTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}') for i in range(300)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_feed_markup_and_count_are_constant(self):
+        """Ссылок на страницы немного, COUNT(*) выполняется один раз."""
+
+        url = reverse('posts:index') + '?page=15'
+        response = self.guest_client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 30)
+        self.assertEqual(response.content.decode().count('?page='), 10)
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(reverse('posts:index') + '?page=16')
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('COUNT(', sql)
+
+    def test_stale_count_is_refreshed_in_background(self):
+        """Устаревшее число отдаётся сразу, пересчёт уходит в фон."""
+
+        queryset = Post.objects.all()
+        self.assertEqual(counts.cached_count('feed', queryset, 'v1'), 300)
+        with mock.patch.object(jobs, 'is_inline', return_value=False), \
+                mock.patch.object(counts, '_get_executor') as executor:
+            with self.assertNumQueries(0):
+                self.assertEqual(
+                    counts.cached_count('feed', queryset, 'v2'), 300
+                )
+            counts.cached_count('feed', queryset, 'v2')
+        executor.return_value.submit.assert_called_once_with(
+            counts._run_in_thread, 'feed', queryset, 'v2'
+        )
@@ -0,0 +1,73 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts import search
+from posts.models import Post, SearchTerm, User
+from posts.stemmer import stem
+
+
+class StemmerTest(TestCase):
+    def test_russian_forms_share_stem(self):
+        """Словоформы сводятся к одной основе."""
+
+        for words in (
+            ('пост', 'посты', 'постов', 'поста'),
+            ('красивая', 'красивый', 'красивейший'),
+            ('подписка', 'подписки', 'подпиской'),
+        ):
+            with self.subTest(words=words):
+                self.assertEqual(len({stem(word) for word in words}), 1)
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.cats = Post.objects.create(
+            author=self.user, text='Коты любят спать. Кот спит весь день.'
+        )
+        self.dogs = Post.objects.create(
+            author=self.user, text='Собаки и коты гуляют вместе.'
+        )
+
+    def check_backend(self):
+        self.assertEqual(
+            search.search_ids('кот'), [self.cats.pk, self.dogs.pk]
+        )
+        self.assertEqual(search.search_ids('котами гуляли'), [self.dogs.pk])
+        self.assertEqual(search.search_ids('попугай'), [])
+
+        self.dogs.text = 'Собаки гуляют одни.'
+        self.dogs.save()
+        self.assertEqual(search.search_ids('кот'), [self.cats.pk])
+        self.cats.delete()
+        self.assertEqual(search.search_ids('кот'), [])
+
+    def test_default_backend(self):
+        """Поиск по основному индексу ранжирует и обновляется."""
+
+        self.check_backend()
+
+    @override_settings(POSTS_SEARCH_BACKEND='index')
+    def test_stored_index_backend(self):
+        """Запасной индекс на таблице SearchTerm работает так же."""
+
+        search.rebuild_index()
+        self.assertTrue(SearchTerm.objects.exists())
+        self.check_backend()
+
+    def test_search_view_and_api(self):
+        """Страница и API поиска отдают найденные посты."""
+
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'гулять'}
+        )
+        self.assertEqual(response.context['posts'], [self.dogs])
+        response = self.guest_client.get(
+            reverse('posts:search_api'), {'q': 'коты'}
+        )
+        ids = [post['id'] for post in response.json()['results']]
+        self.assertEqual(ids, [self.cats.pk, self.dogs.pk])
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from core import jobs
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from posts.models import MediaBlob, Post, User
+from posts.storage import image_storage
+from posts.transfer import Importer
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_gif(color):
+    buffer = BytesIO()
+    Image.new('RGB', (2, 1), color).save(buffer, 'GIF')
+    return buffer.getvalue()
+
+
+SMALL_GIF = make_gif((255, 255, 255))
+OTHER_GIF = make_gif((0, 0, 0))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, content=SMALL_GIF, name='small.gif'):
+        return Post.objects.create(
+            author=self.user,
+            text='Текст',
+            image=SimpleUploadedFile(name, content, 'image/gif'),
+        )
+
+    def references(self, name):
+        return MediaBlob.objects.get(name=name).references
+
+    def test_name_is_content_digest(self):
+        """Файл называется по SHA-256 содержимого, а не по имени клиента."""
+        post = self.create_post(name='Мем.GIF')
+        digest = hashlib.sha256(SMALL_GIF).hexdigest()
+        self.assertEqual(
+            post.image.name, f'posts/{digest[:2]}/{digest}.gif'
+        )
+        with post.image.open('rb') as stream:
+            self.assertEqual(stream.read(), SMALL_GIF)
+
+    def test_identical_uploads_share_file(self):
+        """Одинаковые картинки хранятся в одном файле с двумя ссылками."""
+        first = self.create_post(name='first.gif')
+        second = self.create_post(name='second.gif')
+        self.assertEqual(first.image.name, second.image.name)
+        directory = os.path.dirname(image_storage.path(first.image.name))
+        self.assertEqual(len(os.listdir(directory)), 1)
+        self.assertEqual(self.references(first.image.name), 2)
+
+    def test_file_deleted_with_last_reference(self):
+        first = self.create_post()
+        second = self.create_post()
+        name = first.image.name
+        first.delete()
+        self.assertTrue(image_storage.exists(name))
+        self.assertEqual(self.references(name), 1)
+        second.delete()
+        self.assertFalse(image_storage.exists(name))
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+
+    def test_replaced_image_released(self):
+        post = self.create_post()
+        old_name = post.image.name
+        post.image = SimpleUploadedFile('other.gif', OTHER_GIF, 'image/gif')
+        post.save()
+        self.assertNotEqual(post.image.name, old_name)
+        self.assertFalse(image_storage.exists(old_name))
+        self.assertEqual(self.references(post.image.name), 1)
+
+    def test_reused_file_survives_pending_collection(self):
+        """Файл, который загрузка переиспользовала до сохранения поста,
+        сборщик уже не удаляет."""
+
+        name = self.create_post().image.name
+        with mock.patch.object(jobs, 'is_inline', return_value=False):
+            Post.objects.get().delete()
+        self.assertEqual(self.references(name), 0)
+        # Хранилище записало тот же файл, пост ещё не сохранён.
+        self.assertEqual(
+            image_storage.save('posts/again.gif', ContentFile(SMALL_GIF)),
+            name
+        )
+        jobs.run_pending()
+        self.assertTrue(image_storage.exists(name))
+        self.assertEqual(self.references(name), 1)
+
+    def test_same_image_uploaded_again(self):
+        """Повторная загрузка той же картинки в пост не копит ссылки."""
+
+        post = self.create_post()
+        post.image = SimpleUploadedFile('again.gif', SMALL_GIF, 'image/gif')
+        post.save()
+        self.assertEqual(self.references(post.image.name), 1)
+        post.delete()
+        self.assertFalse(image_storage.exists(post.image.name))
+
+    def test_imported_post_holds_reference(self):
+        """Удаление импортированного поста с той же картинкой не
+        оставляет загруженный пост без файла."""
+
+        uploaded = self.create_post()
+        name = uploaded.image.name
+        importer = Importer()
+        importer.add('post', {
+            'id': uploaded.pk + 1,
+            'text': 'Импорт',
+            'pub_date': '2020-01-01T00:00:00+00:00',
+            'author': self.user.username,
+            'image': name,
+        })
+        importer.finish()
+        self.assertEqual(self.references(name), 2)
+        Post.objects.get(pk=uploaded.pk + 1).delete()
+        self.assertTrue(image_storage.exists(name))
+        self.assertEqual(self.references(name), 1)
@@ -0,0 +1,97 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts import thumbnails
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def create_post(self, name='small.gif'):
+        return Post.objects.create(
+            author=self.user,
+            text='Текст',
+            image=SimpleUploadedFile(name, SMALL_GIF, 'image/gif'),
+        )
+
+    def test_upload_schedules_generation(self):
+        """Новая картинка ставит пост в очередь, правка текста — нет."""
+
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            post = self.create_post()
+            schedule.assert_called_once_with(post.pk)
+            post.text = 'Новый текст'
+            post.save()
+            schedule.assert_called_once()
+
+    def test_page_shows_placeholder_until_ready(self):
+        """Пока миниатюры нет, страница не строит её, а ставит в очередь."""
+
+        with mock.patch.object(thumbnails, 'schedule'):
+            post = self.create_post()
+        with mock.patch.object(thumbnails, 'get_thumbnail') as build, \
+                mock.patch.object(thumbnails, 'schedule') as schedule:
+            response = self.client.get(reverse('posts:index'))
+        build.assert_not_called()
+        schedule.assert_called_once_with(post.pk)
+        self.assertContains(response, 'aspect-ratio')
+
+    def test_failed_generation_not_requeued(self):
+        """После сбоя построения страницы не ставят пост в очередь,
+        пока не истечёт POSTS_THUMBNAIL_RETRY_SECONDS."""
+
+        with mock.patch.object(thumbnails, 'schedule'):
+            post = self.create_post()
+        with mock.patch.object(
+            thumbnails, 'get_thumbnail', side_effect=OSError('сбой')
+        ), self.assertRaises(OSError):
+            thumbnails.generate(post.pk)
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            self.client.get(reverse('posts:index'))
+            schedule.assert_not_called()
+            # Метка истекла; кэш страницы тоже сброшен.
+            for alias in ('default', 'template_fragments'):
+                caches[alias].clear()
+            self.client.get(reverse('posts:index'))
+        schedule.assert_called_once_with(post.pk)
+
+    def test_generated_thumbnail_is_shown(self):
+        """После фоновой обработки страница показывает миниатюру."""
+
+        with mock.patch.object(thumbnails, 'schedule'):
+            post = self.create_post()
+        thumbnails.generate(post.pk)
+        thumbnail = thumbnails.ready_thumbnail(post.image, '960x339')
+        self.assertIsNotNone(thumbnail)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, thumbnail.url)
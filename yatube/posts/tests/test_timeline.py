@@ -0,0 +1,55 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Follow, Post, TimelineEntry, User
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='Ivan')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def follow(self):
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author.username}
+        ))
+
+    def feed(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в материализованную ленту подписчика."""
+
+        self.follow()
+        post = Post.objects.create(author=self.author, text='Текст')
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.assertEqual(self.feed(), [post])
+
+    def test_follow_backfills_and_unfollow_trims(self):
+        """Подписка переносит старые посты, отписка их убирает."""
+
+        post = Post.objects.create(author=self.author, text='Текст')
+        self.follow()
+        self.assertEqual(self.feed(), [post])
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author.username}
+        ))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user).exists())
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_is_read_on_request(self):
+        """Посты популярного автора подмешиваются при чтении ленты."""
+
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(author=self.author, text='Текст')
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(), [post])
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from posts.counters import get_user_counters
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+from posts.search import search_ids
+from posts.versions import get_version, scope_key
+
+
+class TransferTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.user = User.objects.create_user(username='auth')
+        self.author = User.objects.create_user(
+            username='Ivan', first_name='Иван'
+        )
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        self.posts = [
+            Post.objects.create(
+                author=self.author, text=f'Пост про котиков {i}',
+                group=self.group if i % 2 else None
+            )
+            for i in range(5)
+        ]
+        Comment.objects.create(
+            post=self.posts[0], author=self.user, text='Комментарий'
+        )
+        Follow.objects.create(user=self.user, author=self.author)
+        self.dates = dict(Post.objects.values_list('pk', 'pub_date'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def wipe(self):
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+    def assertRestored(self):
+        self.assertEqual(
+            dict(Post.objects.values_list('pk', 'pub_date')), self.dates
+        )
+        author = User.objects.get(username='Ivan')
+        self.assertEqual(author.first_name, 'Иван')
+        self.assertEqual(
+            Post.objects.filter(group__slug='test-slug').count(), 2
+        )
+        self.assertEqual(Comment.objects.get().author.username, 'auth')
+        self.assertEqual(get_user_counters(author).followers_count, 1)
+        self.assertEqual(
+            Post.objects.get(pk=self.posts[0].pk).comments_count, 1
+        )
+        self.assertEqual(len(search_ids('котиков')), 5)
+        self.assertEqual(TimelineEntry.objects.count(), 5)
+
+    def test_ndjson_round_trip(self):
+        """Выгрузка в NDJSON загружается обратно без потерь."""
+
+        path = os.path.join(self.directory, 'dump.ndjson')
+        call_command('export_yatube', path, stderr=StringIO())
+        self.wipe()
+        call_command(
+            'import_yatube', path, batch_size=2, stdout=StringIO()
+        )
+        self.assertRestored()
+
+    def test_csv_round_trip(self):
+        call_command(
+            'export_yatube', self.directory, format='csv', stderr=StringIO()
+        )
+        self.wipe()
+        call_command('import_yatube', self.directory, stdout=StringIO())
+        self.assertRestored()
+
+    def test_import_skips_existing_rows(self):
+        """Повторная загрузка не дублирует строки."""
+
+        path = os.path.join(self.directory, 'dump.ndjson')
+        call_command('export_yatube', path, stderr=StringIO())
+        stdout = StringIO()
+        call_command('import_yatube', path, stdout=stdout)
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(Follow.objects.count(), 1)
+        # В отчёте вставленные строки, а не попытки вставки.
+        self.assertIn('post: 0 ', stdout.getvalue())
+        self.assertIn('пропущено 5', stdout.getvalue())
+
+    def test_import_bumps_scopes_instead_of_clearing_cache(self):
+        """После загрузки меняются поколения затронутых областей, а
+        прочие ключи кэша остаются."""
+
+        path = os.path.join(self.directory, 'dump.ndjson')
+        call_command('export_yatube', path, stderr=StringIO())
+        self.wipe()
+        cache.set('unrelated', 1)
+        feed = get_version(scope_key('feed'))
+        other_group = get_version(scope_key('group', 0))
+        call_command('import_yatube', path, stdout=StringIO())
+        self.assertEqual(cache.get('unrelated'), 1)
+        self.assertNotEqual(get_version(scope_key('feed')), feed)
+        self.assertEqual(get_version(scope_key('group', 0)), other_group)
+        self.assertRestored()
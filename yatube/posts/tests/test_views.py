@@ -352,7 +352,8 @@ class TestComment(TestCase):
 
         response = self.authorized_client.get(reverse('posts:index'))
         cache_check = response.content
-        Post.objects.get(pk=self.post.pk)
+        # update() не отправляет сигналы, поколение кэша не меняется.
+        Post.objects.filter(pk=self.post.pk).update(text='Изменённый текст')
         response_old = self.authorized_client.get(reverse('posts:index'))
         cache_old_check = response_old.content
         self.assertEqual(
@@ -369,6 +370,37 @@ class TestComment(TestCase):
             'Нет сброса кэша'
         )
 
+    def test_new_post_invalidates_cached_pages(self):
+        """Новый пост сразу виден на закэшированных лентах"""
+
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+        )
+        for url in urls:
+            self.authorized_client.get(url)
+        Post.objects.create(
+            text='Свежий пост',
+            author=self.user,
+            group=self.group
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertContains(response, 'Свежий пост')
+
+    def test_new_comment_invalidates_cached_post(self):
+        """Новый комментарий сразу виден на странице поста"""
+
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        self.guest_client.get(url)
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            data={'text': 'Свежий комментарий'}
+        )
+        self.assertContains(self.guest_client.get(url), 'Свежий комментарий')
+
 
 class FinalTest(TestCase):
     @classmethod
@@ -0,0 +1,107 @@
+"""Подготовка миниатюр картинок постов вне запроса.
+
+После сохранения поста с новой картинкой миниатюры всех размеров из
+``POSTS_THUMBNAILS`` строит фоновая задача ``posts.thumbnails``.
+Шаблоны только читают готовую миниатюру из хранилища sorl-thumbnail и,
+пока её нет, показывают заглушку, так что Pillow никогда не работает в
+запросе. Пост без готовой миниатюры шаблон ставит в очередь сам, но
+после сбоя построения — не раньше, чем через
+``POSTS_THUMBNAIL_RETRY_SECONDS``.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from core import jobs
+
+from . import versions
+from .models import Post
+
+
+class ReadyThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, который только ищет готовые миниатюры."""
+
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        """Как ``get_thumbnail``, но без построения: None, если не готова.
+
+        Опции дополняются так же, как в sorl-thumbnail, чтобы имя
+        миниатюры совпало с построенной в фоне.
+        """
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+backend = ReadyThumbnailBackend()
+
+
+def ready_thumbnail(image, geometry):
+    if not image:
+        return None
+    options = dict(settings.POSTS_THUMBNAILS.get(geometry, {}))
+    return backend.get_ready_thumbnail(image, geometry, **options)
+
+
+def srcset(image):
+    """Значение атрибута srcset из готовых миниатюр
+    ``POSTS_THUMBNAIL_SRCSET``."""
+    candidates = []
+    widths = set()
+    for geometry in settings.POSTS_THUMBNAIL_SRCSET:
+        thumbnail = ready_thumbnail(image, geometry)
+        # Без upscale маленькая картинка даёт одинаковые миниатюры.
+        if thumbnail is None or thumbnail.width in widths:
+            continue
+        widths.add(thumbnail.width)
+        candidates.append(f'{thumbnail.url} {thumbnail.width}w')
+    return ', '.join(candidates)
+
+
+@jobs.task('posts.thumbnails')
+def generate(post_id):
+    """Строит все миниатюры поста и сбрасывает кэш его страниц."""
+    post = (
+        Post.objects.filter(pk=post_id)
+        .only('id', 'image', 'author', 'group')
+        .first()
+    )
+    if post is None or not post.image:
+        return
+    try:
+        for geometry, options in settings.POSTS_THUMBNAILS.items():
+            get_thumbnail(post.image, geometry, **options)
+    except Exception:
+        cache.set(
+            _failed_key(post_id), 1, settings.POSTS_THUMBNAIL_RETRY_SECONDS
+        )
+        raise
+    # Закэшированные фрагменты с заглушкой больше не нужны.
+    versions.bump(*versions.post_scopes(post))
+
+
+def _failed_key(post_id):
+    return f'thumbnails:failed:{post_id}'
+
+
+def schedule(post_id):
+    """Ставит пост в очередь на построение миниатюр."""
+    jobs.enqueue('posts.thumbnails', post_id, key=f'thumbnails:{post_id}')
+
+
+def schedule_missing(post_id):
+    """Как ``schedule``, но не повторяет недавно упавшее построение:
+    иначе каждый показ поста ставил бы новую обречённую задачу."""
+    if cache.get(_failed_key(post_id)) is None:
+        schedule(post_id)
@@ -0,0 +1,118 @@
+"""Материализованная лента подписок.
+
+Пост при публикации раскладывается в ленты подписчиков автора
+(fan-out on write). Для авторов, у которых подписчиков больше
+``TIMELINE_FANOUT_LIMIT``, раскладка не делается: их посты
+подмешиваются в ленту при чтении (fan-out on read).
+
+Раскладка и перенос постов при подписке выполняются фоновыми задачами
+``posts.fan_out`` и ``posts.backfill``.
+"""
+from django.conf import settings
+from django.db.models import F, Q
+
+from core import jobs
+
+from . import versions
+from .models import Follow, Post, TimelineEntry, UserCounters
+
+BATCH_SIZE = 1000
+
+
+def is_fan_out_on_read(author_id):
+    return UserCounters.objects.filter(
+        pk=author_id,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).exists()
+
+
+def fan_out_post(post):
+    """Добавляет пост в ленты всех подписчиков автора."""
+    if is_fan_out_on_read(post.author_id):
+        return
+    followers = Follow.objects.filter(author_id=post.author_id).values_list(
+        'user_id', flat=True
+    )
+    batch = []
+    for user_id in followers.iterator():
+        batch.append(TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def backfill(user_id, author_id):
+    """Переносит в ленту свежие посты автора, на которого подписались."""
+    if is_fan_out_on_read(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date'
+    ).values_list('pk', 'pub_date')[:settings.TIMELINE_BACKFILL]
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                post_id=pk,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for pk, pub_date in posts
+        ),
+        ignore_conflicts=True
+    )
+
+
+@jobs.task('posts.fan_out')
+def fan_out(post_id):
+    post = (
+        Post.objects.filter(pk=post_id)
+        .only('id', 'author', 'pub_date').first()
+    )
+    if post is None:
+        return
+    fan_out_post(post)
+    # Ленты подписок закэшированы и без этого поста.
+    versions.bump(versions.scope_key('timeline'))
+
+
+@jobs.task('posts.backfill')
+def backfill_follow(user_id, author_id):
+    # Пока задача ждала, читатель мог отписаться.
+    follows = Follow.objects.filter(user_id=user_id, author_id=author_id)
+    if not follows.exists():
+        return
+    backfill(user_id, author_id)
+    versions.bump(versions.scope_key('follow', user_id))
+
+
+def trim(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def timeline_queryset(user):
+    """Посты ленты подписок пользователя.
+
+    Сортировать ленту следует по аннотациям ``feed_date`` и ``feed_id``:
+    без популярных авторов это чтение диапазона индекса (user, pub_date)
+    записей ленты без дополнительной сортировки.
+    """
+    pulled = Follow.objects.filter(
+        user=user,
+        author__counters__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).values('author')
+    if not pulled.exists():
+        return Post.objects.filter(timeline_entries__user=user).annotate(
+            feed_date=F('timeline_entries__pub_date'),
+            feed_id=F('timeline_entries__id'),
+        )
+    return Post.objects.filter(
+        Q(pk__in=TimelineEntry.objects.filter(user=user).values('post'))
+        | Q(author__in=pulled)
+    ).annotate(feed_date=F('pub_date'), feed_id=F('id'))
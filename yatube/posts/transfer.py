@@ -0,0 +1,366 @@
+"""Потоковые выгрузка и загрузка данных yatube.
+
+Записи идут в порядке зависимостей: пользователи, группы, посты,
+комментарии, подписки. Выгрузка читает таблицы через ``.values()``
+итератором, загрузка копит записи пачками и пишет их ``bulk_create``
+в отдельных транзакциях. Авторы и группы ссылаются по ``username`` и
+``slug``; соответствие имени и id держится в памяти и дополняется
+запросами к базе по мере надобности. Посты и комментарии сохраняют
+свои id, чтобы комментарии находили посты без отдельной карты.
+"""
+import time
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.db import connections, router, transaction
+from django.utils.dateparse import parse_datetime
+
+from . import blobs, search, timeline, versions
+from .counters import (rebuild_group_counters, rebuild_post_counters,
+                       rebuild_user_counters)
+from .models import Comment, Follow, Group, Post, User
+
+# Тип записи -> (модель, колонки .values(), имена полей в записи).
+FORMATS = {
+    'user': (User, (
+        ('username', 'username'),
+        ('first_name', 'first_name'),
+        ('last_name', 'last_name'),
+        ('email', 'email'),
+        ('password', 'password'),
+        ('date_joined', 'date_joined'),
+    )),
+    'group': (Group, (
+        ('title', 'title'),
+        ('slug', 'slug'),
+        ('description', 'description'),
+    )),
+    'post': (Post, (
+        ('id', 'id'),
+        ('text', 'text'),
+        ('pub_date', 'pub_date'),
+        ('author__username', 'author'),
+        ('group__slug', 'group'),
+        ('image', 'image'),
+    )),
+    'comment': (Comment, (
+        ('id', 'id'),
+        ('post_id', 'post'),
+        ('author__username', 'author'),
+        ('text', 'text'),
+        ('created', 'created'),
+    )),
+    'follow': (Follow, (
+        ('user__username', 'user'),
+        ('author__username', 'author'),
+    )),
+}
+TYPES = tuple(FORMATS)
+
+# Предел числа параметров в одном запросе SQLite.
+LOOKUP_CHUNK = 900
+# Типы с датой auto_now_add, которую нужно взять из выгрузки.
+DATED = ('post', 'comment')
+# Поля, по которым запись уже может быть в базе.
+UNIQUE = {
+    'user': ('username',),
+    'group': ('slug',),
+    'post': ('id',),
+    'comment': ('id',),
+    'follow': ('user_id', 'author_id'),
+}
+
+
+def columns(record_type):
+    return [name for _, name in FORMATS[record_type][1]]
+
+
+def export_records(types=TYPES, batch_size=1000):
+    """Выдаёт пары (тип, запись) для всех строк выбранных таблиц."""
+    for record_type in TYPES:
+        if record_type not in types:
+            continue
+        model, fields = FORMATS[record_type]
+        rows = model.objects.order_by('pk').values_list(
+            *(lookup for lookup, _ in fields)
+        )
+        names = [name for _, name in fields]
+        for row in rows.iterator(chunk_size=batch_size):
+            yield record_type, dict(zip(names, row))
+
+
+def _chunks(items, size=LOOKUP_CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _date(value):
+    if not value or not isinstance(value, str):
+        return value
+    return parse_datetime(value)
+
+
+def _insert_raw(model, objects):
+    """Вставляет объекты как есть, пропуская конфликты.
+
+    ``bulk_create`` вызывает ``pre_save`` полей, и ``auto_now_add``
+    заменил бы даты из выгрузки текущим временем. Сырая вставка, как в
+    ``loaddata``, берёт значения атрибутов без изменений; id объектов
+    уже заданы.
+    """
+    using = router.db_for_write(model)
+    fields = model._meta.concrete_fields
+    size = max(connections[using].ops.bulk_batch_size(fields, objects), 1)
+    queryset = model.objects.using(using)
+    for start in range(0, len(objects), size):
+        queryset._insert(
+            objects[start:start + size], fields=fields, raw=True,
+            using=using, ignore_conflicts=True
+        )
+
+
+class Importer:
+    """Загружает записи пачками по ``batch_size``.
+
+    ``add`` принимает записи в любом порядке типов: перед записью пачки
+    сбрасываются пачки всех типов, от которых она зависит. ``counts``
+    считает вставленные строки, ``skipped`` — записи с неизвестными
+    ссылками и строки, которые уже были в базе.
+    """
+
+    def __init__(self, batch_size=1000, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.buffers = {record_type: [] for record_type in TYPES}
+        self.counts = dict.fromkeys(TYPES, 0)
+        self.skipped = dict.fromkeys(TYPES, 0)
+        self.seconds = dict.fromkeys(TYPES, 0.0)
+        self.users = {}
+        self.groups = {}
+        # Что пересчитать после загрузки: авторы, чьим подписчикам
+        # нужны ленты, и строки со счётчиками и поисковым индексом.
+        self.touched_authors = set()
+        self.touched_users = set()
+        self.touched_groups = set()
+        self.touched_posts = set()
+        self.imported_posts = set()
+
+    def add(self, record_type, record):
+        if record_type not in self.buffers:
+            raise ValueError(f'Неизвестный тип записи: {record_type}')
+        buffer = self.buffers[record_type]
+        buffer.append(record)
+        if len(buffer) >= self.batch_size:
+            self.flush(record_type)
+
+    def flush(self, record_type):
+        for dependency in TYPES[:TYPES.index(record_type)]:
+            if self.buffers[dependency]:
+                self.flush(dependency)
+        records = self.buffers[record_type]
+        if not records:
+            return
+        self.buffers[record_type] = []
+        started = time.monotonic()
+        build = getattr(self, f'_build_{record_type}')
+        model = FORMATS[record_type][0]
+        objects = self._new(model, UNIQUE[record_type], build(records))
+        self._touch(record_type, objects)
+        with transaction.atomic():
+            if record_type in DATED:
+                _insert_raw(model, objects)
+                if record_type == 'post':
+                    self._acquire_images(objects)
+            else:
+                model.objects.bulk_create(objects, ignore_conflicts=True)
+        self.seconds[record_type] += time.monotonic() - started
+        self.counts[record_type] += len(objects)
+        self.skipped[record_type] += len(records) - len(objects)
+        if self.progress:
+            self.progress(record_type, self.counts[record_type])
+
+    def finish(self):
+        for record_type in TYPES:
+            self.flush(record_type)
+
+    def _new(self, model, fields, objects):
+        """Отбрасывает объекты, которые уже есть в базе или повторяются
+        в пачке."""
+        def key(obj):
+            return tuple(getattr(obj, field) for field in fields)
+
+        seen = set()
+        first = fields[0]
+        for chunk in _chunks({getattr(obj, first) for obj in objects}):
+            seen.update(
+                model.objects.filter(**{f'{first}__in': chunk})
+                .values_list(*fields)
+            )
+        new = []
+        for obj in objects:
+            if key(obj) not in seen:
+                seen.add(key(obj))
+                new.append(obj)
+        return new
+
+    def _acquire_images(self, posts):
+        # Сигналы не сработали: ссылки на файлы берутся здесь, иначе
+        # удаление такого поста сняло бы чужую ссылку.
+        names = Counter(post.image.name for post in posts if post.image)
+        for name, count in names.items():
+            blobs.acquire(name, count)
+
+    def _touch(self, record_type, objects):
+        """Запоминает, что пересчитать после загрузки."""
+        if record_type == 'post':
+            for post in objects:
+                self.imported_posts.add(post.pk)
+                self.touched_authors.add(post.author_id)
+                self.touched_users.add(post.author_id)
+                if post.group_id is not None:
+                    self.touched_groups.add(post.group_id)
+        elif record_type == 'comment':
+            self.touched_posts.update(comment.post_id for comment in objects)
+        elif record_type == 'follow':
+            for follow in objects:
+                self.touched_authors.add(follow.author_id)
+                self.touched_users.update((follow.user_id, follow.author_id))
+
+    # Соответствие имён и id.
+
+    def _resolve(self, mapping, model, field, keys):
+        missing = {key for key in keys if key and key not in mapping}
+        for chunk in _chunks(missing):
+            mapping.update(
+                model.objects.filter(**{f'{field}__in': chunk})
+                .values_list(field, 'pk')
+            )
+        return mapping
+
+    def _user_ids(self, records, *fields):
+        names = {record[field] for record in records for field in fields}
+        return self._resolve(self.users, User, 'username', names)
+
+    # Построение объектов; записи с неизвестными ссылками пропускаются.
+
+    def _build_user(self, records):
+        return [
+            User(
+                username=record['username'],
+                first_name=record.get('first_name') or '',
+                last_name=record.get('last_name') or '',
+                email=record.get('email') or '',
+                password=record.get('password') or make_password(None),
+                **(
+                    {'date_joined': _date(record['date_joined'])}
+                    if record.get('date_joined') else {}
+                )
+            )
+            for record in records
+        ]
+
+    def _build_group(self, records):
+        return [
+            Group(
+                title=record['title'],
+                slug=record['slug'],
+                description=record.get('description') or '',
+            )
+            for record in records
+        ]
+
+    def _build_post(self, records):
+        users = self._user_ids(records, 'author')
+        groups = self._resolve(
+            self.groups, Group, 'slug',
+            {record.get('group') for record in records}
+        )
+        posts = []
+        for record in records:
+            author_id = users.get(record['author'])
+            if author_id is None:
+                continue
+            posts.append(Post(
+                id=int(record['id']),
+                text=record['text'],
+                pub_date=_date(record['pub_date']),
+                author_id=author_id,
+                group_id=groups.get(record.get('group')),
+                image=record.get('image') or '',
+            ))
+        return posts
+
+    def _build_comment(self, records):
+        users = self._user_ids(records, 'author')
+        post_ids = set()
+        for chunk in _chunks({int(record['post']) for record in records}):
+            post_ids.update(
+                Post.objects.filter(pk__in=chunk).values_list('pk', flat=True)
+            )
+        return [
+            Comment(
+                id=int(record['id']),
+                post_id=int(record['post']),
+                author_id=users[record['author']],
+                text=record['text'],
+                created=_date(record['created']),
+            )
+            for record in records
+            if int(record['post']) in post_ids and record['author'] in users
+        ]
+
+    def _build_follow(self, records):
+        users = self._user_ids(records, 'user', 'author')
+        follows = []
+        for record in records:
+            user_id = users.get(record['user'])
+            author_id = users.get(record['author'])
+            if user_id is None or author_id is None or user_id == author_id:
+                continue
+            follows.append(Follow(user_id=user_id, author_id=author_id))
+        return follows
+
+
+def rebuild_derived(importer, batch_size=1000):
+    """Досчитывает то, что bulk_create обошёл без сигналов.
+
+    Пересчитываются только строки, которые задела загрузка: счётчики
+    групп, постов и пользователей, поисковый индекс новых постов, ленты
+    подписчиков затронутых авторов. Их области кэша получают новые
+    поколения, остальной кэш не трогается.
+    """
+    for chunk in _chunks(importer.touched_groups):
+        rebuild_group_counters(pks=chunk)
+    for chunk in _chunks(importer.touched_posts):
+        rebuild_post_counters(pks=chunk)
+    for chunk in _chunks(importer.touched_users):
+        rebuild_user_counters(pks=chunk)
+    for chunk in _chunks(importer.imported_posts):
+        for post in Post.objects.filter(pk__in=chunk).only('pk', 'text'):
+            search.index_post(post)
+    followers = set()
+    for chunk in _chunks(importer.touched_authors):
+        follows = Follow.objects.filter(author_id__in=chunk).values_list(
+            'user_id', 'author_id'
+        )
+        for user_id, author_id in follows.iterator(chunk_size=batch_size):
+            timeline.backfill(user_id, author_id)
+            followers.add(user_id)
+    keys = [
+        versions.scope_key('feed'),
+        versions.scope_key('groups'),
+        versions.scope_key('timeline'),
+    ]
+    keys.extend(
+        versions.scope_key('group', pk) for pk in importer.touched_groups
+    )
+    keys.extend(
+        versions.scope_key('post', pk) for pk in importer.touched_posts
+    )
+    for pk in importer.touched_users:
+        keys.append(versions.scope_key('author', pk))
+        keys.append(versions.scope_key('followers', pk))
+    keys.extend(versions.scope_key('follow', pk) for pk in followers)
+    for chunk in _chunks(keys):
+        versions.bump(*chunk)
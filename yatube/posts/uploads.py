@@ -0,0 +1,41 @@
+"""Приём загружаемых картинок с пределом размера.
+
+Обработчик стоит первым в ``FILE_UPLOAD_HANDLERS`` и считает байты
+каждого файла. Как только файл превысил ``POSTS_IMAGE_MAX_BYTES``, его
+части перестают доходить до обработчиков, которые пишут в память и во
+временный файл, а вместо файла форма получает ``OversizedUpload`` с
+именем и размером. ``PostForm`` превращает его в обычную ошибку
+размера, не открывая картинку.
+"""
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class OversizedUpload(UploadedFile):
+    """Файл, принятый не целиком: известны только имя и размер."""
+
+    def __init__(self, name, content_type, size):
+        super().__init__(BytesIO(), name, content_type, size)
+
+
+class ImageSizeLimitHandler(FileUploadHandler):
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.POSTS_IMAGE_MAX_BYTES:
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.received > settings.POSTS_IMAGE_MAX_BYTES:
+            return OversizedUpload(
+                self.file_name, self.content_type, self.received
+            )
+        return None
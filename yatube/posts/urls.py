@@ -10,6 +10,16 @@ urlpatterns = [
         views.index,
         name='index'
     ),
+    path(
+        'search/',
+        views.search,
+        name='search'
+    ),
+    path(
+        'search/api/',
+        views.search_api,
+        name='search_api'
+    ),
     path(
         'create/',
         views.post_create,
@@ -30,6 +40,11 @@ urlpatterns = [
         views.post_detail,
         name='post_detail'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path(
         'posts/<int:post_id>/edit/',
         views.post_edit,
@@ -0,0 +1,71 @@
+import hashlib
+from calendar import timegm
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from . import versions
+from .paginators import CursorPaginator, WindowPaginator
+
+
+def paginate(request, queryset, per_page, ordering='-pub_date',
+             tiebreaker='id', count=None):
+    """Разбивает ленту на страницы.
+
+    Курсорный режим включается параметром ``?cursor=`` в запросе или
+    настройкой ``POSTS_CURSOR_PAGINATION``; иначе используется
+    ``WindowPaginator`` с номерами страниц и числом записей ``count``.
+    """
+    if 'cursor' in request.GET or settings.POSTS_CURSOR_PAGINATION:
+        paginator = CursorPaginator(
+            queryset, per_page, ordering, tiebreaker
+        )
+        return paginator.get_page(request.GET.get('cursor'))
+    if ordering.startswith('-'):
+        tiebreaker = f'-{tiebreaker}'
+    paginator = WindowPaginator(
+        queryset.order_by(ordering, tiebreaker), per_page, count=count,
+        on_each_side=settings.POSTS_PAGE_WINDOW
+    )
+    return paginator.get_page(request.GET.get('page'))
+
+
+def conditional(scopes):
+    """Отвечает 304 Not Modified, пока области страницы не менялись.
+
+    ``scopes(request, *args, **kwargs)`` возвращает ключи поколений из
+    ``versions``. ETag строится из их номеров, адреса и пользователя,
+    Last-Modified — из времени последнего изменения областей. Оба
+    значения читаются из кэша до запросов к базе.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            keys = scopes(request, *args, **kwargs)
+            raw = '|'.join((
+                versions.get_version(*keys),
+                request.get_full_path(),
+                str(request.user.pk),
+                # Страницы с формами содержат CSRF-токен.
+                request.META.get('CSRF_COOKIE', ''),
+            ))
+            etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+            last_modified = timegm(
+                versions.last_modified(*keys).utctimetuple()
+            )
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is not None:
+                return response
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                response.setdefault('ETag', etag)
+                response.setdefault('Last-Modified', http_date(last_modified))
+            return response
+        return wrapper
+    return decorator
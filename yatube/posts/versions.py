@@ -0,0 +1,80 @@
+"""Счётчики поколений для ключей фрагментного кэша.
+
+Каждая область (вся лента, группа, автор, пост, подписки читателя)
+хранит номер поколения. Номер входит в ключ фрагмента, поэтому запись
+просто увеличивает его, и старые фрагменты больше не читаются, а
+истекают сами по длинному TTL.
+"""
+import datetime
+import time
+
+from django.core.cache import cache
+
+PREFIX = 'version'
+
+
+def scope_key(scope, pk=None):
+    if pk is None:
+        return f'{PREFIX}:{scope}'
+    return f'{PREFIX}:{scope}:{pk}'
+
+
+def _initial():
+    # Миллисекунды не повторяют номера, вытесненные из кэша.
+    return int(time.time() * 1000)
+
+
+def get_version(*keys):
+    """Строка поколений для набора областей, пригодная для ключа кэша."""
+    versions = cache.get_many(keys)
+    missing = {key: _initial() for key in keys if key not in versions}
+    if missing:
+        for key, value in missing.items():
+            cache.add(key, value, None)
+        versions.update(cache.get_many(missing))
+    return '.'.join(str(versions.get(key, 0)) for key in keys)
+
+
+def _modified_key(key):
+    return f'{key}:modified'
+
+
+def last_modified(*keys):
+    """Время последнего изменения любой из областей (UTC).
+
+    Область, о которой кэш ничего не знает, считается изменённой
+    сейчас.
+    """
+    modified_keys = [_modified_key(key) for key in keys]
+    found = cache.get_many(modified_keys)
+    now = time.time()
+    for key in modified_keys:
+        if key not in found:
+            cache.add(key, now, None)
+            found[key] = now
+    return datetime.datetime.fromtimestamp(
+        max(found.values()), datetime.timezone.utc
+    )
+
+
+def bump(*keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial(), None)
+    now = time.time()
+    cache.set_many({_modified_key(key): now for key in keys}, None)
+
+
+def post_scopes(post, *group_ids):
+    """Области всех страниц, на которых показан пост."""
+    keys = [
+        scope_key('feed'),
+        scope_key('author', post.author_id),
+        scope_key('post', post.pk),
+    ]
+    for group_id in {post.group_id, *group_ids}:
+        if group_id is not None:
+            keys.append(scope_key('group', group_id))
+    return keys
@@ -1,68 +1,195 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.functional import SimpleLazyObject
 
+from core.ratelimit import ratelimit
+from core.streaming import stream_response
+
+from .counters import get_user_counters
+from .counts import cached_count
+from .feeds import feed_queryset
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Comment, Follow, Group, Post, User
+from .paginators import CursorPaginator, InvalidCursor, decode_cursor
+from .search import search_posts
+from .timeline import timeline_queryset
+from .utils import conditional, paginate
+from .versions import get_version, scope_key
 
 COUNT_POSTS = 10
 
 
+def _group_scopes(request, slug):
+    scopes = [scope_key('groups')]
+    group_id = (
+        Group.objects.filter(slug=slug).values_list('pk', flat=True).first()
+    )
+    if group_id is not None:
+        scopes.append(scope_key('group', group_id))
+    return scopes
+
+
+def _profile_scopes(request, username):
+    scopes = []
+    if request.user.is_authenticated:
+        scopes.append(scope_key('follow', request.user.pk))
+    author_id = (
+        User.objects.filter(username=username)
+        .values_list('pk', flat=True).first()
+    )
+    if author_id is not None:
+        scopes += [
+            scope_key('author', author_id),
+            scope_key('followers', author_id),
+        ]
+    return scopes
+
+
+def _post_scopes(request, post_id):
+    scopes = [scope_key('post', post_id)]
+    ids = (
+        Post.objects.filter(pk=post_id)
+        .values_list('author_id', 'group_id').first()
+    )
+    if ids is not None:
+        author_id, group_id = ids
+        scopes.append(scope_key('author', author_id))
+        if group_id is not None:
+            scopes.append(scope_key('group', group_id))
+    return scopes
+
+
+def _comments(post_id, cursor, per_page):
+    """Страница комментариев поста по курсору, от новых к старым.
+
+    Страница читается лениво, при первом обращении из шаблона, так что
+    закэшированный фрагмент не стоит запроса. Битый курсор заменяется
+    пустым: он входит в ключ фрагмента.
+    """
+    try:
+        decode_cursor(cursor)
+    except InvalidCursor:
+        cursor = ''
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        per_page, ordering='-created'
+    )
+    return cursor, SimpleLazyObject(lambda: paginator.page(cursor))
+
+
+def _render_feed(request, template_name, context):
+    """``render`` или, с ``POSTS_STREAMING``, потоковый ответ."""
+    if settings.POSTS_STREAMING:
+        return stream_response(request, template_name, context)
+    return render(request, template_name, context)
+
+
+@conditional(lambda request: [scope_key('feed')])
 def index(request):
-    post_list = Post.objects.order_by('-pub_date')
-    paginator = Paginator(post_list, COUNT_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = feed_queryset(Post.objects.all(), 'posts/index.html')
+    version = get_version(scope_key('feed'))
+    page_obj = paginate(
+        request, post_list, COUNT_POSTS,
+        count=lambda: cached_count('feed', post_list, version)
+    )
     context = {
         'page_obj': page_obj,
+        'cache_version': version,
         'index': True
     }
-    return render(request, 'posts/index.html', context)
+    return _render_feed(request, 'posts/index.html', context)
 
 
+@conditional(_group_scopes)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.order_by('pub_date')
-    paginator = Paginator(posts, COUNT_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = feed_queryset(group.posts.all(), 'posts/group_list.html')
+    page_obj = paginate(
+        request, posts, COUNT_POSTS, 'pub_date', count=group.posts_count
+    )
     context = {
         'group': group,
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'cache_version': get_version(scope_key('group', group.pk))
     }
-    return render(request, 'posts/group_list.html', context)
+    return _render_feed(request, 'posts/group_list.html', context)
 
 
+@conditional(_profile_scopes)
 def profile(request, username):
-    user_name = get_object_or_404(User, username=username)
-    posts = user_name.posts.order_by('pub_date')
-    paginator = Paginator(posts, COUNT_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    number = posts.count()
+    user_name = get_object_or_404(
+        User.objects.select_related('counters'), username=username
+    )
+    posts = feed_queryset(user_name.posts.all(), 'posts/profile.html')
+    # Счётчики уже прочитаны вместе с пользователем, если строка есть.
+    counters = (
+        getattr(user_name, 'counters', None)
+        or get_user_counters(user_name)
+    )
+    page_obj = paginate(
+        request, posts, COUNT_POSTS, 'pub_date', count=counters.posts_count
+    )
     context = {
         'username': user_name,
-        'number': number,
-        'page_obj': page_obj
+        'number': counters.posts_count,
+        'counters': counters,
+        'page_obj': page_obj,
+        'cache_version': get_version(scope_key('author', user_name.pk))
     }
-    return render(request, 'posts/profile.html', context)
+    return _render_feed(request, 'posts/profile.html', context)
 
 
+@conditional(_post_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    number = post.author.posts.count()
-    comments = post.comments.all()
+    post = get_object_or_404(
+        feed_queryset(Post.objects.all(), 'posts/post_detail.html'),
+        pk=post_id
+    )
+    number = get_user_counters(post.author).posts_count
+    cursor = request.GET.get('comments', '')
+    cursor, comments = _comments(
+        post.pk, cursor,
+        settings.POSTS_COMMENTS_PER_PAGE if cursor
+        else settings.POSTS_COMMENTS_FIRST_PAGE
+    )
     form = CommentForm(request.POST or None)
+    scopes = [scope_key('post', post.pk), scope_key('author', post.author_id)]
+    if post.group_id is not None:
+        # Боковая колонка показывает название группы.
+        scopes.append(scope_key('group', post.group_id))
     context = {
         'post': post,
         'number': number,
         'form': form,
-        'comments': comments
+        'comments': comments,
+        'comments_cursor': cursor,
+        'cache_version': get_version(*scopes)
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@conditional(_post_scopes)
+def post_comments(request, post_id):
+    """Фрагмент со следующей страницей комментариев для «Показать ещё»."""
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    cursor, comments = _comments(
+        post_id, request.GET.get('cursor', ''),
+        settings.POSTS_COMMENTS_PER_PAGE
+    )
+    context = {
+        'post_id': post_id,
+        'comments': comments,
+        'comments_cursor': cursor,
+        'cache_version': get_version(scope_key('post', post_id)),
+    }
+    return render(request, 'includes/comment_list.html', context)
+
+
 @login_required
+@ratelimit('post')
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -101,6 +228,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('comment')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -114,18 +242,31 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, COUNT_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = feed_queryset(
+        timeline_queryset(request.user),
+        'posts/follow.html'
+    )
+    version = get_version(
+        scope_key('feed'),
+        scope_key('timeline'),
+        scope_key('follow', request.user.pk)
+    )
+    page_obj = paginate(
+        request, post_list, COUNT_POSTS, '-feed_date', 'feed_id',
+        count=lambda: cached_count(
+            f'follow:{request.user.pk}', post_list, version
+        )
+    )
     context = {
         'page_obj': page_obj,
+        'cache_version': version,
         'follow': True
     }
-    return render(request, 'posts/follow.html', context)
+    return _render_feed(request, 'posts/follow.html', context)
 
 
 @login_required
+@ratelimit('follow', methods=None)
 def profile_follow(request, username):
     follow = get_object_or_404(User, username=username)
     if follow != request.user:
@@ -137,12 +278,54 @@ def profile_follow(request, username):
 
 
 @login_required
+@ratelimit('follow', methods=None)
 def profile_unfollow(request, username):
     follow = get_object_or_404(User, username=username)
-    is_exist = Follow.objects.filter(
-        user=request.user,
-        author=follow
-    ).exists()
-    if is_exist:
-        Follow.objects.filter(user=request.user, author=follow).delete()
+    Follow.objects.filter(user=request.user, author=follow).delete()
     return redirect('posts:profile', username=username)
+
+
+def _search_page(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        number = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        number = 1
+    posts = search_posts(
+        query,
+        offset=(number - 1) * COUNT_POSTS,
+        limit=COUNT_POSTS + 1,
+        queryset=feed_queryset(Post.objects.all(), 'posts/index.html')
+    )
+    return query, number, posts[:COUNT_POSTS], len(posts) > COUNT_POSTS
+
+
+def search(request):
+    query, number, posts, has_next = _search_page(request)
+    context = {
+        'query': query,
+        'posts': posts,
+        'number': number,
+        'previous_page': number - 1 if number > 1 else None,
+        'next_page': number + 1 if has_next else None
+    }
+    return _render_feed(request, 'posts/search.html', context)
+
+
+def search_api(request):
+    query, number, posts, has_next = _search_page(request)
+    return JsonResponse({
+        'query': query,
+        'page': number,
+        'next_page': number + 1 if has_next else None,
+        'results': [
+            {
+                'id': post.pk,
+                'text': post.text,
+                'author': post.author.username,
+                'group': post.group.slug if post.group else None,
+                'pub_date': post.pub_date,
+            }
+            for post in posts
+        ]
+    })
@@ -22,6 +22,7 @@ INSTALLED_APPS = [
     'about.apps.AboutConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -33,6 +34,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    # Снаружи сессий, чтобы увидеть и запись сессии после ответа
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,7 +57,7 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.InstrumentedTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -62,7 +66,8 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                'core.context_processors.year.year'
+                'core.context_processors.year.year',
+                'core.context_processors.cache.fragment_cache'
             ],
         },
     },
@@ -70,6 +75,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Разбирать все шаблоны при запуске WSGI-процесса; имеет смысл только с
+# кэширующим загрузчиком
+TEMPLATES_WARMUP = False
+
 
 DATABASES = {
     'default': {
@@ -78,12 +87,79 @@ DATABASES = {
     }
 }
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# Реплики только для чтения: пути к файлам SQLite через запятую. Локально
+# это копии db.sqlite3, которые обновляются вручную, в тестах — сама
+# основная база.
+for number, path in enumerate(filter(None, os.environ.get(
+    'YATUBE_DB_REPLICAS', ''
+).split(',')), start=1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path.strip(),
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Сколько секунд после записи клиент читает основную базу, а не реплики
+DATABASE_STICKY_SECONDS = 10
+
+DATABASE_STICKY_COOKIE = 'db_written'
+
+# PRAGMA, которые выполняются на каждом новом соединении SQLite
+SQLITE_PRAGMAS = {}
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    # Любой сервер с протоколом Redis; нужен пакет django-redis
+    'redis': 'django_redis.cache.RedisCache',
 }
 
+CACHE_BACKEND = os.environ.get('YATUBE_CACHE_BACKEND', 'locmem')
+
+CACHE_LOCATION = os.environ.get(
+    'YATUBE_CACHE_LOCATION',
+    os.path.join(BASE_DIR, 'cache') if CACHE_BACKEND == 'file' else 'yatube'
+)
+
+CACHE_KEY_PREFIX = os.environ.get('YATUBE_CACHE_PREFIX', 'yatube')
+
+
+def cache_namespace(namespace):
+    """Алиас кэша с собственным префиксом ключей в общем хранилище."""
+    return {
+        'BACKEND': 'core.cache.InstrumentedCache',
+        'LOCATION': CACHE_LOCATION,
+        'KEY_PREFIX': f'{CACHE_KEY_PREFIX}:{namespace}',
+        'OPTIONS': {
+            'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+            'ALIAS': namespace,
+        },
+    }
+
+
+CACHES = {
+    'default': cache_namespace('default'),
+    # Используется тегом {% cache %} вместо default
+    'template_fragments': cache_namespace('fragments'),
+    # Счётчики core.ratelimit; общие для всех процессов, если кэш общий
+    'ratelimit': cache_namespace('ratelimit'),
+}
+
+# Ограничения записи на пользователя: область -> (запросов, секунд)
+RATELIMIT_ENABLED = True
+RATELIMITS = {
+    'post': (10, 60 * 60),
+    'comment': (20, 60),
+    'follow': (60, 60),
+}
+
+# Фрагменты инвалидируются сменой поколения, поэтому TTL может быть долгим
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -112,6 +188,20 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+# Расширения статики, для которых collectstatic пишет .gz и .br копии
+STATIC_COMPRESS_EXTENSIONS = (
+    '.css', '.js', '.svg', '.txt', '.html', '.json', '.map', '.xml',
+)
+
+# Отдача статики и медиа из WSGI без Django (core.fileserver)
+SERVE_FILES = False
+
+# Сколько секунд браузер хранит файлы с хэшем в имени и все остальные
+FILES_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+FILES_MAX_AGE = 60 * 60
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -125,3 +215,96 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
+
+# Курсорная пагинация лент по (pub_date, id) вместо номеров страниц
+POSTS_CURSOR_PAGINATION = False
+
+# Сколько номеров страниц показывать по обе стороны от текущей
+POSTS_PAGE_WINDOW = 2
+
+# Сколько секунд число постов ленты считается свежим; устаревшее
+# отдаётся сразу и пересчитывается в фоне
+POSTS_COUNT_TTL = 60
+
+# Ленты отдаются потоком (core.streaming): шапка страницы уходит до
+# запроса записей, записи читаются из базы пачками
+POSTS_STREAMING = False
+STREAMING_CHUNK_SIZE = 100
+STREAMING_BUFFER_SIZE = 8 * 1024
+
+# Лента подписок: авторы с большим числом подписчиков читаются при запросе
+TIMELINE_FANOUT_LIMIT = 5000
+
+# Сколько последних постов автора добавлять в ленту при подписке
+TIMELINE_BACKFILL = 200
+
+# Поиск: 'fts5' (SQLite FTS5), 'index' (таблица SearchTerm) или 'auto'
+POSTS_SEARCH_BACKEND = 'auto'
+
+# Миниатюры, которые строятся в фоне после загрузки: геометрия -> опции
+POSTS_THUMBNAILS = {
+    '480x170': {'crop': 'center', 'format': 'WEBP'},
+    '960x339': {'crop': 'center', 'upscale': True, 'format': 'WEBP'},
+    '1440x509': {'crop': 'center', 'format': 'WEBP'},
+}
+
+# Ширины карточки поста для srcset, от меньшей к большей
+POSTS_THUMBNAIL_SRCSET = ('480x170', '960x339', '1440x509')
+
+# Сколько секунд после сбоя построения миниатюр страницы не ставят
+# пост в очередь снова
+POSTS_THUMBNAIL_RETRY_SECONDS = 60 * 60
+
+# Загрузка картинок: предел файла и числа пикселей, ширина и формат
+# сохраняемой копии
+POSTS_IMAGE_MAX_BYTES = 10 * 2 ** 20
+POSTS_IMAGE_MAX_PIXELS = 40 * 10 ** 6
+POSTS_IMAGE_MAX_WIDTH = 2048
+POSTS_IMAGE_FORMAT = 'WEBP'
+POSTS_IMAGE_QUALITY = 80
+
+# Загрузки больше этого пишутся во временный файл частями, а не в память
+FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+
+# Картинка больше POSTS_IMAGE_MAX_BYTES перестаёт приниматься сразу,
+# как только превысила предел
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.ImageSizeLimitHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Комментарии на странице поста и в каждой подгрузке «Показать ещё»
+POSTS_COMMENTS_FIRST_PAGE = 20
+POSTS_COMMENTS_PER_PAGE = 50
+
+# Фоновые задачи (core.jobs): True — выполнять сразу, без воркера run_jobs
+JOBS_INLINE = False
+
+# Попыток на задачу и задержка первого повтора в секундах; каждый
+# следующий повтор ждёт вдвое дольше
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_DELAY = 10
+
+# Через сколько секунд задачу пропавшего воркера забирает другой
+JOBS_LOCK_TIMEOUT = 300
+
+# Пауза воркера в секундах, когда очередь пуста
+JOBS_POLL_INTERVAL = 1
+
+# Метрики запросов: гистограммы по представлениям и медленные запросы
+METRICS_ENABLED = True
+
+# Запросы дольше этого порога сохраняются вместе с их SQL
+METRICS_SLOW_REQUEST_MS = 500
+
+# Сколько медленных запросов и SQL-выражений в каждом хранить
+METRICS_SLOW_SAMPLES = 20
+METRICS_SLOW_SQL_LIMIT = 50
+
+# Как часто процесс копирует метрики в кэш и сколько они там живут
+METRICS_FLUSH_INTERVAL = 10
+METRICS_TTL = 60 * 60 * 24
+
+# Сохранённые замеры команды benchmark_views
+BENCHMARK_BASELINES = os.path.join(BASE_DIR, 'benchmarks.json')
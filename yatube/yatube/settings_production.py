@@ -0,0 +1,67 @@
+"""Настройки для боевого сервера.
+
+Включаются переменной ``DJANGO_SETTINGS_MODULE=yatube.settings_production``
+и читают всё, что отличает сервер, из окружения:
+
+- ``YATUBE_SECRET_KEY`` — обязателен;
+- ``YATUBE_ALLOWED_HOSTS`` — имена через запятую;
+- ``YATUBE_DEBUG=1`` — вернуть отладку, не меняя остального;
+- ``YATUBE_CONN_MAX_AGE`` — сколько секунд держать соединение с базой;
+- ``YATUBE_SQLITE_MMAP_SIZE`` — байт файла базы, читаемых через mmap;
+- ``YATUBE_SERVE_FILES=0`` — статику и медиа отдаёт внешний сервер.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401, F403
+from .settings import (ALLOWED_HOSTS, DATABASES, INSTALLED_APPS, MIDDLEWARE,
+                       TEMPLATES)
+
+DEBUG = os.environ.get('YATUBE_DEBUG') == '1'
+
+try:
+    SECRET_KEY = os.environ['YATUBE_SECRET_KEY']
+except KeyError:
+    raise ImproperlyConfigured('Не задана переменная YATUBE_SECRET_KEY')
+
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.environ.get('YATUBE_ALLOWED_HOSTS', '').split(',')
+    if host.strip()
+] or ALLOWED_HOSTS
+
+# Панель отладки не нужна на сервере и замедляет каждый запрос
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app != 'debug_toolbar']
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE
+    if not middleware.startswith('debug_toolbar.')
+]
+
+# Соединения живут между запросами вместо открытия на каждый
+CONN_MAX_AGE = int(os.environ.get('YATUBE_CONN_MAX_AGE', 600))
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = CONN_MAX_AGE
+
+# WAL: читатели не ждут писателя; NORMAL в WAL не теряет целостность
+# при сбое процесса, а fsync делается только на контрольных точках.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': int(os.environ.get('YATUBE_SQLITE_MMAP_SIZE', 256 * 2 ** 20)),
+    'busy_timeout': 5000,
+}
+
+# Шаблоны разбираются один раз на процесс
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+TEMPLATES_WARMUP = True
+
+# Имена статики с хэшем содержимого и сжатые копии, см. core.staticfiles
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+SERVE_FILES = os.environ.get('YATUBE_SERVE_FILES', '1') == '1'
@@ -1,3 +1,4 @@
+from core.views import performance_metrics
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
@@ -11,6 +12,8 @@ urlpatterns = [
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('admin/', admin.site.urls),
+    path('metrics/', performance_metrics, name='metrics'),
+    path('api/', include('api.urls', namespace='api')),
     path('', include('posts.urls', namespace='index')),
     path('about/', include('about.urls', namespace='about')),
 ]
@@ -1,7 +1,24 @@
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if settings.SERVE_FILES:
+    from core.fileserver import FileServer
+
+    application = FileServer(application, [
+        (settings.STATIC_URL, settings.STATIC_ROOT, False),
+        # Картинки хранятся по хэшу содержимого, миниатюры — по хэшу
+        # исходника и опций: имя файла не меняет содержимого.
+        (settings.MEDIA_URL, settings.MEDIA_ROOT, True),
+    ])
+
+if settings.TEMPLATES_WARMUP:
+    # Первый запрос воркера не должен разбирать шаблоны.
+    from core.template_backends import warm_templates
+
+    warm_templates()